@@ -1,22 +1,32 @@
 from typing import Any, Text, Dict, List, Optional, Tuple
 import os
 import json
+import time
 from datetime import datetime
 
 from dotenv import load_dotenv
 from rasa_sdk import Action, Tracker, FormValidationAction
 from rasa_sdk.executor import CollectingDispatcher
-from rasa_sdk.events import SlotSet, SessionStarted, ActionExecuted, FollowupAction, UserUtteranceReverted
+from rasa_sdk.events import SlotSet, SessionStarted, ActionExecuted, FollowupAction
 from rasa_sdk.types import DomainDict
 
 from mylogger import get_logger
-from custom_models.flant5_classifier import FlanT5Classifier
-from custom_models.spacy_nlp_md import nlp
-from custom_models.city_area_extractor_ner import CityAreaExtractor
+from custom_models.spacy_nlp_md import SpacyNLPManager
+from custom_models.model_registry import ModelRegistry
+from custom_models.inference_client import (
+    InferenceClient, RemoteCityAreaExtractor, RemoteSpacyNLPManager
+)
+from custom_models.flight_entity_extractor import FLIGHT_ENTITIES_KEY, FlightEntityExtractor
+from custom_models.inference_scheduler import Overloaded
 from utils.apis.openai_client_api import OpenAIClient
 from utils.apis.amadeus_api import AmadeusAPI
 from utils.apis.tripadvisor_api import TripAdvisorAPI
 from utils.date_utils import parse_date_to_iso
+from utils.path_stats import PathStats
+from utils.prefetch import PrefetchCache
+from utils.prefork_server import PREFORK_PARENT_ENV
+from utils.metrics import instrument_action, start_metrics_server
+from utils.tracing import span
 
 
 load_dotenv()
@@ -24,12 +34,73 @@ load_dotenv()
 logger = get_logger(__name__)
 logger.debug("Actions module loaded")
 
+# per action/model/upstream latency histograms, served in the Prometheus text format when a port is set
+# (pre-forked workers serve their own on METRICS_PORT + 1 + i, the parent handles no requests)
+METRICS_PORT = os.getenv('METRICS_PORT')
+if METRICS_PORT and os.getenv(PREFORK_PARENT_ENV) != 'true':
+    start_metrics_server(int(METRICS_PORT))
+
 openai_client = OpenAIClient(api_key=os.getenv('OPENAI_API_KEY'))
 amadeus = AmadeusAPI(client_id=os.getenv('AMADEUS_API_KEY'), client_secret=os.getenv('AMADEUS_API_SECRET'))
 tripadvisor = TripAdvisorAPI()
 
-city_extractor = CityAreaExtractor()
+city_gazetteer = ModelRegistry.get("city_gazetteer")
+
+# heavy models: loaded in this process, or shared by all workers through the inference server
+# (python -m custom_models.inference_server) when INFERENCE_SERVER_URL is set
+INFERENCE_SERVER_URL = os.getenv('INFERENCE_SERVER_URL')
+if INFERENCE_SERVER_URL:
+    inference_client = InferenceClient(INFERENCE_SERVER_URL)
+    city_extractor = RemoteCityAreaExtractor(inference_client)
+    RemoteSpacyNLPManager.configure(inference_client)
+    spacy_nlp = RemoteSpacyNLPManager
+    logger.info("Using the inference server at %s", INFERENCE_SERVER_URL)
+else:
+    city_extractor = ModelRegistry.get("city_ner")
+    ModelRegistry.get("spacy")
+    spacy_nlp = SpacyNLPManager
+
+# food_or_not detection: "local" (embedding classifier, falls back to OpenAI below the threshold) or "openai"
+FOOD_CLASSIFIER_BACKEND = os.getenv('FOOD_CLASSIFIER_BACKEND', 'local').lower()
+FOOD_CLASSIFIER_THRESHOLD = float(os.getenv('FOOD_CLASSIFIER_THRESHOLD', '0.05'))
+food_classifier = ModelRegistry.get("food_classifier") if FOOD_CLASSIFIER_BACKEND == 'local' else None
+
+# flight slot extraction: "llm", "hybrid" (spaCy rules first, LLM only for missing slots) or "local";
+# the rules usually already ran in the TravelEntityExtractor NLU component (see config.yml).
+# hybrid stays opt-in until a labelled comparison shows it is as accurate as the LLM
+FLIGHT_EXTRACTION_MODE = os.getenv('FLIGHT_EXTRACTION_MODE', 'llm').lower()
+# log the extraction path counts every N flight requests, 0 disables the log
+FLIGHT_STATS_LOG_EVERY = int(os.getenv('FLIGHT_STATS_LOG_EVERY', '20'))
+flight_entity_extractor = FlightEntityExtractor(spacy_nlp)
+flight_extraction_stats = PathStats("flight_extraction")
+
+# speculative airport lookups (and optionally hotel locations) while the flight form is still being filled
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() == 'true'
+PREFETCH_HOTELS = os.getenv('PREFETCH_HOTELS', 'false').lower() == 'true'
+# a prefetch already running is the same request the lookup would make, so it is awaited until it
+# finishes (or at most PREFETCH_WAIT_SECONDS, 0: no limit); one still queued is cancelled and the lookup runs itself
+PREFETCH_WAIT_SECONDS = float(os.getenv('PREFETCH_WAIT_SECONDS', '0')) or None
+prefetch_cache = PrefetchCache(max_workers=int(os.getenv('PREFETCH_WORKERS', '4')))
+
+
+def extract_city(message: str) -> Optional[str]:
+    """City or area as the user wrote it, found by the transformer NER, None when the model sheds the
+    request (callers fall back to spaCy). The gazetteer is left out here: it would turn an area such as
+    Manhattan into its city, and hotel/explore searches want the user's own place name"""
+    try:
+        return city_extractor.extract_city(message, use_gazetteer=False)
+    except Overloaded as e:
+        logger.warning("City NER skipped: %s", e)
+        return None
+
+
+def get_airports(city: str) -> List[Dict[Text, Any]]:
+    """Up to 2 airports serving the city"""
+    airport_prompt = openai_client.create_airport_prompt(city)
+    return openai_client.get_completion(airport_prompt)['airports'][:2]
+
 
+@instrument_action
 class ActionSessionStart(Action):
     def name(self) -> Text:
         return "action_session_start"
@@ -39,288 +110,131 @@ class ActionSessionStart(Action):
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
 
         dispatcher.utter_message(response="utter_welcome_menu")
+        prefetch_cache.discard(tracker.sender_id)
 
         logger.info("Session started....")
 
         return [SessionStarted()]
 
 
-class ActionValidateIntent(Action):
-    def __init__(self):
-        self.classifier = FlanT5Classifier()
-
-    def name(self) -> Text:
-        return "action_validate_intent"
-
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-
-        logger.debug("ActionValidateIntent started")
-        logger.debug(f"Active loop: {tracker.active_loop}")
-        logger.debug(f"All slots: {tracker.current_slot_values()}")
-
-        active_loop = tracker.active_loop.get('name')
-        if active_loop:
-            logger.debug(f"Skipping intent validation - active form: {active_loop}")
-            return []
-                
-        logger.debug("Starting intent validation...")
-
-        latest_message = tracker.latest_message.get('text')
-        rasa_intent = tracker.latest_message.get('intent').get('name')
-        rasa_confidence = tracker.latest_message.get('intent').get('confidence', 0.0)
-
-        intents_to_validate = ['find_compare_flights', 'suggest_hotels', 'explore_activities_places']
-        if rasa_intent not in intents_to_validate:
-            return []
-
-        # get FlanT5 prediction
-        prompt = self.classifier.create_prompt(latest_message)
-        predicted_intent, confidence_score = self.classifier.classify(prompt)
-
-        logger.info(f"User message: {latest_message}")
-        logger.info(f"RASA Intent: {rasa_intent} (confidence: {rasa_confidence})")
-        logger.info(f"FlanT5 Few-shot Intent: {predicted_intent} (confidence: {confidence_score})")
-        # logger.info(f"Confidence Score: {confidence_score:.2f}")
-
-        # all_intents = tracker.latest_message.get('intent_ranking', [])
-        # logger.info("All intent confidences:")
-        # for intent in all_intents:
-        #     logger.info(f"Intent: {intent['name']}, Confidence: {intent['confidence']}")
-
-        if predicted_intent != rasa_intent and predicted_intent == "out_of_scope":
-            logger.info(f"Reverting to FlanT5 Few-shot Intent: {predicted_intent}")
-            dispatcher.utter_message(text="Seems like you are asking something out of my scope. Could you try something else from the options available?")
-            # preventing Rasa from going forward with its intent
-            return [UserUtteranceReverted()]
-        
-            # return [{"intent": predicted_intent}]
-            #
-            # return [
-            #     {"event": "revert_user_message"},
-            #     {"event": "user", "intent": "nlu_fallback"}
-            # ]
-
-        return []
-
+@instrument_action
 class ActionExtractFlightEntities(Action):
     def name(self) -> Text:
         return "action_extract_flight_entities"
     
-    def _extract_flight_type(self, doc) -> Optional[str]:
-        """Extract flight type (oneway/round_trip)"""
-        for ent in doc.ents:
-            if ent.label_ == "FLIGHT_TYPE" and ent._.id:
-                logger.info(f"Found flight type: {ent._.id}")
-
-                return ent._.id
-        return None
-
-
-    def _extract_cities(self, doc) -> Tuple[Optional[str], Optional[str]]:
-        """Extract departure and arrival cities"""
-        departure_city = None
-        arrival_city = None
-        used_cities = set()
-
-        logger.debug(f"Processing text for city extraction: {doc.text}")
-
-        # 1st look for explicit from/to indicators
-        found_indicators = []
-
-        for ent in doc.ents:
-            if ent.label_ == "LOCATION_INDICATOR" and ent._.id:
-                found_indicators.append((ent._.id, ent.start, ent.end))
-
-        logger.debug(f"Found indicators: {found_indicators}")
-
-        # 2nd look for cities after each indicator
-        for indicator_id, start, end in found_indicators:
-            next_idx = end
-            while next_idx < len(doc) and doc[next_idx].is_stop:
-                next_idx += 1
-
-            if next_idx >= len(doc):
-                continue
-
-            # try to find a city (up to 3 tokens)
-            for end_idx in range(next_idx + 1, min(next_idx + 4, len(doc))):
-                potential_city = doc[next_idx:end_idx].text
-                validation_doc = nlp(potential_city)
-
-                if any(val_ent.label_ == "GPE" for val_ent in validation_doc.ents):
-                    if indicator_id == "departure" and not departure_city:
-                        departure_city = potential_city
-                        used_cities.add(potential_city)
-                        logger.info(f"Found departure city with indicator: {departure_city}")
-                        break
-                    elif indicator_id == "arrival" and not arrival_city:
-                        arrival_city = potential_city
-                        used_cities.add(potential_city)
-                        logger.info(f"Found arrival city with indicator: {arrival_city}")
-                        break
-
-        # if we're still missing cities, look for GPEs
-        if not (departure_city and arrival_city):
-            gpe_entities = [ent.text for ent in doc.ents if ent.label_ == "GPE"
-                        and ent.text not in used_cities]
-            logger.debug(f"Found unused GPE entities: {gpe_entities}")
-
-            # Use context to determine city roles
-            if gpe_entities:
-                # If we have 'to' or arrow, second GPE is arrival
-                if ("to" in doc.text.lower() or "->" in doc.text or "→" in doc.text) and len(gpe_entities) >= 2:
-                    if not departure_city:
-                        departure_city = gpe_entities[0]
-                    if not arrival_city:
-                        arrival_city = gpe_entities[1]
-                # If we only found one GPE
-                elif len(gpe_entities) == 1:
-                    if "to" in doc.text.lower() and not arrival_city:
-                        arrival_city = gpe_entities[0]
-                    elif "from" in doc.text.lower() and not departure_city:
-                        departure_city = gpe_entities[0]
-                    # If no indicator, default to arrival (most common case)
-                    elif not arrival_city:
-                        arrival_city = gpe_entities[0]
-
-        logger.info(f"Final cities - departure: {departure_city}, arrival: {arrival_city}")
-
-        return departure_city, arrival_city
-
-
-    def _extract_dates(self, doc, flight_type: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
-        """Extract departure and return dates"""
-        departure_date = None
-        return_date = None
-
-        # getting all potential date texts (both from spaCy and text patterns)
-        date_texts = []
-
-        # getting dates from spaCy entities
-        date_texts.extend([ent.text for ent in doc.ents if ent.label_ == "DATE"])
-
-        # also try to parse any potential date expressions
-        for token in doc:
-            potential_date = parse_date_to_iso(token.text)
-            if potential_date:
-                date_texts.append(token.text)
-
-        logger.debug(f"Found potential date expressions: {date_texts}")
-
-        # try to parse dates in order found
-        parsed_dates = []
-        for date_text in date_texts:
-            parsed_date = parse_date_to_iso(date_text)
-            if parsed_date and parsed_date not in parsed_dates:
-                parsed_dates.append(parsed_date)
-
-        logger.debug(f"Successfully parsed dates: {parsed_dates}")
-
-        # assign dates based on order and context
-        if parsed_dates:
-            departure_date = parsed_dates[0]
-            if len(parsed_dates) > 1:
-                return_date = parsed_dates[1]
-
-        logger.info(f"Final dates - departure: {departure_date}, return: {return_date}")
-
-        return departure_date, return_date
-
-
-    def _extract_passengers(self, doc) -> Optional[str]:
-        """Extract number of passengers"""
-        for ent in doc.ents:
-            if ent.label_ == "PASSENGERS":
-                for token in ent:
-                    if token.like_num:
-                        try:
-                            num = int(token.text)
-                            if num > 0:
-                                logger.info(f"Found {num} passengers")
-                                return str(num)
-                        except ValueError:
-                            pass
-        return None
-
     # extraction stuff logic can just be an LLM call 🤷‍♀️
     def extract_entities(self, text: str, domain: Dict[Text, Any]) -> Dict[str, Any]:
         forms = domain.get('forms', {})
         required_slots = forms.get('flight_searching_form', {}).get('required_slots', [])
 
         try:
-            doc = nlp(text)
-            extracted = {slot: None for slot in required_slots}
-
-            # Extract all entities
-            flight_type = self._extract_flight_type(doc)
-            departure_city, arrival_city = self._extract_cities(doc)
-            departure_date, return_date = self._extract_dates(doc, flight_type)
-            num_passengers = self._extract_passengers(doc)
-
-            # Update extracted dict with found values
-            if "departure_city" in extracted:
-                extracted["departure_city"] = departure_city
-            if "arrival_city" in extracted:
-                extracted["arrival_city"] = arrival_city
-            if "departure_date" in extracted:
-                extracted["departure_date"] = departure_date
-            if "return_date" in extracted:
-                extracted["return_date"] = return_date
-            if "num_passengers" in extracted:
-                extracted["num_passengers"] = num_passengers
-            # if "flight_type" in extracted:
-            #     extracted["flight_type"] = flight_type
-
-            logger.info(f"Extracted entities: {extracted}")
+            found = flight_entity_extractor.extract(text)
+            extracted = {slot: found.get(slot) for slot in required_slots}
+
+            logger.info("Extracted entities: %s", extracted)
             return extracted
 
         except Exception as e:
-            logger.error(f"Error in entity extraction: {e}")
+            logger.error("Error in entity extraction: %s", e)
             return {slot: None for slot in required_slots}
 
 
+    def _unresolved_slots(self, extracted: Dict[str, Any], required_slots: List[str]) -> List[str]:
+        """Required slots that the local extractor left empty or ambiguous"""
+        unresolved = [slot for slot in required_slots if extracted.get(slot) is None]
+
+        # the same city twice means the from/to roles were not told apart
+        departure_city = extracted.get("departure_city")
+        arrival_city = extracted.get("arrival_city")
+        if departure_city and arrival_city and departure_city.lower() == arrival_city.lower():
+            unresolved.extend(["departure_city", "arrival_city"])
+
+        # a return before the departure means the dates were picked up in the wrong order
+        departure_date = extracted.get("departure_date")
+        return_date = extracted.get("return_date")
+        if departure_date and return_date and return_date < departure_date:
+            unresolved.extend(["departure_date", "return_date"])
+
+        return [slot for slot in required_slots if slot in unresolved]
+
+
+    def _extract_with_llm(self, text: str, fields: List[str]) -> Dict[str, Any]:
+        prompt = openai_client.create_flight_extraction_prompt(text, fields)
+        llm_entities = openai_client.get_completion(prompt)
+        logger.info("LLM extracted entities for %s: %s", fields, llm_entities)
+        return {field: llm_entities.get(field) for field in fields}
+
+
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
             
         active_loop = tracker.active_loop.get('name')
         if active_loop:
-            logger.debug(f"Skipping entity extraction - active form: {active_loop}")
+            logger.debug("Skipping entity extraction - active form: %s", active_loop)
             return []
             
         latest_message = tracker.latest_message.get('text')
         events = []
         forms = domain.get('forms', {})
         required_slots = forms.get('flight_searching_form', {}).get('required_slots', [])
-        logger.info(f"Required slots: {required_slots}")
+        logger.info("Required slots: %s", required_slots)
 
         # reset all slots at the start
         for slot in required_slots:
             events.append(SlotSet(slot, None))
 
+        path = "error"
+        start_time = time.perf_counter()
         try:
-            prompt = openai_client.create_flight_extraction_prompt(latest_message)
-            # extracted_entities = self.extract_entities(latest_message, domain)
-            extracted_entities = openai_client.get_completion(prompt)
-            logger.info(f"Extracted entities: {extracted_entities}")
+            # the path is only set once its extraction returned, failures are recorded as "error"
+            if FLIGHT_EXTRACTION_MODE == "llm":
+                extracted_entities = self._extract_with_llm(latest_message, required_slots)
+                path = "llm"
+            else:
+                nlu_extracted = tracker.latest_message.get(FLIGHT_ENTITIES_KEY)
+                if nlu_extracted is not None:
+                    # already extracted with the same rules by the TravelEntityExtractor NLU component
+                    extracted_entities = {slot: nlu_extracted.get(slot) for slot in required_slots}
+                    path = "nlu"
+                else:
+                    extracted_entities = self.extract_entities(latest_message, domain)
+                    path = "local"
+
+                unresolved_slots = self._unresolved_slots(extracted_entities, required_slots)
+                if unresolved_slots and FLIGHT_EXTRACTION_MODE == "hybrid":
+                    logger.info("Asking the LLM only for unresolved slots: %s", unresolved_slots)
+                    try:
+                        extracted_entities.update(self._extract_with_llm(latest_message, unresolved_slots))
+                        path = f"{path}+llm"
+                    except Exception as e:
+                        # keep whatever the local extractor found, the form asks for the rest
+                        logger.error("Error in LLM entity extraction: %s", e)
+                        path = f"{path}+llm_error"
+                        for slot in unresolved_slots:
+                            extracted_entities[slot] = None
+
+            logger.info("Extracted entities (%s): %s", path, extracted_entities)
 
             # set slots and log each one
             for entity, value in extracted_entities.items():
                 if entity in required_slots and value is not None:
-                    logger.info(f"Setting slot {entity} = {value}")
+                    logger.info("Setting slot %s = %s", entity, value)
                     events.append(SlotSet(entity, value))
         except Exception as e:
-            logger.error(f"Error in entity extraction: {e}")
+            logger.error("Error in entity extraction: %s", e)
 
             # if extraction fails, just reset slots and return
             return events
+        finally:
+            flight_extraction_stats.record(path, time.perf_counter() - start_time)
+            if FLIGHT_STATS_LOG_EVERY > 0 and flight_extraction_stats.total % FLIGHT_STATS_LOG_EVERY == 0:
+                logger.info(flight_extraction_stats.format_summary())
 
         # check missing slots based on extracted entities
         missing_slots = [slot for slot in required_slots
                     if slot not in extracted_entities or extracted_entities[slot] is None]
-        logger.info(f"Missing slots: {missing_slots}")
+        logger.info("Missing slots: %s", missing_slots)
         
         if missing_slots:
             logger.info("Activating form to collect missing slots")
@@ -328,6 +242,7 @@ class ActionExtractFlightEntities(Action):
         
         return events
 
+@instrument_action
 class ActionExtractHotelEntities(Action):
     def name(self) -> Text:
         return "action_extract_hotel_entities"
@@ -338,14 +253,14 @@ class ActionExtractHotelEntities(Action):
 
         active_loop = tracker.active_loop.get('name')
         if active_loop:
-            logger.debug(f"Skipping entity extraction - active form: {active_loop}")
+            logger.debug("Skipping entity extraction - active form: %s", active_loop)
             return []
 
         latest_message = tracker.latest_message.get('text')
         events = []
         forms = domain.get('forms', {})
         required_slots = forms.get('hotel_searching_form', {}).get('required_slots', [])
-        logger.info(f"Required slots: {required_slots}")
+        logger.info("Required slots: %s", required_slots)
 
         # reset all slots at the start
         for slot in required_slots:
@@ -353,20 +268,20 @@ class ActionExtractHotelEntities(Action):
 
         try:
             # 1. extract city using the transformer-based NER (better for city names)
-            transformer_city = city_extractor.extract_city(latest_message)
-            logger.info(f"Transformer city: {transformer_city}")
+            transformer_city = extract_city(latest_message)
+            logger.info("Transformer city: %s", transformer_city)
             # 2. process with spaCy to find organizations and facilities
-            doc = nlp(latest_message)
+            doc = spacy_nlp.parse(latest_message, profile="ner_only")
 
             # get the first ORG/FAC
             first_org_fac = next((ent.text for ent in doc.ents if ent.label_ in ["ORG", "FAC"]), None)
-            logger.info(f"First ORG/FAC: {first_org_fac}")
+            logger.info("First ORG/FAC: %s", first_org_fac)
 
             # get the first GPE/LOC (if transformer didn't find a city)
             first_gpe_loc = None
             if not transformer_city:
                 first_gpe_loc = next((ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]), None)
-                logger.info(f"First GPE/LOC: {first_gpe_loc}")
+                logger.info("First GPE/LOC: %s", first_gpe_loc)
 
             # construct hotel_city_text based on available information
             hotel_city_text = None
@@ -374,31 +289,31 @@ class ActionExtractHotelEntities(Action):
             if transformer_city and first_org_fac:
                 # if we have both city from transformer and facility from spaCy
                 hotel_city_text = f"in {transformer_city} around {first_org_fac}"
-                logger.info(f"1. Hotel city text: {hotel_city_text}")
+                logger.info("1. Hotel city text: %s", hotel_city_text)
             elif first_gpe_loc and first_org_fac:
                 # if we have both location from spaCy and organization/facility
                 hotel_city_text = f"in {first_gpe_loc} around {first_org_fac}"
-                logger.info(f"2. Hotel city text: {hotel_city_text}")
+                logger.info("2. Hotel city text: %s", hotel_city_text)
             elif transformer_city:
                 # if we only have city from transformer
                 hotel_city_text = transformer_city
-                logger.info(f"3. Hotel city text: {hotel_city_text}")
+                logger.info("3. Hotel city text: %s", hotel_city_text)
             elif first_gpe_loc:
                 # if we only have location from spaCy
                 hotel_city_text = first_gpe_loc
-                logger.info(f"4. Hotel city text: {hotel_city_text}")
+                logger.info("4. Hotel city text: %s", hotel_city_text)
             elif first_org_fac:
                 # if we only have organization/facility
                 hotel_city_text = f"around {first_org_fac}"
-                logger.info(f"5. Hotel city text: {hotel_city_text}")
+                logger.info("5. Hotel city text: %s", hotel_city_text)
 
             # only set the slot if we actually found an entity
             if "hotel_city" in required_slots and hotel_city_text is not None:
-                logger.info(f"Setting slot hotel_city = {hotel_city_text}")
+                logger.info("Setting slot hotel_city = %s", hotel_city_text)
                 events.append(SlotSet("hotel_city", hotel_city_text))
 
         except Exception as e:
-            logger.error(f"Error in entity extraction: {e}")
+            logger.error("Error in entity extraction: %s", e)
             # if extraction fails, just return events with reset slots
             return events
 
@@ -406,7 +321,7 @@ class ActionExtractHotelEntities(Action):
         # this determines if we need to activate the form for user input
         missing_slots = [slot for slot in required_slots
                         if tracker.get_slot(slot) is None]
-        logger.info(f"Missing slots: {missing_slots}")
+        logger.info("Missing slots: %s", missing_slots)
 
         # if there are missing required slots, activate the form to collect them from the user
         if missing_slots:
@@ -416,24 +331,40 @@ class ActionExtractHotelEntities(Action):
         return events
 
 
+@instrument_action
 class ActionExtractExploreEntities(Action):
     def name(self) -> Text:
         return "action_extract_explore_entities"
 
+    def _detect_food_or_not(self, text: str) -> Optional[str]:
+        """Decide between restaurants/attractions, locally if confident enough, otherwise with OpenAI"""
+        if food_classifier is not None:
+            try:
+                label, confidence = food_classifier.classify(text)
+                logger.info("Local food or not: %s (confidence: %s)", label, confidence)
+                if confidence >= FOOD_CLASSIFIER_THRESHOLD:
+                    return label
+                logger.info("Local confidence below %s, falling back to OpenAI", FOOD_CLASSIFIER_THRESHOLD)
+            except Exception as e:
+                logger.error("Error in local food classification, falling back to OpenAI: %s", e)
+
+        prompt = openai_client.create_food_detection_prompt(text)
+        return openai_client.get_completion(prompt).get("food_or_not")
+
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
 
         active_loop = tracker.active_loop.get('name')
         if active_loop:
-            logger.debug(f"Skipping entity extraction - active form: {active_loop}")
+            logger.debug("Skipping entity extraction - active form: %s", active_loop)
             return []
 
         latest_message = tracker.latest_message.get('text')
         events = []
         forms = domain.get('forms', {})
         required_slots = forms.get('explore_activities_places_form', {}).get('required_slots', [])
-        logger.info(f"Required slots: {required_slots}")
+        logger.info("Required slots: %s", required_slots)
 
         # reset all slots at the start
         for slot in required_slots:
@@ -442,20 +373,20 @@ class ActionExtractExploreEntities(Action):
         # TODO: Remove this logic to a separate common method/function as it's the same with ActionExtractHotelEntities above^^^
         try:
             # 1. extract city using the transformer-based NER (better for city names)
-            transformer_city = city_extractor.extract_city(latest_message)
-            logger.info(f"Transformer city: {transformer_city}")
+            transformer_city = extract_city(latest_message)
+            logger.info("Transformer city: %s", transformer_city)
             # 2. process with spaCy to find organizations and facilities
-            doc = nlp(latest_message)
+            doc = spacy_nlp.parse(latest_message, profile="ner_only")
 
             # get the first ORG/FAC
             first_org_fac = next((ent.text for ent in doc.ents if ent.label_ in ["ORG", "FAC"]), None)
-            logger.info(f"First ORG/FAC: {first_org_fac}")
+            logger.info("First ORG/FAC: %s", first_org_fac)
 
             # get the first GPE/LOC (if transformer didn't find a city)
             first_gpe_loc = None
             if not transformer_city:
                 first_gpe_loc = next((ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]), None)
-                logger.info(f"First GPE/LOC: {first_gpe_loc}")
+                logger.info("First GPE/LOC: %s", first_gpe_loc)
 
             # construct explore_city_text based on available information
             explore_city_text = None
@@ -464,46 +395,44 @@ class ActionExtractExploreEntities(Action):
             if transformer_city and first_org_fac:
                 # if we have both city from transformer and facility from spaCy
                 explore_city_text = f"in {transformer_city} around {first_org_fac}"
-                logger.info(f"1A. Explore city text: {explore_city_text}")
+                logger.info("1A. Explore city text: %s", explore_city_text)
             elif transformer_city and first_gpe_loc:
                 # if we have both city from transformer and location from spaCy
                 explore_city_text = f"in {first_gpe_loc}"
-                logger.info(f"1B. Explore city text: {explore_city_text}")
+                logger.info("1B. Explore city text: %s", explore_city_text)
             elif first_gpe_loc and first_org_fac:
                 # if we have both location from spaCy and organization/facility
                 explore_city_text = f"in {first_gpe_loc} around {first_org_fac}"
-                logger.info(f"2. Explore city text: {explore_city_text}")
+                logger.info("2. Explore city text: %s", explore_city_text)
             elif transformer_city:
                 # if we only have city from transformer
                 explore_city_text = transformer_city
-                logger.info(f"3. Explore city text: {explore_city_text}")
+                logger.info("3. Explore city text: %s", explore_city_text)
             elif first_gpe_loc:
                 # if we only have location from spaCy
                 explore_city_text = first_gpe_loc
-                logger.info(f"4. Explore city text: {explore_city_text}")
+                logger.info("4. Explore city text: %s", explore_city_text)
             elif first_org_fac:
                 # if we only have organization/facility
                 explore_city_text = f"around {first_org_fac}"
-                logger.info(f"5. Explore city text: {explore_city_text}")
+                logger.info("5. Explore city text: %s", explore_city_text)
 
             # only set the slot if we actually found an entity
             if "explore_city" in required_slots and explore_city_text is not None:
                 # logger.info(f"Setting slot explore_city = {explore_city_text}")
                 # events.append(SlotSet("explore_city", explore_city_text))
-                logger.info(f"Setting slot explore_city = {latest_message}")
+                logger.info("Setting slot explore_city = %s", latest_message)
                 events.append(SlotSet("explore_city", latest_message))
 
-            food_or_not_text = None
-            prompt = openai_client.create_food_detection_prompt(latest_message)
-            food_or_not_text = openai_client.get_completion(prompt).get("food_or_not")
-            logger.info(f"Food or not text: {food_or_not_text}")
+            food_or_not_text = self._detect_food_or_not(latest_message)
+            logger.info("Food or not text: %s", food_or_not_text)
 
             if "food_or_not" in required_slots and food_or_not_text is not None:
-                logger.info(f"Setting slot food_or_not = {food_or_not_text}")
+                logger.info("Setting slot food_or_not = %s", food_or_not_text)
                 events.append(SlotSet("food_or_not", food_or_not_text.lower()))
 
         except Exception as e:
-            logger.error(f"Error in entity extraction: {e}")
+            logger.error("Error in entity extraction: %s", e)
             # if extraction fails, just return events with reset slots
             return events
 
@@ -511,7 +440,7 @@ class ActionExtractExploreEntities(Action):
         # this determines if we need to activate the form for user input
         missing_slots = [slot for slot in required_slots
                         if tracker.get_slot(slot) is None]
-        logger.info(f"Missing slots: {missing_slots}")
+        logger.info("Missing slots: %s", missing_slots)
 
         # if there are missing required slots, activate the form to collect them from the user
         if missing_slots:
@@ -521,6 +450,7 @@ class ActionExtractExploreEntities(Action):
         return events
 
 
+@instrument_action
 class ActionContinuePromptSearch(Action):
     def name(self) -> Text:
         return "action_continue_prompt_search"
@@ -529,19 +459,8 @@ class ActionContinuePromptSearch(Action):
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
 
-        # check which form was just completed
-        previous_events = list(tracker.events)
-        previous_form = None
-
-        # find the most recent form that was active
-        for event in reversed(previous_events):
-            if event.get('event') == 'active_loop' and event.get('name') is None:
-                # this indicates a form was deactivated
-                for earlier_event in reversed(previous_events[:previous_events.index(event)]):
-                    if earlier_event.get('event') == 'active_loop' and earlier_event.get('name'):
-                        previous_form = earlier_event.get('name')
-                        break
-                break
+        # check which form was just completed, recorded by the search actions
+        previous_form = tracker.get_slot("last_completed_form")
 
         # get relevant slots based on which form was completed
         if previous_form == "flight_searching_form":
@@ -558,6 +477,7 @@ class ActionContinuePromptSearch(Action):
         return []
 
 
+@instrument_action
 class ActionSearchFlights(Action):
     def name(self) -> Text:
         return "action_search_flights"
@@ -569,6 +489,9 @@ class ActionSearchFlights(Action):
         domain: Dict[Text, Any]
     ) -> List[Dict[Text, Any]]:
 
+        # remember which form this search completed (read by action_continue_prompt_search)
+        events = [SlotSet("last_completed_form", "flight_searching_form")]
+
         departure_city = tracker.get_slot('departure_city')
         arrival_city = tracker.get_slot('arrival_city')
         departure_date = tracker.get_slot('departure_date')
@@ -584,30 +507,31 @@ class ActionSearchFlights(Action):
         if not all([departure_city, arrival_city, departure_date, return_date]):
             logger.info("Missing required information for flight search")
             dispatcher.utter_message(text="Sorry, I need all flight details to search for flights.")
-            return []
+            return events
 
         try:
-            # get departure airports & arrival airports
-            departure_prompt = openai_client.create_airport_prompt(departure_city)
-            departure_data = openai_client.get_completion(departure_prompt)
-            departure_airports = departure_data['airports'][:2]
+            # get departure airports & arrival airports (usually prefetched while the form was filled)
+            departure_airports = prefetch_cache.get(tracker.sender_id, "departure_airports", departure_city, timeout=PREFETCH_WAIT_SECONDS)
+            if departure_airports is None:
+                departure_airports = get_airports(departure_city)
 
-            arrival_prompt = openai_client.create_airport_prompt(arrival_city)
-            arrival_data = openai_client.get_completion(arrival_prompt)
-            arrival_airports = arrival_data['airports'][:2]
+            arrival_airports = prefetch_cache.get(tracker.sender_id, "arrival_airports", arrival_city, timeout=PREFETCH_WAIT_SECONDS)
+            if arrival_airports is None:
+                arrival_airports = get_airports(arrival_city)
 
             dispatcher.utter_message(text=f"🔍 Searching flights from {departure_city} to {arrival_city} for {adults} passenger{'' if adults == 1 else 's'}...")
 
             for dep_airport in departure_airports:
                 for arr_airport in arrival_airports:
                     try:
-                        two_way_response = amadeus.search_flights(
-                            origin=dep_airport['IATA_CODE'],
-                            destination=arr_airport['IATA_CODE'],
-                            departure_date=departure_date,
-                            return_date=return_date,
-                            adults=adults
-                        )
+                        with span("route", origin=dep_airport['IATA_CODE'], destination=arr_airport['IATA_CODE']):
+                            two_way_response = amadeus.search_flights(
+                                origin=dep_airport['IATA_CODE'],
+                                destination=arr_airport['IATA_CODE'],
+                                departure_date=departure_date,
+                                return_date=return_date,
+                                adults=adults
+                            )
 
                         two_way_formatted = amadeus.parse_flight_offers(two_way_response, is_round_trip=True)
 
@@ -647,17 +571,18 @@ class ActionSearchFlights(Action):
                             dispatcher.utter_message(text=f"No flights found between <u>{dep_airport['name']}</u> ({dep_airport['IATA_CODE']}) 🔄 <u>{arr_airport['name']}</u> ({arr_airport['IATA_CODE']})")
 
                     except Exception as e:
-                        logger.error(f"Error searching flights for {dep_airport['IATA_CODE']} 🔄 {arr_airport['IATA_CODE']}: {e}")
+                        logger.error("Error searching flights for %s 🔄 %s: %s", dep_airport['IATA_CODE'], arr_airport['IATA_CODE'], e)
                         dispatcher.utter_message(text=f"❌ Couldn't find flights from {dep_airport['name']} to {arr_airport['name']}")
 
-            return []
+            return events
 
         except Exception as e:
-            logger.error(f"Error in flight search: {e}")
+            logger.error("Error in flight search: %s", e)
             dispatcher.utter_message(text="❌ Sorry, I encountered an error while searching for flights.")
-            return []
+            return events
 
 
+@instrument_action
 class ActionSearchHotels(Action):
     def name(self) -> Text:
         return "action_search_hotels"
@@ -669,28 +594,35 @@ class ActionSearchHotels(Action):
         domain: Dict[Text, Any]
     ) -> List[Dict[Text, Any]]:
 
+        # remember which form this search completed (read by action_continue_prompt_search)
+        events = [SlotSet("last_completed_form", "hotel_searching_form")]
+
         hotel_city = tracker.get_slot('hotel_city')
 
         if not hotel_city:
             logger.info("Missing required city information for hotel search")
             dispatcher.utter_message(text="Sorry, I need a city to search for hotels.")
-            return []
+            return events
 
         try:
             # get location ids
             dispatcher.utter_message(text=f"🔍 Searching hotels using the term: <b>{hotel_city}</b> ...")
-            location_ids = tripadvisor.get_location_ids(query=hotel_city, category="hotels")
+            location_ids = None
+            if PREFETCH_HOTELS:
+                location_ids = prefetch_cache.get(tracker.sender_id, "hotel_locations", hotel_city, timeout=PREFETCH_WAIT_SECONDS)
+            if location_ids is None:
+                location_ids = tripadvisor.get_location_ids(query=hotel_city, category="hotels")
 
             # log safely...
             log_entries = []
             for loc in location_ids:
                 log_entries.append(f"id: {loc['location_id']} | name: {loc['name']} | address: {loc['address_string']}")
-            logger.info(f"Location IDs: {' | '.join(log_entries)}")
+            logger.info("Location IDs: %s", ' | '.join(log_entries))
 
             # no hotels found
             if not location_ids:
                 dispatcher.utter_message(text=f"❌ Sorry, I couldn't find any hotels using the above term. Try another one.")
-                return []
+                return events
 
             # get hotel details for each location (our limit is up to 3 anyways)
             found_hotels = False
@@ -758,22 +690,23 @@ class ActionSearchHotels(Action):
                         dispatcher.utter_message(text=f"{'_' * 40}")
 
                 except Exception as e:
-                    logger.error(f"Error getting details for hotel ID {loc_id['location_id']}: {e}")
+                    logger.error("Error getting details for hotel ID %s: %s", loc_id['location_id'], e)
                     import traceback
-                    logger.debug(f"Detailed error: {traceback.format_exc()}")
+                    logger.debug("Detailed error: %s", traceback.format_exc())
                     continue
 
             if not found_hotels:
                 dispatcher.utter_message(text=f"❌ Sorry, I couldn't retrieve details for hotels in {hotel_city}.")
 
-            return []
+            return events
 
         except Exception as e:
-            logger.error(f"Error in hotel search: {e}")
+            logger.error("Error in hotel search: %s", e)
             dispatcher.utter_message(text=f"❌ Sorry, I encountered an error while searching for hotels in {hotel_city}.")
-            return []
+            return events
 
 
+@instrument_action
 class ActionSearchActivitiesPlaces(Action):
     def name(self) -> Text:
         return "action_search_activities_places"
@@ -903,13 +836,16 @@ class ActionSearchActivitiesPlaces(Action):
         domain: Dict[Text, Any]
     ) -> List[Dict[Text, Any]]:
 
+        # remember which form this search completed (read by action_continue_prompt_search)
+        events = [SlotSet("last_completed_form", "explore_activities_places_form")]
+
         explore_city = tracker.get_slot('explore_city')
         food_or_not = tracker.get_slot('food_or_not')
 
         if not all([explore_city, food_or_not]):
             logger.info("Missing required information for explore activities search")
             dispatcher.utter_message(text="Sorry, I need all details to search for activities/places.")
-            return []
+            return events
 
         try:
             # determine the correct category for TripAdvisor API
@@ -922,12 +858,12 @@ class ActionSearchActivitiesPlaces(Action):
             log_entries = []
             for loc in location_ids:
                 log_entries.append(f"id: {loc['location_id']} | name: {loc['name']} | address: {loc['address_string']}")
-            logger.info(f"Location IDs: {' | '.join(log_entries)}")
+            logger.info("Location IDs: %s", ' | '.join(log_entries))
 
             # no places found
             if not location_ids:
                 dispatcher.utter_message(text=f"❌ Sorry, I couldn't find any {category} in {explore_city}.")
-                return []
+                return events
 
             found_places = False
 
@@ -954,22 +890,23 @@ class ActionSearchActivitiesPlaces(Action):
                         dispatcher.utter_message(text=f"{'_' * 40}")
 
                 except Exception as e:
-                    logger.error(f"Error getting details for {category} ID {loc_id['location_id']}: {e}")
+                    logger.error("Error getting details for %s ID %s: %s", category, loc_id['location_id'], e)
                     import traceback
-                    logger.debug(f"Detailed error: {traceback.format_exc()}")
+                    logger.debug("Detailed error: %s", traceback.format_exc())
                     continue
 
             if not found_places:
                 dispatcher.utter_message(text=f"❌ Sorry, I couldn't retrieve details for {category} in {explore_city}.")
 
-            return []
+            return events
 
         except Exception as e:
-            logger.error(f"Error in {food_or_not} search: {e}")
+            logger.error("Error in %s search: %s", food_or_not, e)
             dispatcher.utter_message(text=f"❌ Sorry, I encountered an error while searching for {food_or_not} in {explore_city}.")
-            return []
+            return events
 
 
+@instrument_action
 class ValidateFlightSearchingForm(FormValidationAction):
     def name(self) -> Text:
         return "validate_flight_searching_form"
@@ -985,27 +922,48 @@ class ValidateFlightSearchingForm(FormValidationAction):
         """Validate and format city name.
         Returns formatted city name if valid, None if invalid."""
         if not city or not city.strip():
-            logger.info(f"Empty {slot_name} value")
+            logger.info("Empty %s value", slot_name)
             return None
 
         formatted_value = " ".join(word.capitalize() for word in city.strip().split())
-        doc = nlp(formatted_value)
 
-        if not any(ent.label_ == "GPE" for ent in doc.ents):
-            logger.info(f"{formatted_value} is not recognized as a GPE valid city ({slot_name})")
-            return None
+        # known cities and aliases (e.g. "nyc") skip spaCy and get their official name
+        gazetteer_city = city_gazetteer.match_full(formatted_value)
+        if gazetteer_city:
+            formatted_value = gazetteer_city
+        else:
+            doc = spacy_nlp.parse(formatted_value, profile="ner_only")
+
+            if not any(ent.label_ == "GPE" for ent in doc.ents):
+                logger.info("%s is not recognized as a GPE valid city (%s)", formatted_value, slot_name)
+                return None
 
         # check for duplicate cities
         other_slot = 'arrival_city' if slot_name == 'departure_city' else 'departure_city'
         other_city = tracker.get_slot(other_slot)
         if other_city and other_city.lower() == formatted_value.lower():
-            logger.info(f"Duplicate cities: {formatted_value} already set as {other_slot}")
+            logger.info("Duplicate cities: %s already set as %s", formatted_value, other_slot)
             dispatcher.utter_message(text="The departure and arrival cities cannot be the same.")
             return None
 
+        self._prefetch_for_city(formatted_value, slot_name, tracker)
         return formatted_value
 
 
+    def _prefetch_for_city(self, city: Text, slot_name: Text, tracker: Tracker) -> None:
+        """Start the airport lookup (and hotel locations for the arrival city) in the background,
+        ActionSearchFlights picks the results up instead of waiting for them after the form."""
+        if not PREFETCH_ENABLED:
+            return
+
+        airports_key = 'departure_airports' if slot_name == 'departure_city' else 'arrival_airports'
+        prefetch_cache.submit(tracker.sender_id, airports_key, city, get_airports, city)
+
+        if PREFETCH_HOTELS and slot_name == 'arrival_city':
+            prefetch_cache.submit(tracker.sender_id, "hotel_locations", city,
+                                  tripadvisor.get_location_ids, query=city, category="hotels")
+
+
     def validate_departure_city(
         self,
         slot_value: Any,
@@ -1014,15 +972,15 @@ class ValidateFlightSearchingForm(FormValidationAction):
         domain: DomainDict,
     ) -> Dict[Text, Any]:
         """Validate departure_city value."""
-        logger.info(f"Validating departure_city with value: {slot_value}")
+        logger.info("Validating departure_city with value: %s", slot_value)
 
         # 1st check existing value
         current_value = tracker.get_slot('departure_city')
         if current_value:
-            logger.info(f"Found existing departure_city: {current_value}")
+            logger.info("Found existing departure_city: %s", current_value)
             validated_city = self._validate_city(current_value, "departure_city", dispatcher, tracker)
             if validated_city:
-                logger.info(f"Keeping valid existing departure_city: {validated_city}")
+                logger.info("Keeping valid existing departure_city: %s", validated_city)
                 return {"departure_city": validated_city}
             logger.info("Invalid existing departure_city")
             dispatcher.utter_message(text="I need a valid city name for departure.")
@@ -1032,7 +990,7 @@ class ValidateFlightSearchingForm(FormValidationAction):
         if slot_value:
             validated_city = self._validate_city(slot_value, "departure_city", dispatcher, tracker)
             if validated_city:
-                logger.info(f"Setting validated departure_city: {validated_city}")
+                logger.info("Setting validated departure_city: %s", validated_city)
                 return {"departure_city": validated_city}
             logger.info("Invalid departure_city input")
             dispatcher.utter_message(text="Please provide a valid city name for departure.")
@@ -1048,15 +1006,15 @@ class ValidateFlightSearchingForm(FormValidationAction):
         domain: DomainDict,
     ) -> Dict[Text, Any]:
         """Validate arrival_city value."""
-        logger.info(f"Validating arrival_city with value: {slot_value}")
+        logger.info("Validating arrival_city with value: %s", slot_value)
 
         # 1st check existing value
         current_value = tracker.get_slot('arrival_city')
         if current_value:
-            logger.info(f"Found existing arrival_city: {current_value}")
+            logger.info("Found existing arrival_city: %s", current_value)
             validated_city = self._validate_city(current_value, "arrival_city", dispatcher, tracker)
             if validated_city:
-                logger.info(f"Keeping valid existing arrival_city: {validated_city}")
+                logger.info("Keeping valid existing arrival_city: %s", validated_city)
                 return {"arrival_city": validated_city}
             logger.info("Invalid existing arrival_city")
             dispatcher.utter_message(text="I need a valid city name for arrival.")
@@ -1066,7 +1024,7 @@ class ValidateFlightSearchingForm(FormValidationAction):
         if slot_value:
             validated_city = self._validate_city(slot_value, "arrival_city", dispatcher, tracker)
             if validated_city:
-                logger.info(f"Setting validated arrival_city: {validated_city}")
+                logger.info("Setting validated arrival_city: %s", validated_city)
                 return {"arrival_city": validated_city}
             logger.info("Invalid arrival_city input")
             dispatcher.utter_message(text="Please provide a valid city name for arrival.")
@@ -1085,14 +1043,14 @@ class ValidateFlightSearchingForm(FormValidationAction):
         Returns ISO formatted date string if valid, None if invalid."""
 
         if not date_value or not str(date_value).strip():
-            logger.info(f"Empty {slot_name} value")
+            logger.info("Empty %s value", slot_name)
             return None
 
         try:
             # 1st try to parse to ISO
             parsed_date_str = parse_date_to_iso(str(date_value))
             if not parsed_date_str:  # parse_date_to_iso returns None on failure
-                logger.info(f"Failed to parse date: {date_value}")
+                logger.info("Failed to parse date: %s", date_value)
                 dispatcher.utter_message(text="Please provide a valid date (e.g., YYYY-MM-DD or 'next Friday')")
                 return None
 
@@ -1100,9 +1058,9 @@ class ValidateFlightSearchingForm(FormValidationAction):
             parsed_date = datetime.strptime(parsed_date_str, "%Y-%m-%d").date()
 
             # then check if it's a DATE using spacy
-            doc = nlp(str(date_value))
+            doc = spacy_nlp.parse(str(date_value), profile="entities")
             if not any(ent.label_ == "DATE" for ent in doc.ents):
-                logger.info(f"{date_value} is not recognized as a valid date ({slot_name})")
+                logger.info("%s is not recognized as a valid date (%s)", date_value, slot_name)
                 dispatcher.utter_message(text="Please provide a valid date (e.g., YYYY-MM-DD or 'next Friday')")
                 return None
 
@@ -1116,18 +1074,18 @@ class ValidateFlightSearchingForm(FormValidationAction):
                 return_date = datetime.strptime(parse_date_to_iso(return_date), "%Y-%m-%d").date()
 
             if slot_name == 'departure_date' and return_date and parsed_date > return_date:
-                logger.info(f"Departure date {parsed_date_str} is after return date {return_date}")
+                logger.info("Departure date %s is after return date %s", parsed_date_str, return_date)
                 dispatcher.utter_message(text="Departure date must be before or on the return date")
                 return None
             elif slot_name == 'return_date' and departure_date and parsed_date < departure_date:
-                logger.info(f"Return date {parsed_date_str} is before departure date {departure_date}")
+                logger.info("Return date %s is before departure date %s", parsed_date_str, departure_date)
                 dispatcher.utter_message(text="Return date must be after or on the departure date")
                 return None
 
             return parsed_date_str
 
         except Exception as e:
-            logger.info(f"Failed to parse date: {e}")
+            logger.info("Failed to parse date: %s", e)
             dispatcher.utter_message(text="Please provide a valid date (e.g., YYYY-MM-DD or 'next Friday')")
             return None
 
@@ -1140,15 +1098,15 @@ class ValidateFlightSearchingForm(FormValidationAction):
         domain: DomainDict,
     ) -> Dict[Text, Any]:
         """Validate departure_date value."""
-        logger.info(f"Validating departure_date with value: {slot_value}")
+        logger.info("Validating departure_date with value: %s", slot_value)
 
         # 1st check existing value
         current_value = tracker.get_slot('departure_date')
         if current_value:
-            logger.info(f"Found existing departure_date: {current_value}")
+            logger.info("Found existing departure_date: %s", current_value)
             validated_date = self._validate_date(current_value, "departure_date", dispatcher, tracker)
             if validated_date:
-                logger.info(f"Keeping valid existing departure_date: {validated_date}")
+                logger.info("Keeping valid existing departure_date: %s", validated_date)
                 return {"departure_date": validated_date}
             logger.info("Invalid existing departure_date")
             return {"departure_date": None}
@@ -1157,7 +1115,7 @@ class ValidateFlightSearchingForm(FormValidationAction):
         if slot_value:
             validated_date = self._validate_date(slot_value, "departure_date", dispatcher, tracker)
             if validated_date:
-                logger.info(f"Setting validated departure_date: {validated_date}")
+                logger.info("Setting validated departure_date: %s", validated_date)
                 return {"departure_date": validated_date}
             logger.info("Invalid departure_date input")
         
@@ -1172,15 +1130,15 @@ class ValidateFlightSearchingForm(FormValidationAction):
         domain: DomainDict,
     ) -> Dict[Text, Any]:
         """Validate return_date value."""
-        logger.info(f"Validating return_date with value: {slot_value}")
+        logger.info("Validating return_date with value: %s", slot_value)
 
         # 1st check existing value
         current_value = tracker.get_slot('return_date')
         if current_value:
-            logger.info(f"Found existing return_date: {current_value}")
+            logger.info("Found existing return_date: %s", current_value)
             validated_date = self._validate_date(current_value, "return_date", dispatcher, tracker)
             if validated_date:
-                logger.info(f"Keeping valid existing return_date: {validated_date}")
+                logger.info("Keeping valid existing return_date: %s", validated_date)
                 return {"return_date": validated_date}
             logger.info("Invalid existing return_date")
             return {"return_date": None}
@@ -1189,7 +1147,7 @@ class ValidateFlightSearchingForm(FormValidationAction):
         if slot_value:
             validated_date = self._validate_date(slot_value, "return_date", dispatcher, tracker)
             if validated_date:
-                logger.info(f"Setting validated return_date: {validated_date}")
+                logger.info("Setting validated return_date: %s", validated_date)
                 return {"return_date": validated_date}
             logger.info("Invalid return_date input")
         
@@ -1211,12 +1169,12 @@ class ValidateFlightSearchingForm(FormValidationAction):
         try:
             num = int(str(value).strip())
             if not 0 < num <= 5:
-                logger.info(f"Passenger number {num} outside valid range (1-5)")
+                logger.info("Passenger number %s outside valid range (1-5)", num)
                 dispatcher.utter_message(text="Number of passengers must be between 1 and 5")
                 return None
             return num
         except ValueError:
-            logger.info(f"Failed to parse passenger number: {value}")
+            logger.info("Failed to parse passenger number: %s", value)
             dispatcher.utter_message(text="Please provide a valid number of passengers (1-5)")
             return None
 
@@ -1229,15 +1187,15 @@ class ValidateFlightSearchingForm(FormValidationAction):
         domain: DomainDict,
     ) -> Dict[Text, Any]:
         """Validate num_passengers value."""
-        logger.info(f"Validating num_passengers with value: {slot_value}")
+        logger.info("Validating num_passengers with value: %s", slot_value)
 
         # 1st check existing value
         current_value = tracker.get_slot('num_passengers')
         if current_value:
-            logger.info(f"Found existing num_passengers: {current_value}")
+            logger.info("Found existing num_passengers: %s", current_value)
             validated_num = self._validate_passengers(current_value, "num_passengers", dispatcher)
             if validated_num:
-                logger.info(f"Keeping valid existing num_passengers: {validated_num}")
+                logger.info("Keeping valid existing num_passengers: %s", validated_num)
                 return {"num_passengers": validated_num}
             logger.info("Invalid existing num_passengers")
             return {"num_passengers": None}
@@ -1246,7 +1204,7 @@ class ValidateFlightSearchingForm(FormValidationAction):
         if slot_value:
             validated_num = self._validate_passengers(slot_value, "num_passengers", dispatcher)
             if validated_num:
-                logger.info(f"Setting validated num_passengers: {validated_num}")
+                logger.info("Setting validated num_passengers: %s", validated_num)
                 return {"num_passengers": validated_num}
             logger.info("Invalid num_passengers input")
 
@@ -1257,6 +1215,5 @@ class ValidateFlightSearchingForm(FormValidationAction):
 # TODO:
 #
 # 1) Remove validators away from here
-# 2) Turn to extract_* functions for speed instead of LLM
-# 3) Use a DB for frequent queries (airports, cities, etc.)
+# 2) Use a DB for frequent queries (airports, cities, etc.)
 ###########################################################
\ No newline at end of file
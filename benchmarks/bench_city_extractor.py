@@ -0,0 +1,75 @@
+"""
+Throughput of CityAreaExtractor: one sentence per call vs batched extract_cities,
+with and without the gazetteer fast path.
+
+Usage (from the project root):
+    python -m benchmarks.bench_city_extractor --input sentences.txt --batch-size 32
+"""
+import argparse
+import time
+
+from custom_models.city_area_extractor_ner import CityAreaExtractor
+
+# hotel/explore requests in the style of data/nlu.yml, some with cities the gazetteer does not know
+DEFAULT_SENTENCES = [
+    "suggest me a hotel in Rome",
+    "where can I stay in berlin near the central station",
+    "hotels around the Acropolis in Athens",
+    "help me explore museums in Paris",
+    "where can I eat sushi in Tokyo",
+    "tell me about tourist spots in Barcelona",
+    "find a hotel in the big apple",
+    "places to visit in Ioannina",
+    "a cozy guesthouse in Nafplio",
+    "restaurants in Kalamata by the sea",
+    "what to do in Bled",
+    "hotels near Plaka",
+    "recommend local places to visit",
+    "find activities in the city",
+    "seafood in Monemvasia",
+    "museums in Rotterdam and Utrecht",
+]
+
+
+def measure(label, func, repeat, count):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - start_time
+    print(f"{label:<40} {count * repeat / elapsed:8.1f} sentences/s")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--input", help="text file with one sentence per line (defaults to a built-in corpus)")
+    arg_parser.add_argument("--batch-size", type=int, default=16)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            sentences = [line.strip() for line in f if line.strip()]
+    else:
+        sentences = DEFAULT_SENTENCES
+
+    extractor = CityAreaExtractor(batch_size=args.batch_size)
+    extractor.extract_cities(sentences[:2], use_gazetteer=False)  # warm-up
+
+    count = len(sentences)
+    measure("model only, one sentence per call",
+            lambda: [extractor.extract_cities([s], use_gazetteer=False) for s in sentences], args.repeat, count)
+    measure(f"model only, batched ({args.batch_size})",
+            lambda: extractor.extract_cities(sentences, use_gazetteer=False), args.repeat, count)
+    measure("gazetteer + model, one sentence per call",
+            lambda: [extractor.extract_cities([s]) for s in sentences], args.repeat, count)
+    measure(f"gazetteer + model, batched ({args.batch_size})",
+            lambda: extractor.extract_cities(sentences), args.repeat, count)
+
+    print()
+    for sentence, cities in zip(sentences, extractor.extract_cities(sentences)):
+        found = ", ".join(f"{c['city']} [{c['start']}:{c['end']}] ({c['source']})" for c in cities) or "-"
+        print(f"{sentence[:50]:<52} {found}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark of ActionContinuePromptSearch on long conversations.
+
+Compares the previous implementation (copy of tracker.events, reverse scan for the
+form deactivation, then list.index + a second reverse scan for the form that was
+active) with the current one (a single read of the last_completed_form slot set by
+the search actions), on synthetic trackers with many completed forms.
+
+Usage (from the project root, with the action server environment/.env available):
+    python -m benchmarks.bench_continue_prompt
+    python -m benchmarks.bench_continue_prompt --events 10000 50000 --repeat 200
+"""
+import argparse
+import time
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions.actions import ActionContinuePromptSearch
+
+FORMS = ["flight_searching_form", "hotel_searching_form", "explore_activities_places_form"]
+
+SLOTS = {
+    "arrival_city": "London",
+    "hotel_city": "Paris",
+}
+
+
+def form_turn(form_name):
+    """Events of one completed form turn, as the Rasa server would send them"""
+    return [
+        {"event": "user", "text": "I want to search", "parse_data": {"intent": {"name": "search"}}},
+        {"event": "action", "name": form_name},
+        {"event": "active_loop", "name": form_name},
+        {"event": "slot", "name": "requested_slot", "value": None},
+        {"event": "active_loop", "name": None},
+        {"event": "action", "name": "action_search"},
+        {"event": "slot", "name": "last_completed_form", "value": form_name},
+        {"event": "action", "name": "action_continue_prompt_search"},
+    ]
+
+
+def make_tracker(num_events):
+    events = []
+    turn = 0
+    while len(events) < num_events:
+        events.extend(form_turn(FORMS[turn % len(FORMS)]))
+        turn += 1
+
+    last_form = FORMS[(turn - 1) % len(FORMS)]
+    return Tracker(
+        sender_id="bench",
+        slots={**SLOTS, "last_completed_form": last_form},
+        latest_message={},
+        events=events,
+        paused=False,
+        followup_action=None,
+        active_loop={},
+        latest_action_name="action_search",
+    ), last_form
+
+
+def legacy_previous_form(tracker):
+    """The previous event-history scan of ActionContinuePromptSearch"""
+    previous_events = list(tracker.events)
+    previous_form = None
+
+    for event in reversed(previous_events):
+        if event.get('event') == 'active_loop' and event.get('name') is None:
+            for earlier_event in reversed(previous_events[:previous_events.index(event)]):
+                if earlier_event.get('event') == 'active_loop' and earlier_event.get('name'):
+                    previous_form = earlier_event.get('name')
+                    break
+            break
+
+    return previous_form
+
+
+def per_call_us(func, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start_time) / repeat * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 50000])
+    arg_parser.add_argument("--repeat", type=int, default=100)
+    args = arg_parser.parse_args()
+
+    action = ActionContinuePromptSearch()
+
+    print(f"{'events':>8} {'legacy scan':>14} {'slot lookup':>14} {'full action':>14}")
+    for num_events in args.events:
+        tracker, last_form = make_tracker(num_events)
+        assert legacy_previous_form(tracker) == last_form == tracker.get_slot("last_completed_form")
+
+        legacy_us = per_call_us(lambda: legacy_previous_form(tracker), args.repeat)
+        slot_us = per_call_us(lambda: tracker.get_slot("last_completed_form"), args.repeat)
+        action_us = per_call_us(lambda: action.run(CollectingDispatcher(), tracker, {}), args.repeat)
+
+        print(f"{len(tracker.events):>8} {legacy_us:>11.1f} us {slot_us:>11.2f} us {action_us:>11.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark of utils/date_utils, against a fixed "today" (Wednesday 2025-02-19 10:30) injected
+through DateResolver's clock. The expected dates of the expressions are checked by
+tests/test_date_utils.py (python -m pytest tests).
+
+    1. throughput (expressions/sec) of the single and batch APIs, cold and warm cache
+    2. worst-case inputs: long non-date text that reaches the fuzzy dateutil fallback
+
+Usage (from the project root):
+    python -m benchmarks.bench_date_utils
+    python -m benchmarks.bench_date_utils --max-worst-case-ms 50    # exit code 1 on a slow input
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from utils.date_utils import DateResolver
+
+FIXED_TODAY = datetime(2025, 2, 19, 10, 30)
+
+# relative, weekday, ordinal and absolute expressions, and some that are no dates
+EXPRESSIONS = [
+    "3 days", "10 days from now", "9 days from today", "5 days from tomorrow", "next 5 days", "tomorrow",
+    "  Tomorrow  ", "today", "next day", "next week", "next month", "in a month", "in 3 months",
+    "friday", "on Saturday", "this Saturday", "next monday", "next sunday", "next wednesday",
+    "thursday next week", "monday next week",
+    "in the 4th of next month", "15 next month", "on the 31st of next month", "the 31st", "27th", "19th", "2nd",
+    "2025-02-20", "2024-12-25", "20 Feb 2025", "February 20, 2025", "02/20/2025", "March 15", "1st of March",
+    "February 19", "February 18", "Jan 10", "3pm",
+    "random text", "the", "99999999999999999999 days",
+]
+
+# tokens of a typical flight request, most of which are not dates
+MESSAGE_TOKENS = ("I want to book a round trip from Athens to London next week and come back "
+                  "on 2025-03-01 for 2 people please").split()
+
+WORST_CASE_INPUTS = {
+    "long text, no digits": "we would like to travel somewhere nice with the whole family " * 40,
+    "long text, one digit": ("we would like to travel somewhere nice with the whole family " * 40) + "for 2",
+    "long text, scattered numbers": " ".join(f"option {i} or maybe" for i in range(150)),
+    "long text, month names": "march and may are nice but june is better than april " * 30,
+}
+
+
+def throughput(label, func, count, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - start_time
+    print(f"  {label:<38} {count * repeat / elapsed:12,.0f} expressions/s")
+
+
+def run_benchmarks(resolver, repeat):
+    texts = EXPRESSIONS
+
+    def cold_single():
+        resolver.clear_cache()
+        for text in texts:
+            resolver.resolve(text)
+
+    def cold_batch():
+        resolver.clear_cache()
+        resolver.resolve_many(texts)
+
+    def warm_single():
+        for text in texts:
+            resolver.resolve(text)
+
+    print(f"Throughput, date expressions ({len(texts)}):")
+    throughput("single API, cold cache", cold_single, len(texts), repeat)
+    throughput("batch API, cold cache", cold_batch, len(texts), repeat)
+    throughput("single API, warm cache", warm_single, len(texts), repeat)
+    throughput("batch API, warm cache", lambda: resolver.resolve_many(texts), len(texts), repeat)
+
+    def message_cold():
+        resolver.clear_cache()
+        resolver.resolve_many(MESSAGE_TOKENS)
+
+    print(f"Throughput, tokens of one flight request ({len(MESSAGE_TOKENS)} tokens):")
+    throughput("batch API, cold cache", message_cold, len(MESSAGE_TOKENS), repeat)
+
+
+def run_worst_case(resolver, repeat, max_ms):
+    print("Worst-case inputs (cold cache):")
+    slow = []
+    for label, text in WORST_CASE_INPUTS.items():
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            resolver.clear_cache()
+            result = resolver.resolve(text)
+        elapsed_ms = (time.perf_counter() - start_time) / repeat * 1000
+        print(f"  {label:<32} {len(text):6} chars {elapsed_ms:9.3f} ms -> {result}")
+        if max_ms is not None and elapsed_ms > max_ms:
+            slow.append(label)
+
+    if slow:
+        print(f"  SLOW (> {max_ms} ms): {', '.join(slow)}")
+    return not slow
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=200)
+    arg_parser.add_argument("--max-worst-case-ms", type=float, default=None,
+                            help="fail if a worst-case input takes longer than this")
+    args = arg_parser.parse_args()
+
+    resolver = DateResolver(clock=lambda: FIXED_TODAY)
+
+    run_benchmarks(resolver, args.repeat)
+    print()
+    ok = run_worst_case(resolver, max(1, args.repeat // 20), args.max_worst_case_ms)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
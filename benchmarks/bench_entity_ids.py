@@ -0,0 +1,102 @@
+"""
+Per-doc cost of the set_entity_ids component: the previous linear scan over all ruler
+patterns vs reading the pattern id the entity ruler stores on each span (ent.ent_id_).
+
+Runs on a blank English pipeline (tokenizer + entity ruler), with today's PATTERNS and
+with a pattern set `--scale` times larger (extra synthetic patterns that never match).
+
+Usage (from the project root):
+    python -m benchmarks.bench_entity_ids --scale 10 --repeat 200
+"""
+import argparse
+import time
+
+import spacy
+
+from custom_models.spacy_entity_patterns import EntityIdSetter, build_ruler_patterns
+
+TEXTS = [
+    "I want a round trip from Athens to London next week for 2 people",
+    "one-way flight to Paris on 2025-06-12",
+    "flights from New York to Rome, 3 passengers, return flight on 20/07/2025",
+    "travelling from Madrid to Lisbon for 4",
+    "book to Berlin departing from Munich on 2025-03-01",
+    "two way flights from Milan -> Zurich",
+]
+
+
+def synthetic_patterns(ruler_patterns, scale):
+    """`scale - 1` extra copies of every pattern that cannot match real text"""
+    extra = []
+    for copy in range(1, scale):
+        for pattern in ruler_patterns:
+            synthetic = dict(pattern)
+            if isinstance(pattern["pattern"], str):
+                synthetic["pattern"] = f"{pattern['pattern']} zz{copy}"
+            else:
+                synthetic["pattern"] = pattern["pattern"] + [{"LOWER": f"zz{copy}"}]
+            if "id" in pattern:
+                synthetic["id"] = f"{pattern['id']}_{copy}"
+            extra.append(synthetic)
+    return extra
+
+
+class LegacyEntityIdSetter:
+    """Previous implementation: first pattern with the entity label wins"""
+
+    def __init__(self, ruler_patterns):
+        self.ruler_patterns = ruler_patterns
+
+    def __call__(self, doc):
+        for ent in doc.ents:
+            for pattern in self.ruler_patterns:
+                if pattern["label"] == ent.label_ and "id" in pattern:
+                    ent._.id = pattern["id"]
+                    break
+        return doc
+
+
+def time_component(component, docs, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for doc in docs:
+            component(doc)
+    return (time.perf_counter() - start_time) / (repeat * len(docs))
+
+
+def run(ruler_patterns, repeat, title):
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(ruler_patterns)
+    docs = list(nlp.pipe(TEXTS))
+
+    legacy = LegacyEntityIdSetter(ruler_patterns)
+    current = EntityIdSetter()
+
+    legacy_time = time_component(legacy, docs, repeat)
+    current_time = time_component(current, docs, repeat)
+
+    wrong_ids = 0
+    for doc in docs:
+        legacy(doc)
+        wrong_ids += sum(1 for ent in doc.ents if ent.ent_id_ and ent._.id != ent.ent_id_)
+
+    print(f"{title} ({len(ruler_patterns)} patterns)")
+    print(f"  legacy scan:   {legacy_time * 1e6:8.1f} us/doc, {wrong_ids} entities with the wrong id")
+    print(f"  ent.ent_id_:   {current_time * 1e6:8.1f} us/doc ({legacy_time / current_time:.1f}x)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--scale", type=int, default=10, help="size of the large pattern set relative to today's")
+    arg_parser.add_argument("--repeat", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    ruler_patterns = build_ruler_patterns()
+    run(ruler_patterns, args.repeat, "Current PATTERNS")
+    # the synthetic patterns go first, as a larger set would push the matching ids further down the list
+    run(synthetic_patterns(ruler_patterns, args.scale) + ruler_patterns, args.repeat, f"{args.scale}x PATTERNS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Micro-benchmark of FlightEntityExtractor.extract_cities (flight extract action and NLU component).
+
+Compares the previous implementation (one full nlp() run per candidate span) with the
+current one (doc entities first, remaining candidates batched through nlp.pipe with
+only NER enabled and memoized) over a corpus of flight requests.
+
+Usage (from the project root, with the action server environment/.env available):
+    python -m benchmarks.bench_extract_cities --repeat 20
+    python -m benchmarks.bench_extract_cities --metrics-json metrics.json
+"""
+import argparse
+import time
+
+from custom_models.flight_entity_extractor import FlightEntityExtractor
+from custom_models.spacy_nlp_md import SpacyNLPManager
+from utils.metrics import metrics
+
+FLIGHT_REQUESTS = [
+    "I want to book a flight from Athens to London next week",
+    "flights from New York to Los Angeles on 2025-06-12 for 2 people",
+    "find me a round trip from Paris to Rome",
+    "one way flight to Berlin tomorrow",
+    "I am travelling from Madrid to Lisbon on Friday and coming back on Sunday",
+    "book from Thessaloniki to Munich for 3 passengers",
+    "flying to Tokyo from San Francisco in 2 months",
+    "departing from Barcelona, destination Amsterdam",
+    "need a return flight Athens -> Vienna the 21st",
+    "going to Dubai next month with my family",
+    "compare flights from Milan to Zurich for 4 persons",
+    "I need to fly from Chicago to Toronto next monday",
+    "leaving from Stockholm and landing in Oslo on the 3rd of next month",
+    "a cheap flight to Istanbul",
+    "flights to Rio de Janeiro from Buenos Aires",
+    "travel from Hong Kong to Singapore next week for 2 passengers",
+    "I'd like to go from Brussels to Prague on 15/07/2025",
+    "round-trip from Los Angeles to Las Vegas next day",
+    "find flights from Cape Town to Johannesburg",
+    "arriving in Edinburgh from Dublin next friday",
+]
+
+
+nlp = SpacyNLPManager.get_nlp()
+
+legacy_parse_count = 0
+
+
+def legacy_extract_cities(doc):
+    """Previous implementation: full pipeline parse for every candidate span."""
+    global legacy_parse_count
+    departure_city = None
+    arrival_city = None
+
+    found_indicators = [(ent._.id, ent.start, ent.end) for ent in doc.ents
+                        if ent.label_ == "LOCATION_INDICATOR" and ent._.id]
+
+    for indicator_id, start, end in found_indicators:
+        next_idx = end
+        while next_idx < len(doc) and doc[next_idx].is_stop:
+            next_idx += 1
+        if next_idx >= len(doc):
+            continue
+        for end_idx in range(next_idx + 1, min(next_idx + 4, len(doc))):
+            potential_city = doc[next_idx:end_idx].text
+            validation_doc = nlp(potential_city)
+            legacy_parse_count += 1
+            if any(val_ent.label_ == "GPE" for val_ent in validation_doc.ents):
+                if indicator_id == "departure" and not departure_city:
+                    departure_city = potential_city
+                    break
+                elif indicator_id == "arrival" and not arrival_city:
+                    arrival_city = potential_city
+                    break
+
+    return departure_city, arrival_city
+
+
+def time_per_request(func, docs, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for doc in docs:
+            func(doc)
+    return (time.perf_counter() - start_time) / (repeat * len(docs))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus per measurement")
+    arg_parser.add_argument("--metrics-json", help="write the collected spaCy/cache metrics to this file")
+    args = arg_parser.parse_args()
+
+    extractor = FlightEntityExtractor()
+    docs = [nlp(text) for text in FLIGHT_REQUESTS]
+
+    def extract_cities(doc):
+        return tuple(span.text if span else None for span in extractor.extract_cities(doc))
+
+    # count how many candidate parses each implementation needs for one pass over the corpus
+    for doc in docs:
+        legacy_extract_cities(doc)
+    legacy_parses = legacy_parse_count
+
+    SpacyNLPManager._gpe_verdicts.clear()
+    for doc in docs:
+        extract_cities(doc)
+    batched_parses = len(SpacyNLPManager._gpe_verdicts)
+
+    legacy_time = time_per_request(legacy_extract_cities, docs, args.repeat)
+
+    def cold_extract(doc):
+        SpacyNLPManager._gpe_verdicts.clear()
+        return extract_cities(doc)
+
+    cold_time = time_per_request(cold_extract, docs, args.repeat)
+    warm_time = time_per_request(extract_cities, docs, args.repeat)
+
+    mismatches = [doc.text for doc in docs if legacy_extract_cities(doc) != extract_cities(doc)]
+
+    print(f"Corpus: {len(docs)} flight requests, {args.repeat} passes")
+    print(f"Candidate parses per pass:  legacy {legacy_parses} full nlp() runs | "
+          f"current {batched_parses} NER-only texts in nlp.pipe batches")
+    print(f"legacy (nlp() per candidate):   {legacy_time * 1000:8.2f} ms/request")
+    print(f"current, cold verdict cache:    {cold_time * 1000:8.2f} ms/request ({legacy_time / cold_time:.1f}x)")
+    print(f"current, warm verdict cache:    {warm_time * 1000:8.2f} ms/request ({legacy_time / warm_time:.1f}x)")
+    print(f"Requests with different cities: {len(mismatches)}")
+    for text in mismatches:
+        print(f"  - {text}")
+
+    if args.metrics_json:
+        metrics.dump_json(args.metrics_json)
+        print(f"Metrics written to {args.metrics_json}")
+
+
+if __name__ == "__main__":
+    main()
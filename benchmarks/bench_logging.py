@@ -0,0 +1,122 @@
+"""
+Logging overhead per turn on the request path.
+
+Replays the log calls of one ActionExtractFlightEntities/ValidateFlightSearchingForm turn
+(slot dicts, entity lists, short messages) against:
+
+    1. the previous setup: DEBUG level, synchronous StreamHandler, f-strings
+    2. %-style arguments with the same synchronous handler
+    3. %-style arguments through the queue handler of mylogger (formatting + I/O in the listener thread)
+    4. the same at INFO level (DEBUG records are dropped before any formatting)
+
+Output goes to a temporary file, so the synchronous variants pay real write() calls.
+
+Usage (from the project root):
+    python -m benchmarks.bench_logging --turns 2000
+"""
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from mylogger import TEXT_FORMAT, ContextFilter, _LazyQueueHandler
+
+SLOTS = {
+    "departure_city": "Athens", "arrival_city": "London", "departure_date": "2025-03-01",
+    "return_date": "2025-03-08", "num_passengers": 2, "requested_slot": None, "hotel_city": None,
+    "explore_city": None, "food_or_not": None, "last_completed_form": "flight_searching_form",
+}
+ENTITIES = [{"entity": "city", "value": "London", "start": 24, "end": 30, "role": "arrival"}] * 4
+ACTIVE_LOOP = {"name": "flight_searching_form"}
+REQUIRED = ["departure_city", "arrival_city", "departure_date", "return_date", "num_passengers"]
+LOG_CALLS_PER_TURN = 9 + len(REQUIRED)
+DEBUG_CALLS_PER_TURN = 4
+
+
+def turn_fstrings(logger):
+    logger.debug(f"Active loop: {ACTIVE_LOOP}")
+    logger.debug(f"All slots: {SLOTS}")
+    logger.info(f"Required slots: {REQUIRED}")
+    logger.debug(f"Found indicators: {ENTITIES}")
+    logger.info(f"Final cities - departure: {SLOTS['departure_city']}, arrival: {SLOTS['arrival_city']}")
+    logger.debug(f"Found potential date expressions: {ENTITIES}")
+    logger.info(f"Final dates - departure: {SLOTS['departure_date']}, return: {SLOTS['return_date']}")
+    logger.info(f"Extracted entities (local): {SLOTS}")
+    for slot in REQUIRED:
+        logger.info(f"Setting slot {slot} = {SLOTS[slot]}")
+    logger.info(f"Missing slots: {[]}")
+
+
+def turn_lazy(logger):
+    logger.debug("Active loop: %s", ACTIVE_LOOP)
+    logger.debug("All slots: %s", SLOTS)
+    logger.info("Required slots: %s", REQUIRED)
+    logger.debug("Found indicators: %s", ENTITIES)
+    logger.info("Final cities - departure: %s, arrival: %s", SLOTS['departure_city'], SLOTS['arrival_city'])
+    logger.debug("Found potential date expressions: %s", ENTITIES)
+    logger.info("Final dates - departure: %s, return: %s", SLOTS['departure_date'], SLOTS['return_date'])
+    logger.info("Extracted entities (%s): %s", "local", SLOTS)
+    for slot in REQUIRED:
+        logger.info("Setting slot %s = %s", slot, SLOTS[slot])
+    logger.info("Missing slots: %s", [])
+
+
+def make_logger(name, level, stream, use_queue):
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    listener = None
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler)
+        listener.start()
+        handler = _LazyQueueHandler(log_queue)
+        handler.addFilter(ContextFilter())
+
+    logger = logging.getLogger(f"bench_logging.{name}")
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger, listener
+
+
+def measure(name, turn, level, use_queue, turns):
+    with tempfile.TemporaryFile("w+") as stream:
+        logger, listener = make_logger(name, level, stream, use_queue)
+
+        start_time = time.perf_counter()
+        for _ in range(turns):
+            turn(logger)
+        request_path = (time.perf_counter() - start_time) / turns
+
+        if listener:
+            listener.stop()   # drains the queue
+        total = (time.perf_counter() - start_time) / turns
+
+    return request_path, total
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--turns", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    variants = [
+        ("previous: DEBUG, sync, f-strings", turn_fstrings, logging.DEBUG, False),
+        ("DEBUG, sync, %-style", turn_lazy, logging.DEBUG, False),
+        ("DEBUG, queue, %-style", turn_lazy, logging.DEBUG, True),
+        ("INFO, queue, %-style", turn_lazy, logging.INFO, True),
+        ("INFO, queue, f-strings", turn_fstrings, logging.INFO, True),
+    ]
+
+    print(f"{args.turns} turns, {LOG_CALLS_PER_TURN} log calls per turn ({DEBUG_CALLS_PER_TURN} at DEBUG)")
+    print(f"{'variant':<36} {'request path':>14} {'incl. drain':>14}")
+    for index, (label, turn, level, use_queue) in enumerate(variants):
+        request_path, total = measure(str(index), turn, level, use_queue, args.turns)
+        print(f"{label:<36} {request_path * 1e6:>11.1f} us {total * 1e6:>11.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Startup time and peak RSS of the transformers models under each loading option.
+
+Every configuration is loaded in a fresh subprocess (peak RSS is per process), which then
+runs a few sentences through the model so that lower precisions can be compared with the
+float32 answers.
+
+    float32                         plain from_pretrained (previous behaviour)
+    float32 + low_cpu_mem_usage     no random-init copy of the weights during load
+    float32 + low_cpu + safetensors memory-mapped safetensors checkpoint
+    bfloat16 + low_cpu + safetensors
+
+Usage (from the project root; models are downloaded on first use):
+    python -m benchmarks.bench_model_loading --model flan_t5
+    python -m benchmarks.bench_model_loading --model city_ner
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+CONFIGURATIONS = [
+    ("float32", {"dtype": "float32", "low_cpu_mem_usage": False, "use_safetensors": "auto"}),
+    ("float32 + low_cpu_mem_usage", {"dtype": "float32", "low_cpu_mem_usage": True, "use_safetensors": "auto"}),
+    ("float32 + low_cpu + safetensors", {"dtype": "float32", "low_cpu_mem_usage": True, "use_safetensors": "true"}),
+    ("bfloat16 + low_cpu + safetensors", {"dtype": "bfloat16", "low_cpu_mem_usage": True, "use_safetensors": "true"}),
+]
+
+SENTENCES = [
+    "I want to book a flight to Rome next week",
+    "Can you suggest a hotel in Paris near the Louvre?",
+    "What museums can I visit in Athens?",
+    "What's the weather like tomorrow?",
+    "Recommend a good taverna in thessaloniki",
+    "cheap flights from new york to los angeles",
+]
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load_and_run(model: str, options: dict) -> dict:
+    """Child process: load one configuration, answer the sentences, report the numbers"""
+    from custom_models.loading_options import pretrained_kwargs
+
+    load_options = pretrained_kwargs(model, **options)
+
+    start_time = time.perf_counter()
+    if model == "flan_t5":
+        from custom_models.flant5_classifier import FlanT5Classifier
+        classifier = FlanT5Classifier(load_options=load_options)
+        load_seconds = time.perf_counter() - start_time
+        answers = [classifier.classify(classifier.create_prompt(sentence))[0] for sentence in SENTENCES]
+    else:
+        from custom_models.city_area_extractor_ner import CityAreaExtractor
+        extractor = CityAreaExtractor(load_options=load_options)
+        load_seconds = time.perf_counter() - start_time
+        answers = [[city["city"] for city in cities]
+                   for cities in extractor.extract_cities(SENTENCES, use_gazetteer=False)]
+    inference_seconds = time.perf_counter() - start_time - load_seconds
+
+    return {
+        "load_seconds": load_seconds,
+        "inference_seconds": inference_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_mb": current_rss_mb(),
+        "answers": answers,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--model", choices=["flan_t5", "city_ner"], default="flan_t5")
+    arg_parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(load_and_run(args.model, json.loads(args.child))))
+        return
+
+    print(f"{args.model}: {len(SENTENCES)} sentences after loading")
+    print(f"{'configuration':<34} {'load s':>7} {'infer s':>8} {'peak RSS MB':>12} {'RSS MB':>8} {'same answers':>13}")
+
+    reference = None
+    for label, options in CONFIGURATIONS:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_model_loading", "--model", args.model, "--child", json.dumps(options)],
+            capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"
+            print(f"{label:<34} {error}")
+            continue
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        if reference is None:
+            reference = result["answers"]
+        same = sum(a == b for a, b in zip(result["answers"], reference))
+
+        print(f"{label:<34} {result['load_seconds']:>7.2f} {result['inference_seconds']:>8.2f} "
+              f"{result['peak_rss_mb']:>12.0f} {result['rss_mb']:>8.0f} {same:>9}/{len(reference)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-profile latency of the spaCy pipeline (SpacyNLPManager.PROFILES).
+
+Measures the short validator inputs (a city or a date on its own) and full user
+messages separately, since the fixed per-call cost dominates the former.
+
+Usage (from the project root):
+    python -m benchmarks.bench_spacy_profiles --repeat 50
+"""
+import argparse
+import time
+
+from custom_models.spacy_nlp_md import SpacyNLPManager
+
+SHORT_INPUTS = ["Athens", "New York", "Rio De Janeiro", "next friday", "2025-06-12", "in 2 months", "London", "tomorrow"]
+
+MESSAGES = [
+    "I want to book a flight from Athens to London next week for 2 people",
+    "suggest me a hotel in Rome near the Colosseum",
+    "where can I eat sushi in Tokyo",
+    "round trip from New York to Los Angeles on 2025-06-12 returning 2025-06-20",
+    "help me explore museums in Paris",
+    "hotels around the Acropolis museum",
+]
+
+
+def time_profile(texts, profile, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            SpacyNLPManager.parse(text, profile=profile)
+    return (time.perf_counter() - start_time) / (repeat * len(texts))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    print(f"Enabled components: {SpacyNLPManager.get_nlp().pipe_names}")
+    for text in SHORT_INPUTS + MESSAGES:  # warm-up
+        SpacyNLPManager.parse(text)
+
+    print(f"{'profile':<12} {'runs':<45} {'short input':>12} {'message':>12}")
+    for profile in SpacyNLPManager.PROFILES:
+        disabled = set(SpacyNLPManager.disabled_components(profile))
+        runs = [name for name in SpacyNLPManager.get_nlp().pipe_names if name not in disabled]
+        short_time = time_profile(SHORT_INPUTS, profile, args.repeat)
+        message_time = time_profile(MESSAGES, profile, args.repeat)
+        print(f"{profile:<12} {', '.join(runs):<45} {short_time * 1000:9.3f} ms {message_time * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Append and retrieve latency of the SQLite tracker store (custom_components/sqlite_tracker_store.py)
+against Rasa's InMemoryTrackerStore, with many open conversations.
+
+Every conversation starts a session, then the turns are interleaved across all conversations
+the way a busy bot sees them: retrieve the tracker, append a user message, slot and bot events,
+save it. After the turns a fraction of the conversations starts a new session and the SQLite
+store compacts the old ones; the retrieve latency is measured again after the compaction.
+
+Usage (from the project root):
+    python -m benchmarks.bench_tracker_store --conversations 10000 --turns 5
+    python -m benchmarks.bench_tracker_store --db /tmp/trackers.db --new-sessions 0.5
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from rasa.core.tracker_store import InMemoryTrackerStore
+from rasa.shared.core.constants import ACTION_LISTEN_NAME, ACTION_SESSION_START_NAME
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, BotUttered, SessionStarted, SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker
+
+from custom_components.sqlite_tracker_store import SQLiteTrackerStore
+
+# (text, intent, slot set, bot action)
+TURNS = [
+    ("I want to book a flight from Athens to London", "find_compare_flights",
+     ("departure_city", "Athens"), "utter_ask_departure_date"),
+    ("next friday", "find_compare_flights", ("departure_date", "2025-03-07"), "utter_ask_num_passengers"),
+    ("for 2 people", "find_compare_flights", ("num_passengers", "2"), "utter_submit_flight_search"),
+    ("what can I do in London?", "explore_activities_places", ("explore_city", "London"), "utter_ask_food_or_not"),
+    ("thanks, bye", "goodbye", None, "utter_goodbye"),
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(name: str, values: List[float]) -> str:
+    return (f"{name:<18} n {len(values):>7} | mean {statistics.mean(values) * 1000:7.3f} ms | "
+            f"p50 {percentile(values, 50) * 1000:7.3f} ms | p99 {percentile(values, 99) * 1000:7.3f} ms")
+
+
+def session_start_events() -> List:
+    return [ActionExecuted(ACTION_SESSION_START_NAME), SessionStarted(), ActionExecuted(ACTION_LISTEN_NAME)]
+
+
+def turn_events(turn: int) -> List:
+    text, intent, slot, action = TURNS[turn % len(TURNS)]
+    events = [UserUttered(text, intent={"name": intent, "confidence": 0.97},
+                          parse_data={"intent": {"name": intent, "confidence": 0.97}, "entities": [], "text": text})]
+    if slot:
+        events.append(SlotSet(*slot))
+    events += [ActionExecuted(action), BotUttered("Let me check that for you."), ActionExecuted(ACTION_LISTEN_NAME)]
+    return events
+
+
+async def run(store, domain: Domain, senders: List[str], turns: int, new_sessions: float) -> Dict[str, List[float]]:
+    timings: Dict[str, List[float]] = {"create": [], "retrieve": [], "append": [], "new session": []}
+
+    for sender_id in senders:
+        tracker = DialogueStateTracker.from_events(sender_id, session_start_events(), domain.slots)
+        start = time.perf_counter()
+        await store.save(tracker)
+        timings["create"].append(time.perf_counter() - start)
+
+    for turn in range(turns):
+        order = senders[:]
+        random.shuffle(order)
+        for sender_id in order:
+            start = time.perf_counter()
+            tracker = await store.retrieve(sender_id)
+            timings["retrieve"].append(time.perf_counter() - start)
+
+            for event in turn_events(turn):
+                tracker.update(event)
+            start = time.perf_counter()
+            await store.save(tracker)
+            timings["append"].append(time.perf_counter() - start)
+
+    for sender_id in random.sample(senders, int(len(senders) * new_sessions)):
+        tracker = await store.retrieve(sender_id)
+        for event in session_start_events() + turn_events(0):
+            tracker.update(event)
+        start = time.perf_counter()
+        await store.save(tracker)
+        timings["new session"].append(time.perf_counter() - start)
+
+    return timings
+
+
+async def retrieve_all(store, senders: List[str]) -> List[float]:
+    timings = []
+    for sender_id in senders:
+        start = time.perf_counter()
+        await store.retrieve(sender_id)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def bench(args) -> None:
+    domain = Domain.load("domain.yml")
+    senders = [f"user-{i}" for i in range(args.conversations)]
+    db = args.db or os.path.join(tempfile.mkdtemp(), "trackers.db")
+    stores = [
+        ("in-memory", InMemoryTrackerStore(domain)),
+        ("sqlite", SQLiteTrackerStore(domain, db=db, compaction_interval=0)),
+    ]
+
+    for name, store in stores:
+        random.seed(0)
+        start = time.perf_counter()
+        timings = await run(store, domain, senders, args.turns, args.new_sessions)
+        print(f"\n{name}: {args.conversations} conversations x {args.turns} turns in {time.perf_counter() - start:.1f}s")
+        for operation, values in timings.items():
+            if values:
+                print(latency_summary(operation, values))
+
+        if isinstance(store, SQLiteTrackerStore):
+            print(f"database size      {os.path.getsize(db) / 1e6:.1f} MB (+ WAL {os.path.getsize(db + '-wal') / 1e6:.1f} MB)")
+            start = time.perf_counter()
+            compacted = store.compact()
+            print(f"compaction         {compacted} events in {time.perf_counter() - start:.2f}s")
+        print(latency_summary("retrieve (after)", await retrieve_all(store, senders)))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--conversations", type=int, default=10000)
+    arg_parser.add_argument("--turns", type=int, default=5, help="turns per conversation")
+    arg_parser.add_argument("--new-sessions", type=float, default=0.3,
+                            help="fraction of the conversations that starts a second session")
+    arg_parser.add_argument("--db", help="SQLite database file (defaults to a temporary directory)")
+    args = arg_parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
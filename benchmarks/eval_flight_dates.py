@@ -0,0 +1,80 @@
+"""
+Golden corpus of flight requests for the date rules of FlightEntityExtractor
+(custom_models/flight_entity_extractor.py).
+
+All dates are resolved against the fixed "today" of bench_date_utils (Wednesday 2025-02-19),
+and every request is checked twice:
+
+    1. local extraction (action_extract_flight_entities with FLIGHT_EXTRACTION_MODE=hybrid/local):
+       departure and return date exactly as expected
+    2. NLU extraction (TravelEntityExtractor, dates from DATE entities only): no date other than
+       the expected one; dates it leaves out are counted, the extract action asks the LLM for them
+
+Usage (from the project root):
+    python -m benchmarks.eval_flight_dates      # exit code 1 on a wrong date
+"""
+import argparse
+import sys
+
+from benchmarks.bench_date_utils import FIXED_TODAY
+from custom_models.flight_entity_extractor import FlightEntityExtractor
+from utils.date_utils import DateResolver
+
+# (request, (departure date, return date))
+GOLDEN_CORPUS = [
+    # numbers and "may" that are no dates
+    ("I may fly from Athens to London for 2 people", (None, None)),
+    ("for 2 people", (None, None)),
+    ("book from Thessaloniki to Munich for 3 passengers", (None, None)),
+    ("I need 2 tickets to Berlin, may I leave at 3pm?", (None, None)),
+    ("we are 4, flying to Dubai", (None, None)),
+    # explicit dates
+    ("flights from Athens to London on 2025-03-01 for 3 passengers", ("2025-03-01", None)),
+    ("on 15/07/2025 from Brussels to Prague", ("2025-07-15", None)),
+    ("fly to Rome on May 3rd", ("2025-05-03", None)),
+    ("leaving 3 may, back 10 may", ("2025-05-03", "2025-05-10")),
+    ("tomorrow to Paris, back on March 2", ("2025-02-20", "2025-03-02")),
+    # relative dates
+    ("from Madrid to Lisbon on friday and back on sunday", ("2025-02-21", "2025-02-23")),
+    ("round trip to Paris next friday", ("2025-02-28", None)),
+    ("departing the 21st, returning the 27th", ("2025-02-21", "2025-02-27")),
+    ("Athens to Rome in 3 days", ("2025-02-22", None)),
+    ("next week from Athens to Paris for 4 people", ("2025-02-26", None)),
+]
+
+
+def dates_of(found):
+    return tuple(found[slot][0] if found[slot] else None for slot in ("departure_date", "return_date"))
+
+
+def check(extractor):
+    wrong = []
+    dropped = 0
+    docs = extractor.pipe([text for text, _ in GOLDEN_CORPUS])
+    for (text, expected), doc in zip(GOLDEN_CORPUS, docs):
+        local = dates_of(extractor.extract_spans(doc))
+        if local != expected:
+            wrong.append(("local", text, expected, local))
+
+        nlu = dates_of(extractor.extract_spans(doc, date_entities_only=True))
+        if any(got is not None and got != want for got, want in zip(nlu, expected)):
+            wrong.append(("nlu", text, expected, nlu))
+        dropped += sum(got is None and want is not None for got, want in zip(nlu, expected))
+
+    print(f"Golden corpus: {len(GOLDEN_CORPUS)} requests, {len(wrong)} wrong, "
+          f"{dropped} dates left to the LLM by the NLU extraction")
+    for mode, text, expected, got in wrong:
+        print(f"  FAIL {mode:<5} {text!r:<60} expected {expected} got {got}")
+    return not wrong
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.parse_args()
+
+    extractor = FlightEntityExtractor(date_resolver=DateResolver(clock=lambda: FIXED_TODAY))
+    sys.exit(0 if check(extractor) else 1)
+
+
+if __name__ == "__main__":
+    main()
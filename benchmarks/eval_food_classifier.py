@@ -0,0 +1,128 @@
+"""
+Compare the local food_or_not classifier (custom_models/prototype_classifiers.py) against the
+GPT-4 food detection prompt.
+
+Reports agreement with the GPT-4 answers, how often the local classifier would fall back
+to OpenAI at the configured threshold, and the latency of both backends.
+
+Usage (from the project root, needs OPENAI_API_KEY in .env):
+    python -m benchmarks.eval_food_classifier
+    python -m benchmarks.eval_food_classifier --input sentences.txt --threshold 0.08
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import List
+
+from dotenv import load_dotenv
+
+from custom_models.prototype_classifiers import prototype_classifier
+from utils.apis.openai_client_api import OpenAIClient
+
+# explore requests in the style of data/nlu.yml
+DEFAULT_SENTENCES = [
+    "help me explore museums in Paris",
+    "suggest attractions in Rome",
+    "what 1 day trip can I do in Athens",
+    "suggest me a city tour",
+    "recommend local places to visit",
+    "find activities in the city",
+    "tell me about tourist spots in Barcelona",
+    "where can I eat sushi in Tokyo",
+    "mexican restaurant in Paris",
+    "show me places to visit in Madrid",
+    "what attractions are in Berlin",
+    "propose me museums to visit in London",
+    "where is the best ravioli in Naples",
+    "recommend a good restaurant in Rome",
+    "I want to try traditional greek food in Thessaloniki",
+    "best pizza near the Colosseum",
+    "a nice cafe for breakfast in Vienna",
+    "seafood tavern by the sea in Crete",
+    "vegan places to eat in Berlin",
+    "rooftop bar with a view in Lisbon",
+    "street food markets in Bangkok",
+    "fine dining in Copenhagen",
+    "historical monuments in Istanbul",
+    "art galleries in Amsterdam",
+    "boat tours in Venice",
+    "hiking trails near Zurich",
+    "things to do with kids in Madrid",
+    "the best beaches in Mykonos",
+    "where to watch a flamenco show in Seville",
+    "explore the old town of Prague",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(name: str, values: List[float]) -> str:
+    return (f"{name:<8} mean {statistics.mean(values) * 1000:8.1f} ms | "
+            f"p50 {percentile(values, 50) * 1000:8.1f} ms | "
+            f"p95 {percentile(values, 95) * 1000:8.1f} ms")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--input", help="text file with one sentence per line (defaults to a built-in corpus)")
+    arg_parser.add_argument("--threshold", type=float,
+                            default=float(os.getenv('FOOD_CLASSIFIER_THRESHOLD', '0.05')),
+                            help="confidence below which the action falls back to OpenAI")
+    args = arg_parser.parse_args()
+
+    load_dotenv()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            sentences = [line.strip() for line in f if line.strip()]
+    else:
+        sentences = DEFAULT_SENTENCES
+
+    classifier = prototype_classifier("food_or_not")
+    openai_client = OpenAIClient(api_key=os.getenv('OPENAI_API_KEY'))
+
+    # warm-up so the first measurement does not include lazy initialisation
+    classifier.classify(sentences[0])
+
+    local_latencies, openai_latencies = [], []
+    agreements, confident, confident_agreements = 0, 0, 0
+
+    print(f"{'sentence':<55} {'gpt-4':<12} {'local':<12} {'conf':>7}")
+    for sentence in sentences:
+        start_time = time.perf_counter()
+        local_label, confidence = classifier.classify(sentence)
+        local_latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        prompt = openai_client.create_food_detection_prompt(sentence)
+        openai_label = (openai_client.get_completion(prompt).get("food_or_not") or "").lower()
+        openai_latencies.append(time.perf_counter() - start_time)
+
+        agrees = local_label == openai_label
+        agreements += agrees
+        if confidence >= args.threshold:
+            confident += 1
+            confident_agreements += agrees
+
+        marker = "" if agrees else "  <-- disagree"
+        print(f"{sentence[:54]:<55} {openai_label:<12} {local_label:<12} {confidence:7.3f}{marker}")
+
+    total = len(sentences)
+    print()
+    print(f"Agreement (all sentences):         {agreements}/{total} ({agreements / total:.1%})")
+    if confident:
+        print(f"Agreement (above threshold {args.threshold}): {confident_agreements}/{confident} "
+              f"({confident_agreements / confident:.1%})")
+    print(f"Resolved locally at threshold:     {confident}/{total} ({confident / total:.1%}), "
+          f"OpenAI fallbacks: {total - confident}")
+    print(latency_summary("local", local_latencies))
+    print(latency_summary("gpt-4", openai_latencies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Replay logged conversations through the intent validation confidence gate (utils/validation_gate.py).
+
+For every user message the out-of-scope validation looks at (a validated DIET intent; in older
+trackers of action_validate_intent only outside an active form) it reports whether the gate
+skips FlanT5, and the decisions that would change: messages FlanT5 rejected as out_of_scope
+that the gate now lets through. The FlanT5 verdicts are read from the
+trackers: the "out_of_scope" parse data of the OutOfScopeValidator NLU component, or in older
+trackers action_validate_intent followed by a rewind (UserUtteranceReverted). Messages the gate
+already skipped have no verdict, so replay trackers logged with the gate disabled
+(VALIDATION_GATE_MIN_CONFIDENCE=1.1), or re-run FlanT5 with --classify.
+
+Trackers are the JSON of the Rasa HTTP API (GET /conversations/<sender_id>/tracker), one per
+file, a list of them, or one per line in a .jsonl file.
+
+Usage (from the project root):
+    python -m benchmarks.replay_validation_gate trackers/*.json
+    python -m benchmarks.replay_validation_gate trackers.jsonl --min-confidence 0.9 --min-margin 0.7
+    python -m benchmarks.replay_validation_gate trackers.jsonl --validate-slot-answers
+    python -m benchmarks.replay_validation_gate trackers.jsonl --classify --sweep
+"""
+import argparse
+import json
+import os
+from typing import Any, Dict, Iterator, List
+
+from utils.validation_gate import VALIDATED_INTENTS, ValidationGate, intent_margin, validation_gate
+
+SWEEP_CONFIDENCES = [0.8, 0.9, 0.95, 0.98, 0.99]
+SWEEP_MARGINS = [0.5, 0.7, 0.85, 0.95]
+
+
+def load_trackers(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+                continue
+            data = json.load(f)
+        yield from data if isinstance(data, list) else [data]
+
+
+def validated_turns(tracker: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The user messages the validation looks at, with the logged FlanT5 verdict (None if it didn't run)"""
+    turns = []
+    active_loop = None
+    turn = None
+    for event in tracker.get("events", []):
+        kind = event.get("event")
+        if kind == "active_loop":
+            active_loop = event.get("name")
+        elif kind == "user":
+            parse_data = event.get("parse_data") or {}
+            # validated by the NLU component: the DIET intent is kept next to its verdict
+            verdict = parse_data.get("out_of_scope")
+            intent = verdict["intent"] if verdict else parse_data.get("intent") or {}
+            turn = None
+            if intent.get("name") in VALIDATED_INTENTS and (verdict or not active_loop):
+                turn = {
+                    "sender_id": tracker.get("sender_id"),
+                    "text": event.get("text"),
+                    "entities": parse_data.get("entities") or [],
+                    "intent": intent["name"],
+                    "confidence": intent.get("confidence") or 0.0,
+                    "intent_ranking": [ranked for ranked in parse_data.get("intent_ranking") or []
+                                       if ranked.get("name") != "nlu_fallback"],
+                    "rejected": None,
+                }
+                if verdict and "prediction" in verdict:
+                    turn["rejected"] = verdict["prediction"] == "out_of_scope"
+                turns.append(turn)
+                if verdict:
+                    turn = None
+        elif turn is not None and kind == "action" and event.get("name") == "action_validate_intent":
+            turn["rejected"] = False
+        elif turn is not None and kind == "rewind" and turn["rejected"] is False:
+            turn["rejected"] = True
+    return turns
+
+
+def classify_turns(turns: List[Dict[str, Any]], batch_size: int = 16) -> None:
+    """Fill in the FlanT5 verdicts by running the model (locally or on INFERENCE_SERVER_URL)"""
+    if os.getenv("INFERENCE_SERVER_URL"):
+        from custom_models.inference_client import InferenceClient, RemoteFlanT5Classifier
+        classifier = RemoteFlanT5Classifier(InferenceClient(os.environ["INFERENCE_SERVER_URL"]))
+    else:
+        from custom_models.model_registry import ModelRegistry
+        classifier = ModelRegistry.get("flan_t5")
+
+    for start in range(0, len(turns), batch_size):
+        batch = turns[start:start + batch_size]
+        results = classifier.classify_batch([classifier.create_prompt(turn["text"]) for turn in batch])
+        for turn, (predicted_intent, _) in zip(batch, results):
+            turn["rejected"] = predicted_intent != turn["intent"] and predicted_intent == "out_of_scope"
+
+
+def replay(turns: List[Dict[str, Any]], gate: ValidationGate) -> Dict[str, Any]:
+    reasons: Dict[str, int] = {}
+    changed = []
+    for turn in turns:
+        validate, reason = gate.should_validate(turn["intent"], turn["confidence"], turn["intent_ranking"],
+                                                turn["text"], turn["entities"])
+        reasons[reason] = reasons.get(reason, 0) + 1
+        if not validate and turn["rejected"]:
+            changed.append(turn)
+    skipped = reasons.get("decisive", 0) + reasons.get("slot_answer", 0)
+    return {
+        "turns": len(turns),
+        "skipped": skipped,
+        "skipped_fraction": skipped / len(turns) if turns else 0.0,
+        "reasons": reasons,
+        "unknown_verdicts": sum(turn["rejected"] is None for turn in turns),
+        "changed": changed,
+    }
+
+
+def print_report(result: Dict[str, Any], gate: ValidationGate) -> None:
+    print(f"gate: min confidence {gate.min_confidence}, min margin {gate.min_margin}, "
+          f"skip slot answers {gate.skip_slot_answers}")
+    print(f"validated-intent messages:  {result['turns']}")
+    print(f"FlanT5 skipped:             {result['skipped']} ({result['skipped_fraction']:.1%})")
+    print(f"by reason:                  {result['reasons']}")
+    print(f"without a FlanT5 verdict:   {result['unknown_verdicts']}")
+    print(f"changed decisions:          {len(result['changed'])} out_of_scope messages would be accepted")
+    for turn in result["changed"]:
+        margin = intent_margin(turn["intent"], turn["confidence"], turn["intent_ranking"])
+        print(f"  [{turn['sender_id']}] {turn['intent']} conf={turn['confidence']:.3f} "
+              f"margin={margin:.3f}: {turn['text']}")
+
+
+def print_sweep(turns: List[Dict[str, Any]], skip_slot_answers: bool) -> None:
+    print(f"\n{'min conf':>8} {'min margin':>10} {'skipped':>8} {'changed':>8}")
+    for min_confidence in SWEEP_CONFIDENCES:
+        for min_margin in SWEEP_MARGINS:
+            result = replay(turns, ValidationGate(min_confidence, min_margin, skip_slot_answers))
+            print(f"{min_confidence:>8} {min_margin:>10} {result['skipped_fraction']:>8.1%} {len(result['changed']):>8}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("trackers", nargs="+", help="tracker .json/.jsonl files")
+    arg_parser.add_argument("--min-confidence", type=float, default=validation_gate.min_confidence)
+    arg_parser.add_argument("--min-margin", type=float, default=validation_gate.min_margin)
+    arg_parser.add_argument("--validate-slot-answers", action="store_true",
+                            help="also validate bare city, date or number answers")
+    arg_parser.add_argument("--classify", action="store_true", help="re-run FlanT5 instead of reading its verdicts")
+    arg_parser.add_argument("--sweep", action="store_true", help="also report a grid of thresholds")
+    args = arg_parser.parse_args()
+
+    turns = [turn for tracker in load_trackers(args.trackers) for turn in validated_turns(tracker)]
+    if args.classify:
+        classify_turns(turns)
+
+    skip_slot_answers = validation_gate.skip_slot_answers and not args.validate_slot_answers
+    gate = ValidationGate(args.min_confidence, args.min_margin, skip_slot_answers)
+    print_report(replay(turns, gate), gate)
+    if args.sweep:
+        print_sweep(turns, skip_slot_answers)
+
+
+if __name__ == "__main__":
+    main()
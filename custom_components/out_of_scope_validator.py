@@ -0,0 +1,134 @@
+"""
+Out-of-scope validation of the travel intents inside the Rasa NLU pipeline.
+
+Messages DIET classifies as one of the validated intents are checked by FlanT5 (or the local
+sentence-embedding classifier); when the validator answers out_of_scope the intent is rewritten
+to nlu_fallback, so no separate action-server round trip or UserUtteranceReverted is needed.
+Decisive DIET intents and answers to form questions skip the check (utils/validation_gate.py).
+Every checked message carries the verdict in its parse data under "out_of_scope".
+
+    - name: custom_components.out_of_scope_validator.OutOfScopeValidator
+      backend: flan_t5          # or embedding
+      fallback: rasa            # FlanT5 shedding load: keep the DIET intent, or ask "embedding"
+
+With INFERENCE_SERVER_URL set, FlanT5 runs on the inference server and concurrent parses are
+batched there; all messages handed to process() together are classified in batches.
+"""
+import os
+from typing import Any, Dict, List, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.shared.constants import DEFAULT_NLU_FALLBACK_INTENT_NAME
+from rasa.shared.nlu.constants import (
+    ENTITIES, INTENT, INTENT_NAME_KEY, INTENT_RANKING_KEY, PREDICTED_CONFIDENCE_KEY, TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+
+from custom_models.inference_scheduler import Overloaded
+from mylogger import get_logger
+from utils.validation_gate import VALIDATED_INTENTS, ValidationGate, validation_gate
+
+logger = get_logger(__name__)
+
+OUT_OF_SCOPE_KEY = "out_of_scope"
+
+
+@DefaultV1Recipe.register([DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER], is_trainable=False)
+class OutOfScopeValidator(GraphComponent):
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            "backend": "flan_t5",
+            "fallback": "rasa",
+            "intents": VALIDATED_INTENTS,
+            "min_confidence": validation_gate.min_confidence,
+            "min_margin": validation_gate.min_margin,
+            "skip_slot_answers": validation_gate.skip_slot_answers,
+            "batch_size": 16,
+        }
+
+    def __init__(self, config: Dict[Text, Any]):
+        self.intents = set(config["intents"])
+        self.gate = ValidationGate(config["min_confidence"], config["min_margin"], config["skip_slot_answers"])
+        self.batch_size = config["batch_size"]
+        self.backend = config["backend"]
+
+        self.classifier = self._flan_t5() if self.backend == "flan_t5" else None
+        self.scope_classifier = None
+        if self.backend == "embedding" or config["fallback"] == "embedding":
+            from custom_models.model_registry import ModelRegistry
+            self.scope_classifier = ModelRegistry.get("scope_classifier")
+
+    @staticmethod
+    def _flan_t5():
+        inference_server_url = os.getenv("INFERENCE_SERVER_URL")
+        if inference_server_url:
+            from custom_models.inference_client import InferenceClient, RemoteFlanT5Classifier
+            return RemoteFlanT5Classifier(InferenceClient(inference_server_url))
+
+        from custom_models.model_registry import ModelRegistry
+        return ModelRegistry.get("flan_t5")
+
+    @classmethod
+    def create(cls, config: Dict[Text, Any], model_storage: ModelStorage, resource: Resource,
+               execution_context: ExecutionContext) -> GraphComponent:
+        return cls(config)
+
+    def _classify(self, texts: List[str]) -> Tuple[List[Tuple[str, float]], str]:
+        """(label, confidence) per text and the backend that answered"""
+        if self.classifier is not None:
+            try:
+                return self.classifier.classify_batch([self.classifier.create_prompt(text) for text in texts]), "flan_t5"
+            except Overloaded as e:
+                if self.scope_classifier is None:
+                    raise
+                logger.warning("%s, using the embedding classifier", e)
+        return [self.scope_classifier.classify(text) for text in texts], "embedding"
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        to_validate = []
+        for message in messages:
+            intent = message.get(INTENT) or {}
+            intent_name = intent.get(INTENT_NAME_KEY)
+            if intent_name not in self.intents:
+                continue
+
+            validate, reason = self.gate.should_validate(
+                intent_name, intent.get(PREDICTED_CONFIDENCE_KEY), message.get(INTENT_RANKING_KEY),
+                message.get(TEXT), message.get(ENTITIES))
+            if validate:
+                to_validate.append(message)
+            else:
+                message.set(OUT_OF_SCOPE_KEY, {"intent": intent, "skipped": reason}, add_to_output=True)
+
+        for start in range(0, len(to_validate), self.batch_size):
+            batch = to_validate[start:start + self.batch_size]
+            try:
+                predictions, backend = self._classify([message.get(TEXT) for message in batch])
+            except Overloaded as e:
+                logger.warning("%s, keeping the RASA intents of %s messages", e, len(batch))
+                for message in batch:
+                    message.set(OUT_OF_SCOPE_KEY, {"intent": message.get(INTENT), "skipped": "overloaded"},
+                                add_to_output=True)
+                continue
+
+            for message, (predicted_intent, confidence) in zip(batch, predictions):
+                self._apply(message, predicted_intent, confidence, backend)
+
+        return messages
+
+    @staticmethod
+    def _apply(message: Message, predicted_intent: str, confidence: float, backend: str) -> None:
+        intent = message.get(INTENT)
+        verdict = {"intent": intent, "prediction": predicted_intent, "confidence": confidence, "backend": backend}
+        message.set(OUT_OF_SCOPE_KEY, verdict, add_to_output=True)
+        logger.info("RASA Intent: %s (confidence: %s), %s: %s (confidence: %s)",
+                    intent[INTENT_NAME_KEY], intent.get(PREDICTED_CONFIDENCE_KEY), backend, predicted_intent, confidence)
+
+        if predicted_intent == "out_of_scope" and predicted_intent != intent[INTENT_NAME_KEY]:
+            fallback_intent = {INTENT_NAME_KEY: DEFAULT_NLU_FALLBACK_INTENT_NAME, PREDICTED_CONFIDENCE_KEY: confidence}
+            message.set(INTENT, fallback_intent, add_to_output=True)
+            message.data.setdefault(INTENT_RANKING_KEY, []).insert(0, fallback_intent)
@@ -0,0 +1,169 @@
+"""
+Conversation trackers in a local SQLite file, one row per event.
+
+The database runs in WAL mode, so reads don't block the single writer, and several Rasa
+processes on the same host can share one file. Only the latest session of a conversation (from
+its last session_started event) is read for a turn. Earlier sessions are periodically compacted:
+their event rows move into one zlib-compressed snapshot per conversation, which only
+retrieve_full_tracker (exports, rasa interactive, training data) reads back.
+
+    tracker_store:
+      type: custom_components.sqlite_tracker_store.SQLiteTrackerStore
+      db: trackers.db
+      compaction_interval: 3600     # seconds between compactions, 0 disables them
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Text
+
+from rasa.core.brokers.broker import EventBroker
+from rasa.core.tracker_store import TrackerStore
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import SessionStarted
+from rasa.shared.core.trackers import DialogueStateTracker
+
+from mylogger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender_id TEXT NOT NULL,
+    type_name TEXT NOT NULL,
+    timestamp REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_sender ON events (sender_id, id);
+CREATE INDEX IF NOT EXISTS events_session_starts ON events (sender_id, id) WHERE type_name = 'session_started';
+CREATE TABLE IF NOT EXISTS snapshots (
+    sender_id TEXT PRIMARY KEY,
+    num_events INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+# first row of the latest session of a conversation (0: no session started yet, all rows)
+LATEST_SESSION_START = ("SELECT coalesce(max(id), 0) FROM events "
+                        "WHERE sender_id = ? AND type_name = '" + SessionStarted.type_name + "'")
+
+
+class SQLiteTrackerStore(TrackerStore):
+    def __init__(self, domain: Optional[Domain] = None, db: Text = "trackers.db",
+                 compaction_interval: float = 3600, busy_timeout: float = 5.0,
+                 event_broker: Optional[EventBroker] = None, **kwargs: Dict[Text, Any]) -> None:
+        self.db = db
+        self.compaction_interval = float(compaction_interval)
+        # Rasa serves the turns from one event loop: statements are short and run inline,
+        # the lock only guards the connection against the compaction thread
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db, timeout=float(busy_timeout), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # with WAL, NORMAL only syncs at checkpoints: a power loss may drop the last turns, never corrupt the file
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._last_compaction = time.monotonic()
+        logger.info("SQLite tracker store at %s (compaction every %ss)", db, self.compaction_interval)
+        super().__init__(domain, event_broker, **kwargs)
+
+    def _events_since_session_start(self, sender_id: Text) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            f"SELECT data FROM events WHERE sender_id = ? AND id >= ({LATEST_SESSION_START}) ORDER BY id",
+            (sender_id, sender_id)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def _tracker(self, sender_id: Text, events: List[Dict[str, Any]]) -> Optional[DialogueStateTracker]:
+        if not events:
+            return None
+        return DialogueStateTracker.from_dict(sender_id, events, self.domain.slots)
+
+    async def save(self, tracker: DialogueStateTracker) -> None:
+        if self.event_broker:
+            await self.stream_events(tracker)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # retrieve() hands out the latest session only, so the tracker's events past
+                # the stored rows of that session are the new ones
+                stored = self._conn.execute(
+                    f"SELECT count(*) FROM events WHERE sender_id = ? AND id >= ({LATEST_SESSION_START})",
+                    (tracker.sender_id, tracker.sender_id)).fetchone()[0]
+                new_events = list(tracker.events)[stored:]
+                self._conn.executemany(
+                    "INSERT INTO events (sender_id, type_name, timestamp, data) VALUES (?, ?, ?, ?)",
+                    [(tracker.sender_id, event.type_name, event.timestamp, json.dumps(event.as_dict()))
+                     for event in new_events])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if self.compaction_interval and time.monotonic() - self._last_compaction >= self.compaction_interval:
+            self._last_compaction = time.monotonic()
+            threading.Thread(target=self.compact, name="tracker-compaction", daemon=True).start()
+
+    async def retrieve(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        """The tracker of the latest session"""
+        with self._lock:
+            events = self._events_since_session_start(sender_id)
+        return self._tracker(sender_id, events)
+
+    async def retrieve_full_tracker(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        """The tracker with every session, compacted ones included"""
+        with self._lock:
+            snapshot = self._conn.execute("SELECT data FROM snapshots WHERE sender_id = ?", (sender_id,)).fetchone()
+            rows = self._conn.execute("SELECT data FROM events WHERE sender_id = ? ORDER BY id",
+                                      (sender_id,)).fetchall()
+        events = json.loads(zlib.decompress(snapshot[0])) if snapshot else []
+        events.extend(json.loads(data) for data, in rows)
+        return self._tracker(sender_id, events)
+
+    async def keys(self) -> Iterable[Text]:
+        with self._lock:
+            rows = self._conn.execute("SELECT sender_id FROM events UNION SELECT sender_id FROM snapshots").fetchall()
+        return [sender_id for sender_id, in rows]
+
+    def compact(self) -> int:
+        """Move the events of all sessions but the latest into the conversation snapshots,
+        returns the number of event rows compacted"""
+        start = time.perf_counter()
+        compacted = 0
+        # conversations with rows before their latest session start
+        with self._lock:
+            senders = self._conn.execute(
+                "SELECT starts.sender_id, starts.latest FROM "
+                "(SELECT sender_id, max(id) AS latest FROM events WHERE type_name = ? GROUP BY sender_id) AS starts "
+                "WHERE EXISTS (SELECT 1 FROM events WHERE sender_id = starts.sender_id AND id < starts.latest)",
+                (SessionStarted.type_name,)).fetchall()
+
+        # one short transaction per conversation, turns of other conversations go in between
+        for sender_id, latest in senders:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    rows = self._conn.execute("SELECT data FROM events WHERE sender_id = ? AND id < ? ORDER BY id",
+                                              (sender_id, latest)).fetchall()
+                    snapshot = self._conn.execute("SELECT data FROM snapshots WHERE sender_id = ?",
+                                                  (sender_id,)).fetchone()
+                    events = json.loads(zlib.decompress(snapshot[0])) if snapshot else []
+                    events.extend(json.loads(data) for data, in rows)
+
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO snapshots (sender_id, num_events, data, updated) VALUES (?, ?, ?, ?)",
+                        (sender_id, len(events), zlib.compress(json.dumps(events).encode("utf-8")), time.time()))
+                    self._conn.execute("DELETE FROM events WHERE sender_id = ? AND id < ?", (sender_id, latest))
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            compacted += len(rows)
+
+        logger.info("Compacted %s events of %s conversations in %.3fs",
+                    compacted, len(senders), time.perf_counter() - start)
+        return compacted
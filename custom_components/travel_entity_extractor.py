@@ -0,0 +1,115 @@
+"""
+Flight entities at NLU time, from the spaCy travel patterns (custom_models/flight_entity_extractor.py).
+
+For the flight search intent it emits the entities the domain slot mappings already consume,
+so most flight turns fill their slots without waiting for action_extract_flight_entities:
+
+    city    role departure / arrival    -> departure_city, arrival_city
+    date    role departure / return     -> departure_date, return_date (ISO dates)
+    number                              -> num_passengers
+
+Dates are only emitted when all of them are spaCy/ruler DATE entities; a date found in single
+tokens leaves both dates to the extract action. Entities of the same type and role from earlier
+extractors (DIET) are replaced. All values, found or not, are also kept under "flight_entities"
+in the parse data, so the extract action (FLIGHT_EXTRACTION_MODE=hybrid) only asks the LLM for
+the slots still missing. Check the rules with python -m benchmarks.eval_flight_dates.
+
+    - name: custom_components.travel_entity_extractor.TravelEntityExtractor
+      intents: [find_compare_flights]
+
+spaCy runs in the Rasa server process, or on the inference server when INFERENCE_SERVER_URL is set.
+"""
+import os
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.extractors.extractor import EntityExtractorMixin
+from rasa.shared.nlu.constants import (
+    ENTITIES, ENTITY_ATTRIBUTE_END, ENTITY_ATTRIBUTE_ROLE, ENTITY_ATTRIBUTE_START, ENTITY_ATTRIBUTE_TYPE,
+    ENTITY_ATTRIBUTE_VALUE, INTENT, INTENT_NAME_KEY, TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+
+from custom_models.flight_entity_extractor import FLIGHT_ENTITIES_KEY, FlightEntityExtractor
+from mylogger import get_logger
+
+logger = get_logger(__name__)
+
+# flight slot -> (entity, role) of its from_entity mapping in domain.yml
+SLOT_ENTITIES: Dict[str, Tuple[str, Optional[str]]] = {
+    "departure_city": ("city", "departure"),
+    "arrival_city": ("city", "arrival"),
+    "departure_date": ("date", "departure"),
+    "return_date": ("date", "return"),
+    "num_passengers": ("number", None),
+}
+
+
+@DefaultV1Recipe.register([DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR], is_trainable=False)
+class TravelEntityExtractor(GraphComponent, EntityExtractorMixin):
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {"intents": ["find_compare_flights"]}
+
+    def __init__(self, config: Dict[Text, Any]):
+        self.intents = set(config["intents"])
+
+        inference_server_url = os.getenv("INFERENCE_SERVER_URL")
+        if inference_server_url:
+            from custom_models.inference_client import InferenceClient, RemoteSpacyNLPManager
+            RemoteSpacyNLPManager.configure(InferenceClient(inference_server_url))
+            self.extractor = FlightEntityExtractor(RemoteSpacyNLPManager)
+        else:
+            from custom_models.model_registry import ModelRegistry
+            ModelRegistry.get("spacy")
+            self.extractor = FlightEntityExtractor()
+
+    @classmethod
+    def create(cls, config: Dict[Text, Any], model_storage: ModelStorage, resource: Resource,
+               execution_context: ExecutionContext) -> GraphComponent:
+        return cls(config)
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        selected = [message for message in messages
+                    if (message.get(INTENT) or {}).get(INTENT_NAME_KEY) in self.intents and message.get(TEXT)]
+        if not selected:
+            return messages
+
+        # one nlp.pipe pass over every selected message
+        docs = self.extractor.pipe([message.get(TEXT) for message in selected])
+        for message, doc in zip(selected, docs):
+            found = self.extractor.extract_spans(doc, date_entities_only=True)
+            message.set(FLIGHT_ENTITIES_KEY, {slot: value[0] if value else None for slot, value in found.items()},
+                        add_to_output=True)
+            self._set_entities(message, found)
+
+        return messages
+
+    def _set_entities(self, message: Message, found: Dict[str, Optional[Tuple[str, Any]]]) -> None:
+        entities = []
+        for slot, (entity_type, role) in SLOT_ENTITIES.items():
+            if not found.get(slot):
+                continue
+            value, span = found[slot]
+            entity = {
+                ENTITY_ATTRIBUTE_TYPE: entity_type,
+                ENTITY_ATTRIBUTE_VALUE: value,
+                ENTITY_ATTRIBUTE_START: span.start_char,
+                ENTITY_ATTRIBUTE_END: span.end_char,
+            }
+            if role:
+                entity[ENTITY_ATTRIBUTE_ROLE] = role
+            entities.append(entity)
+
+        if not entities:
+            return
+
+        # the travel rules win over other extractors for the same entity and role
+        emitted = {(entity[ENTITY_ATTRIBUTE_TYPE], entity.get(ENTITY_ATTRIBUTE_ROLE)) for entity in entities}
+        kept = [entity for entity in message.get(ENTITIES, [])
+                if (entity.get(ENTITY_ATTRIBUTE_TYPE), entity.get(ENTITY_ATTRIBUTE_ROLE)) not in emitted]
+        message.set(ENTITIES, kept + self.add_extractor_name(entities), add_to_output=True)
+        logger.info("Travel entities: %s", entities)
@@ -1,36 +1,86 @@
+import re
+from typing import Any, Dict, List, Optional
 from transformers import pipeline
+from custom_models.city_gazetteer import CityGazetteer
+from custom_models.inference_scheduler import get_scheduler
+from custom_models.loading_options import pretrained_kwargs
+from utils.metrics import metrics
 
 class CityAreaExtractor:
-    def __init__(self, model_name="dslim/bert-base-NER"):
-        """Initialize the city extractor with a specified NER model."""
-        self.ner = pipeline("ner", model=model_name, use_fast=False)
-
-    def extract_city(self, sentence):
-        # convert to title case for better NER detection,
-        # this converts words like "london" to "London"
-        title_case_sentence = ' '.join(word.capitalize() for word in sentence.split())
-
-        results = self.ner(title_case_sentence)
-
-        # group consecutive LOC entities to handle multi-word cities
-        cities = []
-        current_city = []
-
-        for entity in results:
-            if entity['entity'] in ['B-LOC', 'I-LOC']:
-                # handle word pieces that start with ##
-                if entity['word'].startswith('##'):
-                    if current_city:
-                        current_city[-1] += entity['word'][2:]
-                else:
-                    current_city.append(entity['word'])
+    def __init__(self, model_name="dslim/bert-base-NER", gazetteer: Optional[CityGazetteer] = None, batch_size: int = 16,
+                 load_options: Optional[Dict[str, Any]] = None):
+        """Initialize the city extractor with a specified NER model.
+        load_options: from_pretrained kwargs, by default from the environment (see loading_options)"""
+        # sets the torch thread counts, which must happen before the model loads
+        self.scheduler = get_scheduler("city_ner")
+        load_options = dict(load_options if load_options is not None else pretrained_kwargs("city_ner"))
+        torch_dtype = load_options.pop("torch_dtype", None)
+
+        # fast tokenizer + built-in aggregation: word pieces are merged by the pipeline
+        # and every entity comes with its character offsets
+        self.ner = pipeline("ner", model=model_name, aggregation_strategy="simple",
+                            torch_dtype=torch_dtype, model_kwargs=load_options)
+        self.gazetteer = gazetteer or CityGazetteer()
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _title_case(sentence: str) -> str:
+        """Capitalize every word (better NER detection, e.g. "london" -> "London")
+        while keeping the character offsets of the original sentence."""
+        def capitalize(match):
+            word = match.group(0)
+            capitalized = word.capitalize()
+            return capitalized if len(capitalized) == len(word) else word
+
+        return re.sub(r"\S+", capitalize, sentence)
+
+    def extract_cities(self, sentences: List[str], use_gazetteer: bool = True) -> List[List[Dict]]:
+        """Extract the cities/areas of many sentences, running the model on them in batches.
+
+        Returns one list per sentence with a dict per location: `city` (official gazetteer
+        name or title-cased text), `text`, `start`/`end` character offsets in the original
+        sentence, `score` and `source` ("gazetteer" or "model")."""
+        results: List[Optional[List[Dict]]] = [None] * len(sentences)
+        model_indices = []
+
+        for i, sentence in enumerate(sentences):
+            if not sentence or not sentence.strip():
+                results[i] = []
+                continue
+
+            # fast path: known cities/aliases are answered by the gazetteer without running the model
+            gazetteer_cities = self.gazetteer.find_cities(sentence) if use_gazetteer else []
+            if use_gazetteer:
+                metrics.inc("cache_requests_total", cache="city_gazetteer", result="hit" if gazetteer_cities else "miss")
+            if gazetteer_cities:
+                results[i] = [
+                    {**match, "score": 1.0, "source": "gazetteer"}
+                    for match in gazetteer_cities
+                ]
             else:
-                if current_city:
-                    cities.append(' '.join(current_city))
-                    current_city = []
+                model_indices.append(i)
+
+        if model_indices:
+            title_case_sentences = [self._title_case(sentences[i]) for i in model_indices]
+            with self.scheduler.slot(), metrics.timed("model_inference_seconds", model="bert_ner", op="extract_cities"):
+                outputs = self.ner(title_case_sentences, batch_size=self.batch_size)
+
+            for i, title_case_sentence, entities in zip(model_indices, title_case_sentences, outputs):
+                results[i] = [
+                    {
+                        "city": title_case_sentence[entity["start"]:entity["end"]],
+                        "text": sentences[i][entity["start"]:entity["end"]],
+                        "start": entity["start"],
+                        "end": entity["end"],
+                        "score": float(entity["score"]),
+                        "source": "model",
+                    }
+                    for entity in entities
+                    if entity["entity_group"] == "LOC"
+                ]
 
-        # add the last city if there's one being processed
-        if current_city:
-            cities.append(' '.join(current_city))
+        return results
 
-        return cities[0] if cities else None
\ No newline at end of file
+    def extract_city(self, sentence, use_gazetteer: bool = True):
+        cities = self.extract_cities([sentence], use_gazetteer=use_gazetteer)[0]
+        return cities[0]["city"] if cities else None
@@ -0,0 +1,60 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import spacy
+from spacy.matcher import PhraseMatcher
+from spacy.util import filter_spans
+from mylogger import get_logger
+
+logger = get_logger(__name__)
+
+# bundled list of major travel destinations: {"Official Name": ["alias", ...]}
+# (city names that are also common English words or first names, e.g. Nice, Split, Florence or Austin,
+# and aliases of areas, e.g. Manhattan, are left out on purpose: the NER decides about those)
+DEFAULT_CITIES_PATH = os.path.join(os.path.dirname(__file__), "resources", "cities.json")
+
+
+class CityGazetteer:
+    def __init__(self, cities_path: str = DEFAULT_CITIES_PATH):
+        """Case-insensitive multi-word city matcher built on a spaCy PhraseMatcher."""
+        with open(cities_path, encoding="utf-8") as f:
+            cities: Dict[str, List[str]] = json.load(f)
+
+        # tokenizer only, no statistical components are needed for phrase matching
+        self.nlp = spacy.blank("en")
+        self.matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+
+        for city, aliases in cities.items():
+            self.matcher.add(city, list(self.nlp.tokenizer.pipe([city] + aliases)))
+
+        logger.info("City gazetteer loaded with %s cities", len(cities))
+
+    def find_cities(self, text: str) -> List[Dict]:
+        """Return the cities mentioned in the text (longest match wins), in order of appearance.
+
+        Each match is a dict with the official `city` name, the matched `text`
+        and its `start`/`end` character offsets."""
+        if not text:
+            return []
+
+        doc = self.nlp.make_doc(text)
+        spans = filter_spans(self.matcher(doc, as_spans=True))
+
+        return [
+            {"city": span.label_, "text": span.text, "start": span.start_char, "end": span.end_char}
+            for span in spans
+        ]
+
+    def find_city(self, text: str) -> Optional[str]:
+        """Official name of the first city mentioned in the text, if any"""
+        cities = self.find_cities(text)
+        return cities[0]["city"] if cities else None
+
+    def match_full(self, text: str) -> Optional[str]:
+        """Official city name if the whole text is a known city or alias"""
+        text = (text or "").strip()
+        cities = self.find_cities(text)
+        if len(cities) == 1 and cities[0]["start"] == 0 and cities[0]["end"] == len(text):
+            return cities[0]["city"]
+        return None
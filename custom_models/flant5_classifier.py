@@ -1,24 +1,33 @@
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import torch
 import time
-from typing import Tuple
+from typing import Any, Dict, List, Optional, Tuple
+from custom_models.inference_scheduler import Overloaded, get_scheduler
+from custom_models.loading_options import pretrained_kwargs
 from mylogger import get_logger
+from utils.metrics import metrics
+from utils.tracing import span
 
 logger = get_logger(__name__)
 
 class FlanT5Classifier:
-    def __init__(self, model_name: str = "google/flan-t5-large"):
+    def __init__(self, model_name: str = "google/flan-t5-large", load_options: Optional[Dict[str, Any]] = None):
+        """load_options: from_pretrained kwargs, by default from the environment (see loading_options)"""
+        # sets the torch thread counts, which must happen before the model loads
+        self.scheduler = get_scheduler("flan_t5")
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        logger.info(f"Using device: {self.device}")
+        logger.info("Using device: %s", self.device)
         
         start_time = time.time()
-        logger.info(f"Loading model: {model_name}")
+        logger.info("Loading model: %s", model_name)
 
+        load_options = load_options if load_options is not None else pretrained_kwargs("flan_t5")
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name, **load_options)
+        self.model.eval()
 
         load_time = time.time() - start_time
-        logger.info(f"Model loading time: {load_time:.2f} seconds")
+        logger.info("Model loading time: %.2f seconds (%s)", load_time, load_options)
 
 
     @staticmethod
@@ -65,32 +74,52 @@ Category:"""
 
 
     def classify(self, prompt: str) -> Tuple[str, float]:
+        return self.classify_batch([prompt])[0]
+
+
+    def classify_batch(self, prompts: List[str]) -> List[Tuple[str, float]]:
+        """Classify several prompts with one padded generate() call"""
         try:
             start_time = time.time()
             
-            inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512)
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=512)
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
             
-            outputs = self.model.generate(
-                **inputs,
-                max_length=20,
-                output_scores=True,
-                return_dict_in_generate=True,
-                do_sample=False   # deterministic generation (greedy)
-            )
+            with self.scheduler.slot(), span("flan_t5.generate", device=self.device, batch_size=len(prompts)):
+                outputs = self.model.generate(
+                    **inputs,
+                    max_length=20,
+                    output_scores=True,
+                    return_dict_in_generate=True,
+                    do_sample=False   # deterministic generation (greedy)
+                )
+            
+            predictions = [
+                text.strip().lower()
+                for text in self.tokenizer.batch_decode(outputs.sequences, skip_special_tokens=True)
+            ]
             
-            prediction = self.tokenizer.decode(outputs.sequences[0], skip_special_tokens=True).strip().lower()
+            # calculate confidence: mean of the top token probability over the steps each
+            # sequence actually generated (finished sequences are padded in a batch)
+            scores = torch.stack(outputs.scores, dim=0).float()
+            step_confidences = torch.softmax(scores, dim=-1).max(dim=-1).values   # [steps, batch]
+            generated = outputs.sequences[:, 1:] != self.tokenizer.pad_token_id      # [batch, steps]
             
-            # calculate confidence
-            scores = torch.stack(outputs.scores, dim=0)
-            sequence_scores = torch.softmax(scores, dim=-1)
-            confidence = sequence_scores.max(dim=-1).values.mean().item()
+            results = []
+            for i, prediction in enumerate(predictions):
+                num_steps = max(1, min(int(generated[i].sum().item()), step_confidences.shape[0]))
+                confidence = step_confidences[:num_steps, i].mean().item()
+                results.append((prediction, confidence))
             
             generation_time = time.time() - start_time
-            logger.info(f"Generation time: {generation_time:.2f} seconds")
+            metrics.observe("model_inference_seconds", generation_time, model="flan_t5", op="classify")
+            logger.info("Generation time: %.2f seconds (%s prompts)", generation_time, len(prompts))
             
-            return prediction, confidence
+            return results
             
+        except Overloaded:
+            raise
         except Exception as e:
-            logger.error(f"Error: {e}")
-            raise
\ No newline at end of file
+            metrics.inc("model_inference_errors_total", model="flan_t5", op="classify")
+            logger.error("Error: %s", e)
+            raise
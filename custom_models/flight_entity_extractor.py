@@ -0,0 +1,229 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from custom_models.spacy_nlp_md import SpacyNLPManager
+from mylogger import get_logger
+from utils.date_utils import DAYS_MAP, MONTH_WORDS, DateResolver, default_resolver
+
+logger = get_logger(__name__)
+
+# single tokens that are a date on their own: 2025-03-01, 15/07/2025, 21st (not bare numbers like "2")
+DATE_TOKEN_RE = re.compile(r'^(?:\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}|\d{1,2}(?:st|nd|rd|th))$')
+DAY_NUMBER_RE = re.compile(r'^(\d{1,2})(?:st|nd|rd|th)?$')
+
+FLIGHT_SLOTS = ["departure_city", "arrival_city", "departure_date", "return_date", "num_passengers"]
+
+# parse data key of the values found by the TravelEntityExtractor NLU component (read by the extract action)
+FLIGHT_ENTITIES_KEY = "flight_entities"
+
+
+class FlightEntityExtractor:
+    """Flight search slots from the travel EntityRuler patterns (FLIGHT_TYPE, LOCATION_INDICATOR,
+    PASSENGERS, DATE) and the spaCy NER, shared by the flight extract action and the
+    TravelEntityExtractor NLU component.
+
+    `nlp_manager` is SpacyNLPManager or RemoteSpacyNLPManager (inference server)."""
+
+    def __init__(self, nlp_manager=SpacyNLPManager, date_resolver: DateResolver = default_resolver):
+        self.nlp_manager = nlp_manager
+        self.date_resolver = date_resolver
+
+    def parse(self, text: str):
+        # ruler patterns (indicators, passengers, dates) + NER entities
+        return self.nlp_manager.parse(text, profile="entities")
+
+    def pipe(self, texts: List[str]):
+        return self.nlp_manager.pipe(texts, profile="entities")
+
+    def extract_flight_type(self, doc) -> Optional[str]:
+        """Extract flight type (oneway/round_trip)"""
+        for ent in doc.ents:
+            if ent.label_ == "FLIGHT_TYPE" and ent._.id:
+                logger.info("Found flight type: %s", ent._.id)
+
+                return ent._.id
+        return None
+
+
+    def extract_cities(self, doc) -> Tuple[Optional[object], Optional[object]]:
+        """Extract departure and arrival cities (spans of the doc)"""
+        departure_city = None
+        arrival_city = None
+        used_cities = set()
+
+        logger.debug("Processing text for city extraction: %s", doc.text)
+
+        # 1st look for explicit from/to indicators
+        found_indicators = []
+
+        for ent in doc.ents:
+            if ent.label_ == "LOCATION_INDICATOR" and ent._.id:
+                found_indicators.append((ent._.id, ent.start, ent.end))
+
+        logger.debug("Found indicators: %s", found_indicators)
+
+        # 2nd collect the candidate cities (up to 3 tokens) after each indicator, shortest first
+        indicator_candidates = []
+        for indicator_id, start, end in found_indicators:
+            next_idx = end
+            while next_idx < len(doc) and doc[next_idx].is_stop:
+                next_idx += 1
+
+            if next_idx >= len(doc):
+                continue
+
+            spans = [doc[next_idx:end_idx] for end_idx in range(next_idx + 1, min(next_idx + 4, len(doc)))]
+            indicator_candidates.append((indicator_id, spans))
+
+        # a candidate containing a GPE of the already parsed doc needs no further check,
+        # only the candidates before the first such span of each indicator are parsed on their own
+        gpe_ranges = [(ent.start, ent.end) for ent in doc.ents if ent.label_ == "GPE"]
+
+        def contains_doc_gpe(span) -> bool:
+            return any(span.start <= gpe_start and gpe_end <= span.end for gpe_start, gpe_end in gpe_ranges)
+
+        unresolved_texts = []
+        for _, spans in indicator_candidates:
+            for span in spans:
+                if contains_doc_gpe(span):
+                    break
+                unresolved_texts.append(span.text)
+
+        gpe_verdicts = self.nlp_manager.gpe_verdicts(unresolved_texts) if unresolved_texts else {}
+
+        # 3rd pick the first valid city after each indicator
+        for indicator_id, spans in indicator_candidates:
+            for span in spans:
+                potential_city = span.text
+
+                if contains_doc_gpe(span) or gpe_verdicts.get(potential_city):
+                    if indicator_id == "departure" and not departure_city:
+                        departure_city = span
+                        used_cities.add(potential_city)
+                        logger.info("Found departure city with indicator: %s", potential_city)
+                        break
+                    elif indicator_id == "arrival" and not arrival_city:
+                        arrival_city = span
+                        used_cities.add(potential_city)
+                        logger.info("Found arrival city with indicator: %s", potential_city)
+                        break
+
+        # if we're still missing cities, look for GPEs
+        if not (departure_city and arrival_city):
+            gpe_entities = [ent for ent in doc.ents if ent.label_ == "GPE"
+                        and ent.text not in used_cities]
+            logger.debug("Found unused GPE entities: %s", [ent.text for ent in gpe_entities])
+
+            # Use context to determine city roles
+            if gpe_entities:
+                # If we have 'to' or arrow, second GPE is arrival
+                if ("to" in doc.text.lower() or "->" in doc.text or "→" in doc.text) and len(gpe_entities) >= 2:
+                    if not departure_city:
+                        departure_city = gpe_entities[0]
+                    if not arrival_city:
+                        arrival_city = gpe_entities[1]
+                # If we only found one GPE
+                elif len(gpe_entities) == 1:
+                    if "to" in doc.text.lower() and not arrival_city:
+                        arrival_city = gpe_entities[0]
+                    elif "from" in doc.text.lower() and not departure_city:
+                        departure_city = gpe_entities[0]
+                    # If no indicator, default to arrival (most common case)
+                    elif not arrival_city:
+                        arrival_city = gpe_entities[0]
+
+        logger.info("Final cities - departure: %s, arrival: %s", departure_city, arrival_city)
+
+        return departure_city, arrival_city
+
+
+    @staticmethod
+    def _is_day_number(text: str) -> bool:
+        day = DAY_NUMBER_RE.match(text)
+        return bool(day) and 1 <= int(day.group(1)) <= 31
+
+    def date_candidates(self, doc) -> List[object]:
+        """Spans that may hold a date, in order: the DATE entities and, outside of them, tokens that
+        are a date on their own (ISO/slashed dates, ordinals, weekdays, today, tomorrow) or month names
+        next to a day number ("may 3rd", "3 may"; "I may fly" is no date)"""
+        candidates = [ent for ent in doc.ents if ent.label_ == "DATE"]
+        used = {i for ent in candidates for i in range(ent.start, ent.end)}
+        for token in doc:
+            if token.i in used or token.lower_ not in MONTH_WORDS:
+                continue
+            # the day number after ("may 3rd") or before ("3 may") the month
+            for day_i, start in ((token.i + 1, token.i), (token.i - 1, token.i - 1)):
+                if 0 <= day_i < len(doc) and day_i not in used and self._is_day_number(doc[day_i].text):
+                    candidates.append(doc[start:start + 2])
+                    used.update((start, start + 1))
+                    break
+
+        for token in doc:
+            text = token.lower_
+            if token.i not in used and (DATE_TOKEN_RE.match(text) or text in DAYS_MAP or text in ("today", "tomorrow")):
+                candidates.append(doc[token.i:token.i + 1])
+
+        return sorted(candidates, key=lambda span: span.start)
+
+    def extract_dates(self, doc) -> List[Tuple[str, object]]:
+        """Extract up to two (ISO date, span) pairs: departure and return date"""
+        candidates = self.date_candidates(doc)
+
+        # resolve every candidate of the doc in one pass (memoized for the day)
+        resolved_dates = self.date_resolver.resolve_many([span.text for span in candidates])
+        logger.debug("Found potential date expressions: %s", [span.text for span in candidates])
+
+        # keep the parsed dates in order found
+        parsed_dates = []
+        seen = set()
+        for span, parsed_date in zip(candidates, resolved_dates):
+            if parsed_date and parsed_date not in seen:
+                seen.add(parsed_date)
+                parsed_dates.append((parsed_date, span))
+
+        logger.debug("Successfully parsed dates: %s", [parsed_date for parsed_date, _ in parsed_dates])
+
+        # assign dates based on order
+        dates = parsed_dates[:2]
+        logger.info("Final dates - departure: %s, return: %s",
+                    dates[0][0] if dates else None, dates[1][0] if len(dates) > 1 else None)
+        return dates
+
+
+    def extract_passengers(self, doc) -> Optional[Tuple[str, object]]:
+        """Extract number of passengers and its token"""
+        for ent in doc.ents:
+            if ent.label_ == "PASSENGERS":
+                for token in ent:
+                    if token.like_num:
+                        try:
+                            num = int(token.text)
+                            if num > 0:
+                                logger.info("Found %s passengers", num)
+                                return str(num), doc[token.i:token.i + 1]
+                        except ValueError:
+                            pass
+        return None
+
+
+    def extract_spans(self, doc, date_entities_only: bool = False) -> Dict[str, Optional[Tuple[str, object]]]:
+        """(value, span) per flight slot, None for the slots not found in the doc;
+        with `date_entities_only` no dates unless all of them are DATE entities"""
+        self.extract_flight_type(doc)
+        departure_city, arrival_city = self.extract_cities(doc)
+        dates = self.extract_dates(doc)
+        if date_entities_only and any(span.label_ != "DATE" for _, span in dates):
+            # a date outside the DATE entities also leaves the departure/return order of the others open
+            dates = []
+
+        return {
+            "departure_city": (departure_city.text, departure_city) if departure_city else None,
+            "arrival_city": (arrival_city.text, arrival_city) if arrival_city else None,
+            "departure_date": dates[0] if dates else None,
+            "return_date": dates[1] if len(dates) > 1 else None,
+            "num_passengers": self.extract_passengers(doc),
+        }
+
+    def extract(self, text: str) -> Dict[str, Optional[str]]:
+        """Value per flight slot, None for the slots not found"""
+        return {slot: found[0] if found else None for slot, found in self.extract_spans(self.parse(text)).items()}
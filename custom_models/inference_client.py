@@ -0,0 +1,166 @@
+"""
+Thin clients of the inference server (custom_models/inference_server.py), drop-in replacements
+for FlanT5Classifier, CityAreaExtractor and SpacyNLPManager in the action server.
+
+INFERENCE_SERVER_URL is either http://host:port or unix:///path/to/socket.
+"""
+import base64
+import http.client
+import json
+import socket
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from custom_models.inference_scheduler import Overloaded
+from custom_models.spacy_nlp_md import SpacyNLPManager
+from mylogger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class InferenceError(RuntimeError):
+    pass
+
+
+class InferenceClient:
+    """JSON-over-HTTP client with one keep-alive connection per thread"""
+
+    def __init__(self, url: str, timeout: float = 60):
+        self.url = url
+        self.timeout = timeout
+        self._parsed = urlparse(url)
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._parsed.scheme == "unix":
+                connection = UnixHTTPConnection(self._parsed.path, self.timeout)
+            else:
+                connection = http.client.HTTPConnection(self._parsed.hostname, self._parsed.port or 80,
+                                                        timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def post(self, path: str, payload: Dict) -> Dict:
+        body = json.dumps(payload)
+        headers = {"Content-Type": "application/json"}
+
+        with metrics.timed("upstream_request_seconds", service="inference", endpoint=path):
+            for attempt in range(2):
+                connection = self._connection()
+                try:
+                    connection.request("POST", path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.HTTPException, ConnectionError, OSError):
+                    # stale keep-alive connection (e.g. the server restarted), reconnect once
+                    connection.close()
+                    self._local.connection = None
+                    if attempt:
+                        raise
+
+        result = json.loads(data)
+        if response.status == 503 and "reason" in result:
+            # shed by the server's admission control, callers degrade as for a local model
+            raise Overloaded(result.get("model", "inference"), result["reason"])
+        if response.status != 200:
+            raise InferenceError(f"{path} returned {response.status}: {result.get('error')}")
+        return result
+
+
+class RemoteFlanT5Classifier:
+    """FlanT5Classifier interface backed by the inference server"""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    @staticmethod
+    def create_prompt(sentence: str) -> str:
+        from custom_models.flant5_classifier import FlanT5Classifier
+        return FlanT5Classifier.create_prompt(sentence)
+
+    def classify_batch(self, prompts: List[str]) -> List[Tuple[str, float]]:
+        return [tuple(result) for result in self.client.post("/v1/classify", {"prompts": prompts})["results"]]
+
+    def classify(self, prompt: str) -> Tuple[str, float]:
+        return self.classify_batch([prompt])[0]
+
+
+class RemoteCityAreaExtractor:
+    """CityAreaExtractor interface backed by the inference server"""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def extract_cities(self, sentences: List[str], use_gazetteer: bool = True) -> List[List[Dict]]:
+        payload = {"sentences": sentences, "use_gazetteer": use_gazetteer}
+        return self.client.post("/v1/extract_cities", payload)["results"]
+
+    def extract_city(self, sentence: str, use_gazetteer: bool = True) -> Optional[str]:
+        cities = self.extract_cities([sentence], use_gazetteer=use_gazetteer)[0]
+        return cities[0]["city"] if cities else None
+
+
+class RemoteSpacyNLPManager(SpacyNLPManager):
+    """SpacyNLPManager whose parse/pipe run on the inference server.
+
+    Docs come back as a DocBin and are rebuilt on a blank English vocab, which is enough
+    for the entities (with their ids), tokens and lexical attributes the actions read."""
+
+    client: Optional[InferenceClient] = None
+    _vocab = None
+
+    @classmethod
+    def configure(cls, client: InferenceClient) -> None:
+        cls.client = client
+
+    @classmethod
+    def vocab(cls):
+        if cls._vocab is None:
+            import spacy
+            # registers the Token/Span "id" extensions restored from the DocBin user data
+            import custom_models.spacy_entity_patterns  # noqa: F401
+            cls._vocab = spacy.blank("en").vocab
+        return cls._vocab
+
+    @classmethod
+    def get_nlp(cls):
+        raise RuntimeError("The spaCy pipeline runs on the inference server, use parse()/pipe()")
+
+    @classmethod
+    def disabled_components(cls, profile: str) -> List[str]:
+        raise RuntimeError("Profiles are resolved by the inference server")
+
+    @classmethod
+    def _remote_docs(cls, texts: List[str], profile: str) -> List:
+        from spacy.tokens import DocBin
+
+        if profile not in cls.PROFILES:
+            raise ValueError(f"Unknown spaCy profile '{profile}', expected one of {list(cls.PROFILES)}")
+
+        result = cls.client.post("/v1/spacy", {"texts": texts, "profile": profile})
+        doc_bin = DocBin(store_user_data=True).from_bytes(base64.b64decode(result["docbin"]))
+        return list(doc_bin.get_docs(cls.vocab()))
+
+    @classmethod
+    def parse(cls, text: str, profile: str = "full"):
+        return cls._remote_docs([text], profile)[0]
+
+    @classmethod
+    def pipe(cls, texts: Iterable[str], profile: str = "full", **kwargs) -> Iterator:
+        return iter(cls._remote_docs(list(texts), profile))
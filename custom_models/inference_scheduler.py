@@ -0,0 +1,236 @@
+"""
+CPU scheduling of the torch models (FlanT5, BERT city NER) inside one process.
+
+Left alone, torch runs every forward pass on all cores, so the models serving concurrent
+users oversubscribe the CPU and the tail latency explodes. The scheduler
+  - sets the intra-op / inter-op thread counts of torch once per process,
+  - lets at most N forward passes of each model run at the same time (the others wait for a slot),
+  - optionally pins the process, or each pre-fork worker, to a set of cores,
+  - records the time spent waiting for a slot (inference_queue_seconds) separately from
+    the forward pass itself (inference_compute_seconds),
+  - optionally sheds load: a request raises Overloaded instead of waiting when too many are
+    already queued or no slot frees up within the max queue delay (inference_shed_total).
+
+    with get_scheduler("flan_t5").slot():
+        outputs = model.generate(...)
+
+Configuration (environment):
+    INFERENCE_CONCURRENCY       forward passes of a model at the same time (default 1)
+    FLAN_T5_CONCURRENCY, CITY_NER_CONCURRENCY   per model override
+    INFERENCE_MAX_QUEUE         requests allowed to wait for a slot, per model (default 0: unbounded)
+    INFERENCE_MAX_QUEUE_DELAY_MS  longest wait for a slot before shedding (default 0: no limit)
+    FLAN_T5_MAX_QUEUE, FLAN_T5_MAX_QUEUE_DELAY_MS, CITY_NER_...   per model overrides
+    TORCH_INTRA_OP_THREADS      threads per forward pass (default: available cores / total concurrency
+                                of the models this process runs, further divided between the pre-fork
+                                workers sharing those cores)
+    INFERENCE_MODELS            models this process runs, such as "city_ner" (default: the models that
+                                got a scheduler so far; the thread count shrinks as more of them load)
+    TORCH_INTER_OP_THREADS      default 1
+    INFERENCE_CPU_SETS          core sets such as "0-3;4-7": the process is pinned to the first
+                                one, pre-fork worker i to set i % number of sets
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from mylogger import get_logger
+from utils.metrics import metrics
+from utils.tracing import span
+
+logger = get_logger(__name__)
+
+def parse_cpu_sets(value: str) -> List[Set[int]]:
+    """"0-3;4-7,9" -> [{0, 1, 2, 3}, {4, 5, 6, 7, 9}]"""
+    cpu_sets = []
+    for group in value.split(";"):
+        cpus = set()
+        for part in group.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                first, last = part.split("-", 1)
+                cpus.update(range(int(first), int(last) + 1))
+            else:
+                cpus.add(int(part))
+        if cpus:
+            cpu_sets.append(cpus)
+    return cpu_sets
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:   # not on Linux
+        return os.cpu_count() or 1
+
+
+def _model_setting(model_key: str, name: str, default: str) -> str:
+    return os.getenv(f"{model_key.upper()}_{name}", os.getenv(f"INFERENCE_{name}", default))
+
+
+def model_concurrency(model_key: str) -> int:
+    return max(1, int(_model_setting(model_key, "CONCURRENCY", "1")))
+
+
+def admission_limits(model_key: str) -> Tuple[int, float]:
+    """(max queued requests, max queue delay in seconds) of `model_key`, 0 meaning no limit"""
+    max_queue = max(0, int(_model_setting(model_key, "MAX_QUEUE", "0")))
+    max_queue_delay = max(0.0, float(_model_setting(model_key, "MAX_QUEUE_DELAY_MS", "0")) / 1000)
+    return max_queue, max_queue_delay
+
+
+class Overloaded(RuntimeError):
+    """A heavy model shed the request instead of queueing it (reason: "queue_full" or "queue_delay")."""
+
+    def __init__(self, model_key: str, reason: str):
+        super().__init__(f"{model_key} overloaded ({reason})")
+        self.model_key = model_key
+        self.reason = reason
+
+
+def pin_to_cpu_set(index: int = 0) -> Optional[Set[int]]:
+    """Pin the calling thread, and so every thread it starts afterwards, to core set `index` of INFERENCE_CPU_SETS"""
+    cpu_sets = parse_cpu_sets(os.getenv("INFERENCE_CPU_SETS", ""))
+    if not cpu_sets or not hasattr(os, "sched_setaffinity"):
+        return None
+
+    cpus = cpu_sets[index % len(cpu_sets)]
+    os.sched_setaffinity(0, cpus)
+    logger.info("Pinned process %s to cores %s", os.getpid(), sorted(cpus))
+    return cpus
+
+
+_configured = False
+_configure_lock = threading.Lock()
+# core set of this process and the number of processes sharing its cores (set in pre-fork workers)
+_cpu_set_index = 0
+_processes = 1
+
+
+def scheduled_models() -> List[str]:
+    """INFERENCE_MODELS, or the models with a scheduler in this process so far"""
+    models = [model_key.strip() for model_key in os.getenv("INFERENCE_MODELS", "").split(",") if model_key.strip()]
+    return models or list(_schedulers)
+
+
+def intra_op_threads() -> int:
+    """TORCH_INTRA_OP_THREADS, or the available cores split between the concurrent forward passes
+    of the models of this process, and of every process sharing the cores"""
+    total_concurrency = sum(model_concurrency(model_key) for model_key in scheduled_models()) or 1
+    return int(os.getenv("TORCH_INTRA_OP_THREADS", "0")) or max(1, available_cpus() // (total_concurrency * _processes))
+
+
+def configure_threads() -> None:
+    """Pin the process and set the torch thread counts before the models load; later calls
+    only update the intra-op threads to the models scheduled by then"""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            import torch
+            threads = intra_op_threads()
+            if torch.get_num_threads() != threads:
+                torch.set_num_threads(threads)
+                logger.info("Torch intra-op threads: %s for models %s", threads, scheduled_models())
+            return
+        _configured = True
+
+        import torch
+
+        pin_to_cpu_set(_cpu_set_index)
+        inter_op_threads = int(os.getenv("TORCH_INTER_OP_THREADS", "1"))
+
+        torch.set_num_threads(intra_op_threads())
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            # only allowed before the first inter-op parallel work of the process
+            logger.warning("Torch inter-op threads already started, keeping %s", torch.get_num_interop_threads())
+        logger.info("Torch threads: %s intra-op, %s inter-op (%s cores, %s processes, models %s)",
+                    torch.get_num_threads(), torch.get_num_interop_threads(), available_cpus(), _processes,
+                    scheduled_models())
+
+
+def configure_worker(index: int, num_workers: int) -> None:
+    """In pre-fork worker `index` of `num_workers`: pin it to its core set and give its forward passes
+    their share of the cores it shares with the other workers (all of them without INFERENCE_CPU_SETS)"""
+    global _cpu_set_index, _processes
+    _cpu_set_index = index
+    cpu_sets = len(parse_cpu_sets(os.getenv("INFERENCE_CPU_SETS", "")))
+    pinned = pin_to_cpu_set(index)
+    _processes = len(range(index % cpu_sets, num_workers, cpu_sets)) if pinned else num_workers
+
+    with _configure_lock:
+        if not _configured:
+            # the models load later in this worker, configure_threads uses the worker's share then
+            return
+        # the parent's thread count was for the whole machine (inter-op threads can't change any more)
+        import torch
+        torch.set_num_threads(intra_op_threads())
+        logger.info("Worker %s: %s torch intra-op threads (%s cores shared by %s workers)",
+                    index, torch.get_num_threads(), available_cpus(), _processes)
+
+
+class InferenceScheduler:
+    """Lets at most `concurrency` forward passes of one model run at the same time.
+
+    With `max_queue` / `max_queue_delay` (seconds) set, requests beyond them raise Overloaded."""
+
+    def __init__(self, model_key: str, concurrency: int = 1, max_queue: int = 0, max_queue_delay: float = 0):
+        self.model_key = model_key
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_queue_delay = max_queue_delay
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def _shed(self, reason: str) -> Overloaded:
+        metrics.inc("inference_shed_total", model=self.model_key, reason=reason)
+        logger.warning("Shedding %s request: %s (%s waiting)", self.model_key, reason, self._waiting)
+        return Overloaded(self.model_key, reason)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._waiting_lock:
+            if self.max_queue and self._waiting >= self.max_queue:
+                raise self._shed("queue_full")
+            self._waiting += 1
+
+        queued_at = time.perf_counter()
+        try:
+            with span(f"{self.model_key}.queue"):
+                acquired = self._slots.acquire(timeout=self.max_queue_delay or None)
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+        if not acquired:
+            raise self._shed("queue_delay")
+
+        started_at = time.perf_counter()
+        metrics.observe("inference_queue_seconds", started_at - queued_at, model=self.model_key)
+        try:
+            yield
+        finally:
+            self._slots.release()
+            metrics.observe("inference_compute_seconds", time.perf_counter() - started_at, model=self.model_key)
+
+
+_schedulers: Dict[str, InferenceScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model_key: str) -> InferenceScheduler:
+    """The process-wide scheduler of `model_key` (a new one also (re)configures the torch threads)"""
+    scheduler = _schedulers.get(model_key)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(model_key)
+            if scheduler is None:
+                max_queue, max_queue_delay = admission_limits(model_key)
+                scheduler = InferenceScheduler(model_key, model_concurrency(model_key), max_queue, max_queue_delay)
+                _schedulers[model_key] = scheduler
+        configure_threads()
+    return scheduler
@@ -0,0 +1,282 @@
+"""
+Standalone model-inference service shared by all action-server workers (and by the
+OutOfScopeValidator NLU component of the Rasa server).
+
+Loads FlanT5, the BERT city NER and the spaCy pipeline once (see model_registry) and
+serves them over HTTP on a TCP port or a local Unix socket. Requests arriving at the
+same time from different workers are micro-batched per model. With --max-queue or
+--max-queue-delay-ms (default: the INFERENCE_MAX_QUEUE* settings, see inference_scheduler)
+requests beyond them are shed with 503 {"error", "model", "reason"} instead of waiting.
+
+    POST /v1/classify        {"prompts": [...]}                        -> {"results": [[label, confidence], ...]}
+    POST /v1/extract_cities  {"sentences": [...], "use_gazetteer": true} -> {"results": [[{city, text, ...}], ...]}
+    POST /v1/spacy           {"texts": [...], "profile": "entities"}   -> {"docbin": base64 DocBin with user data}
+    GET  /health                                                       -> {"models": [...]}
+
+Start it (from the project root), then point the action server at it with INFERENCE_SERVER_URL:
+    python -m custom_models.inference_server --port 8765
+    python -m custom_models.inference_server --socket /tmp/destinaitor-inference.sock
+    INFERENCE_SERVER_URL=unix:///tmp/destinaitor-inference.sock rasa run actions
+"""
+import argparse
+import base64
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List
+
+from custom_models.inference_scheduler import Overloaded, admission_limits
+from custom_models.model_registry import ModelRegistry
+from mylogger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+SERVED_MODELS = ["flan_t5", "city_ner", "spacy"]
+
+
+class MicroBatcher:
+    """Collects the items submitted by concurrent requests and runs them through `batch_fn` together.
+
+    A batch is closed when it reaches `max_batch_size` items or `max_wait_ms` after its first item.
+    Items are shed (Overloaded) when `max_queue` are already waiting, or when they waited longer
+    than `max_queue_delay_ms` by the time their batch is formed (0: no limit)."""
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 16, max_wait_ms: float = 5,
+                 max_queue: int = 0, max_queue_delay_ms: float = 0):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.max_queue_delay = max_queue_delay_ms / 1000
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True).start()
+
+    def submit(self, items: List[Any]) -> List[Any]:
+        """Results for `items`, in order (blocks until their batches ran)"""
+        if self.max_queue and self._queue.qsize() + len(items) > self.max_queue:
+            raise self._shed("queue_full", len(items))
+
+        futures = []
+        enqueued_at = time.monotonic()
+        for item in items:
+            future = Future()
+            self._queue.put((item, future, enqueued_at))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _shed(self, reason: str, count: int) -> Overloaded:
+        metrics.inc("inference_shed_total", count, model=self.name, reason=reason)
+        return Overloaded(self.name, reason)
+
+    def _admitted(self, entry: tuple) -> bool:
+        _, future, enqueued_at = entry
+        if self.max_queue_delay and time.monotonic() - enqueued_at > self.max_queue_delay:
+            future.set_exception(self._shed("queue_delay", 1))
+            return False
+        return True
+
+    def _loop(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if not self._admitted(entry):
+                continue
+            batch = [entry]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if self._admitted(entry):
+                    batch.append(entry)
+
+            metrics.observe("inference_batch_size", len(batch), model=self.name)
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error("Batch of %s failed: %s", self.name, e)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+
+def _grouped(items: List[tuple], run_group: Callable[[Any, List[Any]], List[Any]]) -> List[Any]:
+    """Run (key, value) items grouped by key, results in the original order"""
+    groups: Dict[Any, List[int]] = {}
+    for index, (key, _) in enumerate(items):
+        groups.setdefault(key, []).append(index)
+
+    results = [None] * len(items)
+    for key, indices in groups.items():
+        for index, result in zip(indices, run_group(key, [items[i][1] for i in indices])):
+            results[index] = result
+    return results
+
+
+def create_batchers(model_names: List[str], max_batch_size: int, max_wait_ms: float,
+                    max_queue: int = None, max_queue_delay_ms: float = None) -> Dict[str, MicroBatcher]:
+    def limits(model_key: str) -> Dict[str, float]:
+        default_max_queue, default_max_queue_delay = admission_limits(model_key)
+        return {
+            "max_queue": default_max_queue if max_queue is None else max_queue,
+            "max_queue_delay_ms": default_max_queue_delay * 1000 if max_queue_delay_ms is None else max_queue_delay_ms,
+        }
+
+    batchers = {}
+
+    if "flan_t5" in model_names:
+        classifier = ModelRegistry.get("flan_t5")
+        batchers["flan_t5"] = MicroBatcher("flan_t5", classifier.classify_batch, max_batch_size, max_wait_ms,
+                                           **limits("flan_t5"))
+
+    if "city_ner" in model_names:
+        extractor = ModelRegistry.get("city_ner")
+        batchers["city_ner"] = MicroBatcher(
+            "city_ner",
+            lambda items: _grouped(items, lambda use_gazetteer, sentences:
+                                   extractor.extract_cities(sentences, use_gazetteer=use_gazetteer)),
+            max_batch_size, max_wait_ms, **limits("city_ner"),
+        )
+
+    if "spacy" in model_names:
+        from custom_models.spacy_nlp_md import SpacyNLPManager
+        ModelRegistry.get("spacy")
+        batchers["spacy"] = MicroBatcher(
+            "spacy",
+            lambda items: _grouped(items, lambda profile, texts: list(SpacyNLPManager.pipe(texts, profile=profile))),
+            max_batch_size, max_wait_ms, **limits("spacy"),
+        )
+
+    return batchers
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, the clients reuse their connection
+    batchers: Dict[str, MicroBatcher] = {}
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _batcher(self, name: str) -> MicroBatcher:
+        if name not in self.batchers:
+            raise LookupError(f"model '{name}' is not served by this inference server")
+        return self.batchers[name]
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"models": list(self.batchers)})
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            with metrics.timed("inference_request_seconds", endpoint=self.path):
+                if self.path == "/v1/classify":
+                    results = self._batcher("flan_t5").submit(request["prompts"])
+                    payload = {"results": [list(result) for result in results]}
+
+                elif self.path == "/v1/extract_cities":
+                    use_gazetteer = bool(request.get("use_gazetteer", True))
+                    results = self._batcher("city_ner").submit(
+                        [(use_gazetteer, sentence) for sentence in request["sentences"]])
+                    payload = {"results": results}
+
+                elif self.path == "/v1/spacy":
+                    from spacy.tokens import DocBin
+                    profile = request.get("profile", "full")
+                    docs = self._batcher("spacy").submit([(profile, text) for text in request["texts"]])
+                    doc_bin = DocBin(docs=docs, store_user_data=True)
+                    payload = {"docbin": base64.b64encode(doc_bin.to_bytes()).decode("ascii")}
+
+                else:
+                    self._send_json(404, {"error": f"unknown path {self.path}"})
+                    return
+
+        except Overloaded as e:
+            self._send_json(503, {"error": str(e), "model": e.model_key, "reason": e.reason})
+            return
+        except (KeyError, ValueError, LookupError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.error("Inference request %s failed: %s", self.path, e)
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self._send_json(200, payload)
+
+    def address_string(self):
+        # unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(model_names: List[str], host: str = "127.0.0.1", port: int = 8765, socket_path: str = None,
+          max_batch_size: int = 16, max_wait_ms: float = 5,
+          max_queue: int = None, max_queue_delay_ms: float = None):
+    InferenceRequestHandler.batchers = create_batchers(model_names, max_batch_size, max_wait_ms,
+                                                       max_queue, max_queue_delay_ms)
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, InferenceRequestHandler)
+        logger.info("Inference server listening on unix://%s (models: %s)", socket_path, model_names)
+    else:
+        server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+        logger.info("Inference server listening on http://%s:%s (models: %s)", host, port, model_names)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--socket", help="serve on this Unix socket instead of TCP")
+    arg_parser.add_argument("--models", nargs="+", default=SERVED_MODELS, choices=SERVED_MODELS)
+    arg_parser.add_argument("--max-batch-size", type=int, default=16)
+    arg_parser.add_argument("--max-wait-ms", type=float, default=5, help="how long a batch waits for more requests")
+    arg_parser.add_argument("--max-queue", type=int, default=None, help="items waiting per model before shedding")
+    arg_parser.add_argument("--max-queue-delay-ms", type=float, default=None,
+                            help="longest an item may wait for its batch before it is shed")
+    args = arg_parser.parse_args()
+
+    serve(args.models, host=args.host, port=args.port, socket_path=args.socket,
+          max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+          max_queue=args.max_queue, max_queue_delay_ms=args.max_queue_delay_ms)
+
+
+if __name__ == "__main__":
+    main()
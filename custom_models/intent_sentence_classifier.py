@@ -1,6 +1,11 @@
+import threading
+from typing import Dict, List, Tuple
+
 import torch
 from sentence_transformers import SentenceTransformer, util
 
+from utils.metrics import metrics
+
 class IntentClassifier:
     def __init__(self, categories, model_name='sentence-transformers/all-MiniLM-L6-v2'):
         """
@@ -21,9 +26,10 @@ class IntentClassifier:
         # create category map dynamically
         self.category_map = {i: category for i, category in enumerate(self.categories)}
         self.category_embeddings = None
-        
-        # pre-compute category embeddings
-        self._compute_category_embeddings()
+
+        # category embeddings are computed on first use, so loading runs no forward pass
+        # (e.g. in the pre-fork parent, before the workers start their own thread pools)
+        self._embeddings_lock = threading.Lock()
         
     def _compute_category_embeddings(self):
         """Pre-compute the embeddings for all categories"""
@@ -32,18 +38,28 @@ class IntentClassifier:
             convert_to_tensor=True, 
             device=self.device
         )
+
+    def similarities(self, text):
+        """Return the cosine similarity of the text to every category (same order as categories)"""
+        if self.category_embeddings is None:
+            with self._embeddings_lock:
+                if self.category_embeddings is None:
+                    self._compute_category_embeddings()
+
+        with metrics.timed("model_inference_seconds", model="sentence_transformer", op="similarities"):
+            # encode the input text
+            text_embedding = self.model.encode(
+                text, 
+                convert_to_tensor=True, 
+                device=self.device
+            )
+            
+            # compute similarity scores
+            return util.cos_sim(text_embedding, self.category_embeddings).squeeze(0)
     
     def classify(self, text):
         """Classify the text into one of the predefined categories"""
-        # encode the input text
-        text_embedding = self.model.encode(
-            text, 
-            convert_to_tensor=True, 
-            device=self.device
-        )
-        
-        # compute similarity scores
-        similarities = util.cos_sim(text_embedding, self.category_embeddings).squeeze()
+        similarities = self.similarities(text)
         
         # get the top category
         top_idx = similarities.argmax().item()
@@ -52,4 +68,40 @@ class IntentClassifier:
             "category_id": top_idx,
             "category": self.categories[top_idx],
             "confidence": round(similarities[top_idx].item(), 4)
-        }
\ No newline at end of file
+        }
+
+
+class PrototypeClassifier:
+    def __init__(self, prototypes: Dict[str, List[str]], model_name='sentence-transformers/all-MiniLM-L6-v2'):
+        """
+        Classify texts by their most similar prototype description.
+
+        Args:
+            prototypes (dict): label -> short descriptions, every description becomes one prototype embedding
+            model_name (str): Name of the sentence transformer model used by the IntentClassifier
+        """
+        self.prototype_labels = []
+        descriptions = []
+        for label, label_descriptions in prototypes.items():
+            for description in label_descriptions:
+                self.prototype_labels.append(label)
+                descriptions.append(description)
+
+        self.classifier = IntentClassifier(descriptions, model_name=model_name)
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """
+        Returns the label and its confidence, i.e. the cosine similarity margin between
+        the best prototype of the winning label and the best prototype of the runner-up.
+        """
+        similarities = self.classifier.similarities(text).tolist()
+
+        best_per_label = {}
+        for label, similarity in zip(self.prototype_labels, similarities):
+            best_per_label[label] = max(similarity, best_per_label.get(label, -1.0))
+
+        ranked = sorted(best_per_label.items(), key=lambda item: item[1], reverse=True)
+        label, best_score = ranked[0]
+        runner_up_score = ranked[1][1] if len(ranked) > 1 else -1.0
+
+        return label, round(best_score - runner_up_score, 4)
@@ -0,0 +1,46 @@
+import os
+from typing import Any, Dict, Optional
+
+import torch
+
+# from_pretrained options of the transformers models, from the environment:
+#   MODEL_DTYPE                  float32 (default), bfloat16 or float16, for every model
+#   FLAN_T5_DTYPE, CITY_NER_DTYPE  per model override of MODEL_DTYPE
+#   MODEL_LOW_CPU_MEM_USAGE      true (default): load the weights straight into the model,
+#                                without a randomly initialized copy first
+#   MODEL_USE_SAFETENSORS        auto (default, safetensors when the checkpoint has them),
+#                                true (required) or false; safetensors files are memory-mapped
+DTYPES = {
+    "float32": torch.float32,
+    "bfloat16": torch.bfloat16,
+    "float16": torch.float16,
+}
+
+SAFETENSORS_CHOICES = {"auto": None, "true": True, "false": False}
+
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(name, default).strip().lower()
+
+
+def pretrained_kwargs(model_key: str,
+                      dtype: Optional[str] = None,
+                      low_cpu_mem_usage: Optional[bool] = None,
+                      use_safetensors: Optional[str] = None) -> Dict[str, Any]:
+    """Keyword arguments for from_pretrained of `model_key` ("flan_t5", "city_ner"),
+    explicit arguments win over the environment."""
+    dtype = (dtype or _env(f"{model_key.upper()}_DTYPE", _env("MODEL_DTYPE", "float32"))).lower()
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype}', expected one of {list(DTYPES)}")
+
+    if low_cpu_mem_usage is None:
+        low_cpu_mem_usage = _env("MODEL_LOW_CPU_MEM_USAGE", "true") == "true"
+
+    use_safetensors = (use_safetensors or _env("MODEL_USE_SAFETENSORS", "auto")).lower()
+    if use_safetensors not in SAFETENSORS_CHOICES:
+        raise ValueError(f"Unknown use_safetensors '{use_safetensors}', expected one of {list(SAFETENSORS_CHOICES)}")
+
+    kwargs = {"torch_dtype": DTYPES[dtype], "low_cpu_mem_usage": low_cpu_mem_usage}
+    if SAFETENSORS_CHOICES[use_safetensors] is not None:
+        kwargs["use_safetensors"] = SAFETENSORS_CHOICES[use_safetensors]
+    return kwargs
@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from mylogger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _load_flan_t5():
+    from custom_models.flant5_classifier import FlanT5Classifier
+    return FlanT5Classifier()
+
+
+def _load_city_gazetteer():
+    from custom_models.city_gazetteer import CityGazetteer
+    return CityGazetteer()
+
+
+def _load_city_ner():
+    from custom_models.city_area_extractor_ner import CityAreaExtractor
+    return CityAreaExtractor(gazetteer=ModelRegistry.get("city_gazetteer"))
+
+
+def _load_food_classifier():
+    from custom_models.prototype_classifiers import prototype_classifier
+    return prototype_classifier("food_or_not")
+
+
+def _load_scope_classifier():
+    from custom_models.prototype_classifiers import prototype_classifier
+    return prototype_classifier("scope")
+
+
+def _load_spacy():
+    from custom_models.spacy_nlp_md import SpacyNLPManager
+    return SpacyNLPManager.get_nlp()
+
+
+# every heavy model the action server uses, by name (imports are deferred so that
+# processes which only talk to the inference server never import torch/transformers)
+MODEL_LOADERS: Dict[str, Callable[[], Any]] = {
+    "flan_t5": _load_flan_t5,
+    "city_gazetteer": _load_city_gazetteer,
+    "city_ner": _load_city_ner,
+    "food_classifier": _load_food_classifier,
+    "scope_classifier": _load_scope_classifier,
+    "spacy": _load_spacy,
+}
+
+
+class ModelRegistry:
+    """Loads each model once per process, on first use or all at once with `load`."""
+
+    _models: Dict[str, Any] = {}
+    _lock = threading.RLock()   # loaders may get() the models they depend on
+
+    @classmethod
+    def get(cls, name: str):
+        if name not in MODEL_LOADERS:
+            raise ValueError(f"Unknown model '{name}', expected one of {list(MODEL_LOADERS)}")
+
+        model = cls._models.get(name)
+        if model is None:
+            with cls._lock:
+                model = cls._models.get(name)
+                if model is None:
+                    start_time = time.time()
+                    model = MODEL_LOADERS[name]()
+                    cls._models[name] = model
+                    logger.info("Model %s loaded in %.2f seconds", name, time.time() - start_time)
+        return model
+
+    @classmethod
+    def load(cls, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Load the given models (all registered ones by default) and return their names"""
+        names = list(names or MODEL_LOADERS)
+        for name in names:
+            cls.get(name)
+        return names
+
+    @classmethod
+    def loaded(cls) -> List[str]:
+        return list(cls._models)
@@ -0,0 +1,67 @@
+"""
+Local sentence-embedding classifiers: one PrototypeClassifier per set of labelled prototype
+descriptions, every description becomes one prototype embedding.
+
+    food_or_not   restaurants / attractions, the labels of the OpenAI food detection prompt
+                  (explore actions, FOOD_CLASSIFIER_BACKEND=local)
+    scope         the FlanT5 intent validation labels, out_of_scope included: cheap stand-in
+                  for FlanT5 while it sheds load (OutOfScopeValidator backend/fallback "embedding")
+"""
+from typing import Dict, List
+
+from custom_models.intent_sentence_classifier import PrototypeClassifier
+
+FOOD_OR_NOT_PROTOTYPES: Dict[str, List[str]] = {
+    "restaurants": [
+        "where to eat good food in the city",
+        "recommend a restaurant, taverna, bistro or trattoria",
+        "best place for sushi, pizza, pasta, burgers, seafood or steak",
+        "local cuisine, traditional dishes and street food",
+        "cafes, bakeries, desserts, brunch and breakfast spots",
+        "bars, wine bars and places for dinner or lunch",
+    ],
+    "attractions": [
+        "museums, art galleries and exhibitions to visit",
+        "sightseeing, monuments, landmarks and historical sites",
+        "tourist attractions and must-see places in the city",
+        "city tours, day trips, excursions and outdoor activities",
+        "parks, beaches, viewpoints and nature spots",
+        "shows, theaters, nightlife and things to do",
+    ],
+}
+
+SCOPE_PROTOTYPES: Dict[str, List[str]] = {
+    "find_compare_flights": [
+        "book a flight to a city",
+        "compare flights, one-way or round trip tickets",
+        "cheap flights from one city to another next week",
+    ],
+    "suggest_hotels": [
+        "find or book a hotel in a city",
+        "where can I stay, accommodation recommendations",
+        "hotel near a landmark or an area of the city",
+    ],
+    "explore_activities_places": [
+        "museums, attractions and sightseeing in a city",
+        "recommend a restaurant or a place to eat",
+        "things to do and places to visit nearby",
+    ],
+    "out_of_scope": [
+        "what's the weather like tomorrow",
+        "watch a movie or a tv show tonight",
+        "general knowledge, math, sports scores or the news",
+        "tell me a joke or chat about something unrelated to travel",
+    ],
+}
+
+PROTOTYPES: Dict[str, Dict[str, List[str]]] = {
+    "food_or_not": FOOD_OR_NOT_PROTOTYPES,
+    "scope": SCOPE_PROTOTYPES,
+}
+
+
+def prototype_classifier(name: str, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2') -> PrototypeClassifier:
+    """The classifier of the prototype set `name` ("food_or_not" or "scope")"""
+    if name not in PROTOTYPES:
+        raise ValueError(f"Unknown prototype set '{name}', expected one of {list(PROTOTYPES)}")
+    return PrototypeClassifier(PROTOTYPES[name], model_name=model_name)
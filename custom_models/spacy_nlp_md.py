@@ -1,6 +1,10 @@
-import spacy
-from custom_models.spacy_entity_patterns import setup_entity_patterns
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List
+
+from custom_models.spacy_pipeline_artifact import create_pipeline, load_pipeline_artifact
 from mylogger import get_logger
+from utils.metrics import metrics
 
 logger = get_logger(__name__)
 
@@ -8,22 +12,91 @@ class SpacyNLPManager:
     _instance = None
     _nlp = None
 
+    # named pipeline profiles: the components each one runs (None = every enabled component)
+    PROFILES = {
+        "full": None,
+        "entities": ["entity_ruler", "set_entity_ids", "ner"],
+        "ner_only": ["ner"],
+        "ruler_only": ["entity_ruler", "set_entity_ids"],
+    }
+    _profile_disabled = {}
+
+    # memoized "is this span text a GPE on its own" verdicts (LRU)
+    GPE_CACHE_SIZE = 4096
+    _gpe_verdicts = OrderedDict()
+    _gpe_lock = threading.Lock()
+
     @classmethod
     def get_nlp(cls):
         if cls._nlp is None:
             try:
                 logger.info("Initializing spaCy model...")
-                cls._nlp = spacy.load("en_core_web_md")
-                setup_entity_patterns(cls._nlp)
-                logger.info("SpaCy model initialized with custom entity patterns")
+                # prebuilt artifact when available and up to date, otherwise customize in-process
+                cls._nlp = load_pipeline_artifact()
+                if cls._nlp is None:
+                    cls._nlp = create_pipeline()
+                logger.info("SpaCy model initialized with custom entity patterns: %s", cls._nlp.pipe_names)
             except Exception as e:
-                logger.error(f"Error initializing spaCy model: {str(e)}")
+                logger.error("Error initializing spaCy model: %s", str(e))
                 raise
         return cls._nlp
 
-# create a single instance to be imported
-try:
-    nlp = SpacyNLPManager.get_nlp()
-except Exception as e:
-    logger.error(f"Failed to initialize NLP: {str(e)}")
-    raise
\ No newline at end of file
+    @classmethod
+    def disabled_components(cls, profile: str) -> List[str]:
+        """Names of the enabled components a profile skips"""
+        if profile not in cls.PROFILES:
+            raise ValueError(f"Unknown spaCy profile '{profile}', expected one of {list(cls.PROFILES)}")
+
+        if profile not in cls._profile_disabled:
+            enabled = cls.PROFILES[profile]
+            pipe_names = cls.get_nlp().pipe_names
+            cls._profile_disabled[profile] = [] if enabled is None else [
+                name for name in pipe_names if name not in enabled
+            ]
+        return cls._profile_disabled[profile]
+
+    @classmethod
+    def parse(cls, text: str, profile: str = "full"):
+        """Run the pipeline on one text with only the components of the profile"""
+        with metrics.timed("model_inference_seconds", model="spacy", op=profile):
+            return cls.get_nlp()(text, disable=cls.disabled_components(profile))
+
+    @classmethod
+    def pipe(cls, texts: Iterable[str], profile: str = "full", **kwargs) -> Iterator:
+        """Run the pipeline on many texts with only the components of the profile"""
+        return cls.get_nlp().pipe(texts, disable=cls.disabled_components(profile), **kwargs)
+
+    @classmethod
+    def gpe_verdicts(cls, texts: Iterable[str]) -> Dict[str, bool]:
+        """Check whether each text contains a GPE entity when parsed on its own.
+
+        Verdicts are memoized per text; unseen texts are parsed together in one
+        nlp.pipe batch with only the NER component enabled."""
+        verdicts = {}
+        pending = []
+
+        with cls._gpe_lock:
+            for text in texts:
+                if text in verdicts or text in pending:
+                    continue
+                if text in cls._gpe_verdicts:
+                    cls._gpe_verdicts.move_to_end(text)
+                    verdicts[text] = cls._gpe_verdicts[text]
+                else:
+                    pending.append(text)
+
+        metrics.inc("cache_requests_total", len(verdicts), cache="gpe_verdicts", result="hit")
+        metrics.inc("cache_requests_total", len(pending), cache="gpe_verdicts", result="miss")
+
+        if pending:
+            with metrics.timed("model_inference_seconds", model="spacy", op="gpe_batch"):
+                parsed = {text: any(ent.label_ == "GPE" for ent in doc.ents)
+                          for text, doc in zip(pending, cls.pipe(pending, profile="ner_only"))}
+            verdicts.update(parsed)
+
+            with cls._gpe_lock:
+                cls._gpe_verdicts.update(parsed)
+                while len(cls._gpe_verdicts) > cls.GPE_CACHE_SIZE:
+                    cls._gpe_verdicts.popitem(last=False)
+
+        return verdicts
@@ -0,0 +1,118 @@
+"""
+Build and load the customized spaCy pipeline as an on-disk artifact.
+
+The artifact is en_core_web_md with the travel EntityRuler patterns, the set_entity_ids
+component and the components the actions never use disabled, saved with nlp.to_disk.
+Its meta.json carries a fingerprint of the patterns and versions it was built from,
+so a stale artifact is ignored instead of silently loaded.
+
+Build it once per deployment (from the project root):
+    python -m custom_models.spacy_pipeline_artifact
+    python -m custom_models.spacy_pipeline_artifact --output /srv/models/spacy_travel_pipeline
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import spacy
+from spacy.language import Language
+from spacy.util import get_package_version, load_meta
+
+from custom_models.spacy_entity_patterns import PATTERNS, setup_entity_patterns
+from mylogger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_MODEL = "en_core_web_md"
+
+# the actions only read entities and lexical attributes (is_stop, like_num, ...); the shared tok2vec
+# only feeds its listeners (tagger and parser, the ner of en_core_web_md embeds its own tok2vec)
+UNNEEDED_COMPONENTS = ["tagger", "parser", "attribute_ruler", "lemmatizer", "tok2vec"]
+
+DEFAULT_ARTIFACT_PATH = os.getenv(
+    "SPACY_PIPELINE_PATH",
+    str(Path(__file__).resolve().parent.parent / "artifacts" / "spacy_travel_pipeline"),
+)
+
+FINGERPRINT_KEY = "travel_fingerprint"
+
+
+def pipeline_fingerprint() -> str:
+    """Hash of everything the customized pipeline is built from"""
+    source = {
+        "patterns": PATTERNS,
+        "base_model": BASE_MODEL,
+        "base_model_version": get_package_version(BASE_MODEL),
+        "spacy_version": spacy.__version__,
+        "disabled": UNNEEDED_COMPONENTS,
+    }
+    return hashlib.sha256(json.dumps(source, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def create_pipeline() -> Language:
+    """Load the base model and apply the travel customizations in-process"""
+    nlp = spacy.load(BASE_MODEL)
+    setup_entity_patterns(nlp)
+
+    for name in UNNEEDED_COMPONENTS:
+        if name in nlp.pipe_names:
+            nlp.disable_pipe(name)
+
+    # a base model whose enabled components listen to the shared tok2vec needs it after all
+    if "tok2vec" in nlp.disabled:
+        listeners = set(getattr(nlp.get_pipe("tok2vec"), "listening_components", [])) & set(nlp.pipe_names)
+        if listeners:
+            logger.warning("Keeping tok2vec enabled for %s", sorted(listeners))
+            nlp.enable_pipe("tok2vec")
+
+    return nlp
+
+
+def build_pipeline_artifact(path: str = DEFAULT_ARTIFACT_PATH) -> str:
+    """Bake the customized pipeline into `path` and return its fingerprint"""
+    nlp = create_pipeline()
+    fingerprint = pipeline_fingerprint()
+    nlp.meta[FINGERPRINT_KEY] = fingerprint
+    nlp.to_disk(path)
+
+    logger.info("SpaCy pipeline artifact written to %s (fingerprint %s)", path, fingerprint[:12])
+    return fingerprint
+
+
+def load_pipeline_artifact(path: str = DEFAULT_ARTIFACT_PATH) -> Optional[Language]:
+    """Load the artifact if it exists and matches the current patterns, None otherwise"""
+    meta_path = Path(path) / "meta.json"
+    if not meta_path.exists():
+        logger.info("No spaCy pipeline artifact at %s", path)
+        return None
+
+    stored_fingerprint = load_meta(meta_path).get(FINGERPRINT_KEY)
+    if stored_fingerprint != pipeline_fingerprint():
+        logger.warning("SpaCy pipeline artifact at %s is stale (patterns or versions changed), "
+                       "rebuild it with: python -m custom_models.spacy_pipeline_artifact", path)
+        return None
+
+    return spacy.load(path)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--output", default=DEFAULT_ARTIFACT_PATH, help="directory to write the pipeline to")
+    args = arg_parser.parse_args()
+
+    start_time = time.time()
+    build_pipeline_artifact(args.output)
+    logger.info("Build time: %.2f seconds", time.time() - start_time)
+
+    start_time = time.time()
+    nlp = load_pipeline_artifact(args.output)
+    logger.info("Artifact loading time: %.2f seconds, enabled components: %s",
+                time.time() - start_time, nlp.pipe_names)
+
+
+if __name__ == "__main__":
+    main()
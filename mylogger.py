@@ -1,25 +1,117 @@
+import atexit
+import json
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# LOG_LEVEL: DEBUG (default), INFO, WARNING, ...
+# LOG_FORMAT: "text" (default) or "json" (one object per line, with sender_id/action of the running action)
+# LOG_QUEUE: "true" (default) hands records to a background thread that does the formatting and I/O
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_QUEUE = os.getenv('LOG_QUEUE', 'true').lower() == 'true'
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# returns (sender_id, action) of the current action run, registered by utils.tracing
+_context_provider = None
+
+
+def set_log_context_provider(provider):
+    global _context_provider
+    _context_provider = provider
+
+
+class ContextFilter(logging.Filter):
+    """Adds `sender_id` and `action` of the running action to every record (None outside actions).
+    Runs in the logging thread, before the record is queued."""
+
+    def filter(self, record):
+        sender_id, action = _context_provider() if _context_provider else (None, None)
+        record.sender_id = sender_id
+        record.action = action
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'sender_id': getattr(record, 'sender_id', None),
+            'action': getattr(record, 'action', None),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """QueueHandler that leaves the %-formatting of the message to the listener thread.
+    The args are formatted a moment later, so don't log an object and mutate it right after."""
+
+    def prepare(self, record):
+        if record.exc_info:
+            # tracebacks cannot cross the queue, render them here
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_handler = None
+_listener = None
+
+
+def _restart_listener():
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
+
+def _create_handler():
+    global _listener
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    if not LOG_QUEUE:
+        stream_handler.addFilter(ContextFilter())
+        return stream_handler
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # flush what is still queued on interpreter exit
+    atexit.register(_listener.stop)
+    # the listener thread does not survive a fork (pre-fork action server), start a new one in the child
+    os.register_at_fork(after_in_child=_restart_listener)
+
+    handler = _LazyQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    return handler
+
 
 def get_logger(name=None):
+    global _handler
+
     # create logger
     logger = logging.getLogger(name or 'DestinAItorChatbot')
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(LOG_LEVEL)
     logger.propagate = False  # 🚫 Prevent logs from propagating to the root logger
 
     # prevent adding handlers multiple times
     if not logger.handlers:
-        # create handler
-        handler = logging.StreamHandler()
-        handler.setLevel(logging.DEBUG)
-        # create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        # add handler to logger
-        logger.addHandler(handler)
+        # one handler (and background listener) shared by all loggers
+        if _handler is None:
+            _handler = _create_handler()
+        logger.addHandler(_handler)
 
     return logger
 
 # create and export logger instance
-logger = get_logger()
\ No newline at end of file
+logger = get_logger()
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from utils.date_utils import DateResolver
+
+# Wednesday
+FIXED_TODAY = datetime(2025, 2, 19, 10, 30)
+
+GOLDEN_CORPUS = [
+    # relative to today
+    ("3 days", "2025-02-22"),
+    ("10 days from now", "2025-03-01"),
+    ("9 days from today", "2025-02-28"),
+    ("5 days from tomorrow", "2025-02-25"),
+    ("next 5 days", "2025-02-24"),
+    ("tomorrow", "2025-02-20"),
+    ("  Tomorrow  ", "2025-02-20"),
+    ("today", "2025-02-19"),
+    ("next day", "2025-02-20"),
+    ("next week", "2025-02-26"),
+    ("next month", "2025-03-19"),
+    ("in a month", "2025-03-19"),
+    ("in 3 months", "2025-05-19"),
+    # weekdays
+    ("friday", "2025-02-21"),
+    ("on Saturday", "2025-02-22"),
+    ("this Saturday", "2025-02-22"),
+    ("next monday", "2025-03-03"),
+    ("next sunday", "2025-03-02"),
+    ("next wednesday", "2025-03-05"),
+    ("thursday next week", "2025-02-27"),
+    ("monday next week", "2025-03-03"),
+    # days of (next) month
+    ("in the 4th of next month", "2025-03-04"),
+    ("15 next month", "2025-03-15"),
+    ("on the 31st of next month", "2025-03-31"),
+    ("the 31st", "2025-03-31"),
+    ("27th", "2025-02-27"),
+    ("19th", "2025-02-19"),
+    ("2nd", "2025-03-02"),
+    # absolute dates
+    ("2025-02-20", "2025-02-20"),
+    ("2024-12-25", "2024-12-25"),
+    ("20 Feb 2025", "2025-02-20"),
+    ("February 20, 2025", "2025-02-20"),
+    ("02/20/2025", "2025-02-20"),
+    ("March 15", "2025-03-15"),
+    ("1st of March", "2025-03-01"),
+    ("February 19", "2025-02-19"),
+    # past dates without a year move to next year
+    ("February 18", "2026-02-18"),
+    ("Jan 10", "2026-01-10"),
+    ("3pm", "2025-02-19"),
+    # not dates
+    ("random text", None),
+    ("the", None),
+    ("", None),
+    (None, None),
+    ("99999999999999999999 days", None),
+]
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return DateResolver(clock=lambda: FIXED_TODAY)
+
+
+@pytest.mark.parametrize("text, expected", GOLDEN_CORPUS)
+def test_resolve(resolver, text, expected):
+    assert resolver.resolve(text) == expected
+
+
+def test_resolve_many_matches_resolve(resolver):
+    texts = [text for text, _ in GOLDEN_CORPUS]
+    assert resolver.resolve_many(texts) == [expected for _, expected in GOLDEN_CORPUS]
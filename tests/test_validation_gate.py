@@ -0,0 +1,49 @@
+import pytest
+
+from utils.validation_gate import ValidationGate, is_slot_answer
+
+
+def entity(text, value, name="city"):
+    start = text.index(value)
+    return {"entity": name, "value": value, "start": start, "end": start + len(value)}
+
+
+@pytest.mark.parametrize("text, entities", [
+    ("Athens", [entity("Athens", "Athens")]),
+    ("to Athens please", [entity("to Athens please", "Athens")]),
+    ("from Rome to Paris", [entity("from Rome to Paris", "Rome"), entity("from Rome to Paris", "Paris")]),
+    ("next friday", []),
+    ("on the 3rd", []),
+    ("2025-03-01", []),
+    ("2", []),
+    ("2 people", []),
+    ("we are 4", []),
+    ("leaving 3 may, back 10 may", []),
+])
+def test_bare_answers_skip_validation(text, entities):
+    assert is_slot_answer(text, entities)
+    assert ValidationGate(0.95, 0.85, skip_slot_answers=True).should_validate(
+        "find_compare_flights", 0.3, text=text, entities=entities) == (False, "slot_answer")
+
+
+@pytest.mark.parametrize("text, entities", [
+    ("weather in Athens", [entity("weather in Athens", "Athens")]),
+    ("who is Messi", [entity("who is Messi", "Messi")]),
+    ("who is Messi", []),
+    ("tell me a joke", []),
+    ("what time is it in Paris", [entity("what time is it in Paris", "Paris")]),
+    ("yes please", []),
+    ("flights to Athens", [entity("flights to Athens", "Athens")]),
+    ("hotels on friday", []),
+    ("", []),
+])
+def test_other_messages_are_validated(text, entities):
+    assert not is_slot_answer(text, entities)
+    assert ValidationGate(0.95, 0.85, skip_slot_answers=True).should_validate(
+        "find_compare_flights", 0.3, text=text, entities=entities) == (True, "low_confidence")
+
+
+def test_slot_answers_validated_when_disabled():
+    gate = ValidationGate(0.95, 0.85, skip_slot_answers=False)
+    assert gate.should_validate("find_compare_flights", 0.3, text="Athens",
+                                entities=[entity("Athens", "Athens")]) == (True, "low_confidence")
@@ -1,6 +1,8 @@
 from typing import Dict, Optional, List
 import requests
 
+from utils.metrics import metrics
+
 
 class AmadeusAPI:
     """Handles Amadeus API interactions for flight searches."""
@@ -20,8 +22,9 @@ class AmadeusAPI:
             "client_secret": self.client_secret
         }
         
-        auth_response = requests.post(self.auth_url, data=auth_data)
-        auth_response.raise_for_status()
+        with metrics.timed("upstream_request_seconds", service="amadeus", endpoint="oauth2.token"):
+            auth_response = requests.post(self.auth_url, data=auth_data)
+            auth_response.raise_for_status()
 
         return auth_response.json()["access_token"]
 
@@ -51,8 +54,9 @@ class AmadeusAPI:
             if return_date:
                 params["returnDate"] = return_date
             
-            search_response = requests.get(self.search_url, headers=headers, params=params)
-            search_response.raise_for_status()
+            with metrics.timed("upstream_request_seconds", service="amadeus", endpoint="flight-offers"):
+                search_response = requests.get(self.search_url, headers=headers, params=params)
+                search_response.raise_for_status()
             
             return search_response.json()
             
@@ -1,10 +1,21 @@
-from typing import Dict
+from typing import Dict, List, Optional
 import time
 import json
 from datetime import date
 
 from openai import OpenAI
 
+from utils.metrics import metrics
+
+# fields of the flight extraction answer and their placeholder in the required format
+FLIGHT_EXTRACTION_FIELDS = {
+    "departure_city": "city_name",
+    "arrival_city": "city_name",
+    "departure_date": "date",
+    "return_date": "date",
+    "num_passengers": "number",
+}
+
 
 class OpenAIClient:
     """Handles OpenAI API interactions for airport information."""
@@ -38,8 +49,11 @@ Required format:
 }}'''
 
     @staticmethod
-    def create_flight_extraction_prompt(request: str) -> str:
+    def create_flight_extraction_prompt(request: str, fields: Optional[List[str]] = None) -> str:
+        """Flight extraction prompt; `fields` limits the answer to those keys (default: all of them)."""
         today = date.today().strftime("%Y-%m-%d")
+        fields = [field for field in (fields or FLIGHT_EXTRACTION_FIELDS) if field in FLIGHT_EXTRACTION_FIELDS]
+        required_format = ",\n".join(f'  "{field}": {FLIGHT_EXTRACTION_FIELDS[field]}' for field in fields)
         return f'''
 This is a request for booking flights: "{request}".
 Please extract the following information if it exists.
@@ -54,11 +68,7 @@ Rules:
 
 Required format:
 {{
-  "departure_city": city_name,
-  "arrival_city": city_name,
-  "departure_date": date,
-  "return_date": date,
-  "num_passengers": number
+{required_format}
 }}'''
 
 
@@ -81,16 +91,20 @@ Required format:
         """Get completion from OpenAI API with retry logic and JSON parsing."""
         max_retries = 3
         for attempt in range(max_retries):
+            if attempt:
+                metrics.inc("upstream_retries_total", service="openai", endpoint="chat.completions")
             try:
-                response = self.client.chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0
-                )
+                with metrics.timed("upstream_request_seconds", service="openai", endpoint="chat.completions"):
+                    response = self.client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=0
+                    )
                 result = json.loads(response.choices[0].message.content)
                 return result
                 
             except json.JSONDecodeError:
+                metrics.inc("upstream_invalid_responses_total", service="openai", endpoint="chat.completions")
                 if attempt == max_retries - 1:
                     raise ValueError("Failed to get valid JSON response")
                 time.sleep(3)
@@ -4,6 +4,7 @@ import json
 from typing import Dict, List, Optional
 
 from mylogger import get_logger
+from utils.metrics import metrics
 
 logger = get_logger(__name__)
 logger.debug("TripAdvisorAPI module loaded")
@@ -45,10 +46,12 @@ class TripAdvisorAPI:
             params['category'] = category
 
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            with metrics.timed("upstream_request_seconds", service="tripadvisor", endpoint="location.search"):
+                response = requests.get(url, headers=self.headers, params=params)
 
             if response.status_code != 200:
-                logger.error(f"Error: API returned status code {response.status_code}")
+                metrics.inc("upstream_errors_total", service="tripadvisor", endpoint="location.search")
+                logger.error("Error: API returned status code %s", response.status_code)
                 return []
 
             location_data = response.json()
@@ -73,7 +76,7 @@ class TripAdvisorAPI:
             return simplified_results
 
         except requests.RequestException as e:
-            logger.error(f"Request error: {e}")
+            logger.error("Request error: %s", e)
             return []
 
 
@@ -86,9 +89,11 @@ class TripAdvisorAPI:
         url = f"{url}?language=en&key={self.api_key}"
         
         try:
-            response = requests.get(url, headers=self.headers)
+            with metrics.timed("upstream_request_seconds", service="tripadvisor", endpoint="location.details"):
+                response = requests.get(url, headers=self.headers)
             if response.status_code != 200:
-                logger.error(f"Error: API returned status code {response.status_code}")
+                metrics.inc("upstream_errors_total", service="tripadvisor", endpoint="location.details")
+                logger.error("Error: API returned status code %s", response.status_code)
                 return None
             
             data = response.json()
@@ -104,7 +109,7 @@ class TripAdvisorAPI:
                 return self.parse_geos_details(data)
                 
         except Exception as e:
-            logger.error(f"Error fetching location details: {e}")
+            logger.error("Error fetching location details: %s", e)
             return None
 
 
@@ -117,15 +122,17 @@ class TripAdvisorAPI:
         url = f"{url}?language=en&key={self.api_key}"
         
         try:
-            response = requests.get(url, headers=self.headers)
+            with metrics.timed("upstream_request_seconds", service="tripadvisor", endpoint="location.photos"):
+                response = requests.get(url, headers=self.headers)
             if response.status_code != 200:
-                logger.error(f"Error: API returned status code {response.status_code}")
+                metrics.inc("upstream_errors_total", service="tripadvisor", endpoint="location.photos")
+                logger.error("Error: API returned status code %s", response.status_code)
                 return None
             
             return response.json()
             
         except Exception as e:
-            logger.error(f"Error fetching photos: {e}")
+            logger.error("Error fetching photos: %s", e)
             return None
 
 
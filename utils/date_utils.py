@@ -1,13 +1,49 @@
 import re
+import threading
 from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
 from dateutil import parser
 from dateutil.relativedelta import relativedelta
 
-def parse_date_to_iso(date_text: str) -> str:
-    """Convert various date formats to YYYY-MM-DD"""
+from utils.metrics import metrics
+
+DAYS_MAP = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+            'friday': 4, 'saturday': 5, 'sunday': 6}
+
+# precompiled patterns, in the order they are tried
+NEXT_WEEK_DAY_RE = re.compile(r'(\w+)\s+next\s+week')
+IN_MONTHS_RE = re.compile(r'in\s+(?:a|(\d+))\s+months?')
+DAYS_RE = re.compile(r'(\d+)\s*days?(?:\s*from\s*(now|today|tomorrow)?)?')
+NEXT_DAYS_RE = re.compile(r'next\s+(\d+)\s*days?')
+NEXT_DAY_OF_WEEK_RE = re.compile(r'next\s+(\w+)')
+DAY_OF_NEXT_MONTH_RE = re.compile(r'(?:in|on)?\s*(?:the)?\s*(\d{1,2})(?:st|nd|rd|th)?\s*(?:of)?\s*next\s*month')
+ORDINAL_RE = re.compile(r'(?:the)?\s*(\d{1,2})(?:st|nd|rd|th)?$')
+YEAR_RE = re.compile(r'\b\d{4}\b')
+
+# cheap pre-filter: without a digit or one of these words neither the relative
+# patterns nor dateutil can produce a date, so such texts skip them entirely
+_parser_info = parser.parserinfo()
+MONTH_WORDS = frozenset(name.lower() for names in _parser_info.MONTHS for name in names)
+DATE_WORDS = frozenset(
+    [name.lower() for names in _parser_info.WEEKDAYS for name in names]
+    + ['today', 'tomorrow', 'next', 'day', 'days', 'week', 'weeks', 'month', 'months']
+) | MONTH_WORDS
+DIGIT_RE = re.compile(r'\d')
+WORD_RE = re.compile(r'[a-z]+')
+
+
+def could_be_date(date_text: str) -> bool:
+    """False when the (lowercased) text certainly does not resolve to a date"""
+    if DIGIT_RE.search(date_text):
+        return True
+    return any(word in DATE_WORDS for word in WORD_RE.findall(date_text))
+
+
+def _resolve(date_text: str, today: datetime) -> Optional[str]:
+    """Convert one lowercased, stripped date text to YYYY-MM-DD relative to `today`"""
     try:
-        date_text = date_text.strip().lower()
-        today = datetime.now()
+        if not could_be_date(date_text):
+            return None
 
         # handle "next day" -> tomorrow
         if date_text == "next day":
@@ -18,14 +54,11 @@ def parse_date_to_iso(date_text: str) -> str:
             return (today + timedelta(weeks=1)).strftime('%Y-%m-%d')
 
         # handle "thursday next week" -> specific weekday next week
-        next_week_day = re.match(r'(\w+)\s+next\s+week', date_text)
+        next_week_day = NEXT_WEEK_DAY_RE.match(date_text)
         if next_week_day:
             day = next_week_day.group(1)
-            days_map = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 
-                       'friday': 4, 'saturday': 5, 'sunday': 6}
-            if day in days_map:
-                target_weekday = days_map[day]
-                current_weekday = today.weekday()
+            if day in DAYS_MAP:
+                target_weekday = DAYS_MAP[day]
                 # First get to next week
                 next_week = today + timedelta(weeks=1)
                 # Then adjust to the target day
@@ -39,14 +72,14 @@ def parse_date_to_iso(date_text: str) -> str:
             return next_month.strftime('%Y-%m-%d')
 
         # handle "in X months"
-        in_months = re.match(r'in\s+(?:a|(\d+))\s+months?', date_text)
+        in_months = IN_MONTHS_RE.match(date_text)
         if in_months:
             months = 1 if in_months.group(1) is None else int(in_months.group(1))
             target_date = today + relativedelta(months=months)
             return target_date.strftime('%Y-%m-%d')
 
         # handle "<N> days" and variations
-        days_pattern = re.match(r'(\d+)\s*days?(?:\s*from\s*(now|today|tomorrow)?)?', date_text)
+        days_pattern = DAYS_RE.match(date_text)
         if days_pattern:
             days = int(days_pattern.group(1))
             reference = days_pattern.group(2)
@@ -54,23 +87,23 @@ def parse_date_to_iso(date_text: str) -> str:
             return (base_date + timedelta(days=days)).strftime('%Y-%m-%d')
 
         # handle "next <N> days"
-        next_days_pattern = re.match(r'next\s+(\d+)\s*days?', date_text)
+        next_days_pattern = NEXT_DAYS_RE.match(date_text)
         if next_days_pattern:
             days = int(next_days_pattern.group(1))
             return (today + timedelta(days=days)).strftime('%Y-%m-%d')
 
-        # handle "tomorrow"
+        # handle "today" / "tomorrow"
+        if date_text == 'today':
+            return today.strftime('%Y-%m-%d')
         if date_text == 'tomorrow':
             return (today + timedelta(days=1)).strftime('%Y-%m-%d')
 
         # handle "next <day_of_week>"
-        next_day_match = re.match(r'next\s+(\w+)', date_text)
+        next_day_match = NEXT_DAY_OF_WEEK_RE.match(date_text)
         if next_day_match:
             day = next_day_match.group(1)
-            days_map = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 
-                        'friday': 4, 'saturday': 5, 'sunday': 6}
-            if day in days_map:
-                target_weekday = days_map[day]
+            if day in DAYS_MAP:
+                target_weekday = DAYS_MAP[day]
                 current_weekday = today.weekday()
                 
                 # Calculate days until next occurrence
@@ -82,7 +115,7 @@ def parse_date_to_iso(date_text: str) -> str:
                 return target_date.strftime('%Y-%m-%d')
 
         # handle "in/on the <number>(st/nd/rd/th) of next month"
-        next_month_match = re.match(r'(?:in|on)?\s*(?:the)?\s*(\d{1,2})(?:st|nd|rd|th)?\s*(?:of)?\s*next\s*month', date_text)
+        next_month_match = DAY_OF_NEXT_MONTH_RE.match(date_text)
         if next_month_match:
             day = int(next_month_match.group(1))
             target_month = today + relativedelta(months=1)
@@ -93,7 +126,7 @@ def parse_date_to_iso(date_text: str) -> str:
                     target_month += relativedelta(months=1)
 
         # handle standalone ordinals like "the 31st", "2nd"
-        ordinal_match = re.match(r'(?:the)?\s*(\d{1,2})(?:st|nd|rd|th)?$', date_text)
+        ordinal_match = ORDINAL_RE.match(date_text)
         if ordinal_match:
             day = int(ordinal_match.group(1))
             target_date = today
@@ -106,56 +139,91 @@ def parse_date_to_iso(date_text: str) -> str:
                 except ValueError:
                     target_date += relativedelta(months=1)
 
-        # fallback: dateutil parser
-        parsed_date = parser.parse(date_text, fuzzy=True)
+        # fallback: dateutil parser (missing fields default to `today`, not the wall clock)
+        default = today.replace(hour=0, minute=0, second=0, microsecond=0)
+        parsed_date = parser.parse(date_text, fuzzy=True, default=default)
 
         # if parsed date is today, return today
         if parsed_date.date() == today.date():
             return today.strftime('%Y-%m-%d')
 
         # if date is in the past and no year specified, shift to next year
-        if parsed_date < today and not re.search(r'\b\d{4}\b', date_text):
+        if parsed_date < today and not YEAR_RE.search(date_text):
             parsed_date += relativedelta(years=1)
 
         return parsed_date.strftime('%Y-%m-%d')
 
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, OverflowError):
         return None
 
 
+class DateResolver:
+    """Resolves date expressions to YYYY-MM-DD with a memo cache per day.
+
+    Results depend only on the date returned by `clock` (local time by default),
+    so the cache is dropped as soon as that date changes, i.e. at local midnight."""
+
+    def __init__(self, clock: Optional[Callable[[], datetime]] = None, max_cache_size: int = 10000):
+        self.clock = clock or datetime.now
+        self.max_cache_size = max_cache_size
+        self._cache: Dict[str, Optional[str]] = {}
+        self._cache_day = None
+        self._lock = threading.Lock()
+
+    def _today(self) -> datetime:
+        today = self.clock()
+        with self._lock:
+            if self._cache_day != today.date():
+                self._cache = {}
+                self._cache_day = today.date()
+        return today
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache = {}
+            self._cache_day = None
+
+    def resolve_many(self, date_texts: List[str]) -> List[Optional[str]]:
+        """Resolve all the candidate texts (e.g. of one doc) in one pass, None where unparseable"""
+        today = self._today()
+        cache = self._cache
+        results = []
+        hits = misses = 0
+
+        for date_text in date_texts:
+            if not date_text or not isinstance(date_text, str):
+                results.append(None)
+                continue
+
+            key = date_text.strip().lower()
+            if key in cache:
+                hits += 1
+                results.append(cache[key])
+                continue
+
+            misses += 1
+            result = _resolve(key, today)
+            if len(cache) >= self.max_cache_size:
+                cache.clear()
+            cache[key] = result
+            results.append(result)
+
+        metrics.inc("cache_requests_total", hits, cache="date_resolver", result="hit")
+        metrics.inc("cache_requests_total", misses, cache="date_resolver", result="miss")
+        return results
+
+    def resolve(self, date_text: str) -> Optional[str]:
+        return self.resolve_many([date_text])[0]
+
+
+default_resolver = DateResolver()
+
+
+def parse_date_to_iso(date_text: str) -> str:
+    """Convert various date formats to YYYY-MM-DD"""
+    return default_resolver.resolve(date_text)
+
 
-# # 🔥 TEST CASES
-# test_inputs = [
-#     "3 days",
-#     "10 days from now",
-#     "9 days from today",
-#     "5 days from tomorrow",
-#     "on Saturday",
-#     "this Saturday",
-#     "next 5 days",
-#     "tomorrow",
-#     "next day",
-#     "next monday",
-#     "next sunday",
-#     "next week",
-#     "thursday next week",
-#     "2025-02-20",
-#     "20 Feb 2025",
-#     "February 20, 2025",
-#     "02/20/2025",
-#     "March 15",
-#     "random text",
-#     "27th",
-#     "",
-#     "in the 4th of next month",
-#     "15 next month",
-#     "next month",
-#     "the 31st",
-#     "1st of March",
-#     None
-# ]
-
-# print("🚀 Running test cases...\n")
-# for date_text in test_inputs:
-#     result = parse_date_to_iso(date_text) if date_text else None
-#     print(f"Input: {repr(date_text):<30} | Output: {result}")
+def parse_dates_to_iso(date_texts: List[str]) -> List[Optional[str]]:
+    """Batch version of parse_date_to_iso, results are in the order of the inputs"""
+    return default_resolver.resolve_many(date_texts)
@@ -0,0 +1,248 @@
+"""
+Lightweight in-process metrics: latency histograms and counters with labels.
+
+    from utils.metrics import metrics, instrument_action
+
+    with metrics.timed("upstream_request_seconds", service="openai", endpoint="chat.completions"):
+        ...
+    metrics.inc("cache_requests_total", cache="gpe_verdicts", result="hit")
+
+    @instrument_action
+    class ActionSearchFlights(Action): ...
+
+Everything is exposed in the Prometheus text format by `start_metrics_server` (the action
+server starts it when METRICS_PORT is set) and can be dumped to JSON for the benchmarks.
+"""
+import functools
+import inspect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+
+from mylogger import get_logger
+from utils.profiling import action_profiler
+from utils.tracing import start_trace, tracer
+
+logger = get_logger(__name__)
+
+# seconds, from a cached lookup (~1ms) up to a slow GPT-4 answer
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _base_name(name: str) -> str:
+    return name[:-len("_seconds")] if name.endswith("_seconds") else name
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values (Prometheus semantics)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty or above the last bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            if bucket_count >= rank:
+                return bound
+        return None
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Add one observation (usually seconds) to the histogram `name`"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.buckets)
+            series[key].observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increase the counter `name`"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    @contextmanager
+    def timed(self, name: str, **labels) -> Iterator[None]:
+        """Time the block into the histogram `name`; failures are also counted in `<name>_errors_total`.
+        Inside an action run the block is also a trace span named after its labels (e.g. "openai.chat.completions")."""
+        span_name = (".".join(str(value) for value in labels.values()) or name) if tracer.enabled else name
+        with tracer.span(span_name, **labels):
+            start_time = time.perf_counter()
+            try:
+                yield
+            except Exception:
+                self.inc(f"{_base_name(name)}_errors_total", **labels)
+                raise
+            finally:
+                self.observe(name, time.perf_counter() - start_time, **labels)
+
+    def timed_function(self, name: str, **labels):
+        """Decorator version of `timed`"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timed(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> Dict:
+        """Snapshot of every series, histograms with count/sum/mean and bucket based p50/p90/p99"""
+        with self._lock:
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": histogram.count,
+                        "sum": round(histogram.sum, 6),
+                        "mean": round(histogram.sum / histogram.count, 6) if histogram.count else None,
+                        "p50": histogram.quantile(0.5),
+                        "p90": histogram.quantile(0.9),
+                        "p99": histogram.quantile(0.99),
+                    }
+                    for key, histogram in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+        return {"histograms": histograms, "counters": counters}
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', repr(bound)))} {bucket_count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def _action_run(action_name: str, sender_id: str) -> Iterator[None]:
+    """Root trace span, action_duration_seconds sample and (if sampled) cProfile of one action run"""
+    with start_trace(sender_id=sender_id, action=action_name), action_profiler.profile(action_name, sender_id):
+        start_time = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            metrics.inc("action_errors_total", action=action_name)
+            raise
+        finally:
+            metrics.observe("action_duration_seconds", time.perf_counter() - start_time, action=action_name)
+
+
+def instrument_action(action_cls):
+    """Class decorator timing every run() of a Rasa action into action_duration_seconds{action=name()}
+    and tracing it under the tracker's sender_id. Works for the sync actions and the async run()
+    of FormValidationAction."""
+    run = action_cls.run
+
+    if inspect.iscoroutinefunction(run):
+        @functools.wraps(run)
+        async def timed_run(self, dispatcher, tracker, domain):
+            with _action_run(self.name(), tracker.sender_id):
+                return await run(self, dispatcher, tracker, domain)
+    else:
+        @functools.wraps(run)
+        def timed_run(self, dispatcher, tracker, domain):
+            with _action_run(self.name(), tracker.sender_id):
+                return run(self, dispatcher, tracker, domain)
+
+    action_cls.run = timed_run
+    return action_cls
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = metrics
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(self.registry.to_dict()).encode("utf-8")
+            content_type = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = self.registry.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrapes are frequent, keep them out of the action server log
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", host, port)
+    return server
@@ -0,0 +1,57 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+class PathStats:
+    """Counts how often each code path is taken and keeps its recent latencies."""
+
+    def __init__(self, name: str, max_samples: int = 1000):
+        self.name = name
+        self.max_samples = max_samples
+        self.counts: Dict[str, int] = {}
+        self.latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def record(self, path: str, seconds: float) -> None:
+        """Record one turn that went through `path` and took `seconds`."""
+        with self._lock:
+            self.counts[path] = self.counts.get(path, 0) + 1
+            self.latencies.setdefault(path, deque(maxlen=self.max_samples)).append(seconds)
+
+    @staticmethod
+    def _percentile(ordered, pct: float) -> Optional[float]:
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per path: count, fraction of all turns and latency percentiles in ms."""
+        with self._lock:
+            total = self.total
+            result = {}
+            for path, count in self.counts.items():
+                ordered = sorted(self.latencies[path])
+                result[path] = {
+                    "count": count,
+                    "fraction": round(count / total, 4) if total else 0.0,
+                    "p50_ms": round(self._percentile(ordered, 50) * 1000, 1),
+                    "p90_ms": round(self._percentile(ordered, 90) * 1000, 1),
+                    "p99_ms": round(self._percentile(ordered, 99) * 1000, 1),
+                    "max_ms": round(ordered[-1] * 1000, 1),
+                }
+            return result
+
+    def format_summary(self) -> str:
+        parts = []
+        for path, stats in sorted(self.summary().items()):
+            parts.append(
+                f"{path}: {stats['count']} ({stats['fraction']:.1%}) "
+                f"p50={stats['p50_ms']}ms p90={stats['p90_ms']}ms p99={stats['p99_ms']}ms max={stats['max_ms']}ms"
+            )
+        return f"{self.name} paths ({self.total} turns) -> " + " | ".join(parts)
@@ -0,0 +1,113 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from mylogger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class PrefetchCache:
+    """Background work started during form filling, picked up later by the search actions.
+
+    Results are stored per sender and per key (e.g. "arrival_airports"), tagged with the
+    value they were computed for (e.g. the city), so a result is only used if the slot it
+    came from still has that value and it is at most `ttl_seconds` old. Scheduling a new value
+    for the same key cancels the previous job (if it has not started yet) and replaces it, so
+    does scheduling the same value again after the previous job failed."""
+
+    def __init__(self, max_workers: int = 4, ttl_seconds: float = 900):
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_pid = None
+        # sender_id -> key -> (value, future, created_at)
+        self._entries: Dict[str, Dict[str, Tuple[Any, Future, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # created lazily and again after a fork: the threads of the parent's pool don't exist in a worker
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _evict_expired(self, now: float) -> None:
+        for sender_id in list(self._entries):
+            keys = self._entries[sender_id]
+            for key, (_, future, created_at) in list(keys.items()):
+                if now - created_at > self.ttl_seconds:
+                    future.cancel()
+                    del keys[key]
+            if not keys:
+                del self._entries[sender_id]
+
+    def submit(self, sender_id: str, key: str, value: Any, func: Callable, *args, **kwargs) -> Future:
+        """Run `func(*args, **kwargs)` in the background as the prefetch of `key` for `value`."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            keys = self._entries.setdefault(sender_id, {})
+
+            previous = keys.get(key)
+            if previous is not None:
+                previous_value, previous_future, _ = previous
+                failed = previous_future.cancelled() or (previous_future.done() and previous_future.exception())
+                if previous_value == value and not failed:
+                    return previous_future
+                previous_future.cancel()
+                logger.debug("Prefetch of %s=%s replaced by %s (%s)", key, previous_value, value, sender_id)
+
+            # run in a copy of the caller's context so the job is traced under the scheduling action
+            future = self._get_executor().submit(contextvars.copy_context().run, func, *args, **kwargs)
+            keys[key] = (value, future, now)
+
+        logger.debug("Prefetch of %s=%s scheduled (%s)", key, value, sender_id)
+        return future
+
+    def get(self, sender_id: str, key: str, value: Any, timeout: Optional[float] = None) -> Optional[Any]:
+        """Result of the prefetch of `key` for `value`, waiting for it (up to `timeout` seconds,
+        None: until it finishes) if it is running. None if nothing was prefetched, the value
+        changed, the result expired, the job failed, did not finish in time or had not started
+        yet (it is cancelled then: the caller does the work itself right away, not twice)."""
+        with self._lock:
+            entry = self._entries.get(sender_id, {}).get(key)
+
+        if entry is None or entry[0] != value or time.monotonic() - entry[2] > self.ttl_seconds:
+            metrics.inc("cache_requests_total", cache="prefetch", result="miss")
+            logger.info("Prefetch miss for %s=%s (%s)", key, value, sender_id)
+            return None
+
+        future = entry[1]
+        if future.cancel():
+            # still queued behind other prefetches
+            metrics.inc("cache_requests_total", cache="prefetch", result="miss")
+            logger.info("Prefetch of %s=%s not started yet, cancelled (%s)", key, value, sender_id)
+            return None
+
+        try:
+            result = future.result(timeout=timeout)
+        except (CancelledError, FutureTimeoutError):
+            metrics.inc("cache_requests_total", cache="prefetch", result="miss")
+            logger.info("Prefetch of %s=%s not available in time (%s)", key, value, sender_id)
+            return None
+        except Exception as e:
+            metrics.inc("cache_requests_total", cache="prefetch", result="miss")
+            logger.warning("Prefetch of %s=%s failed (%s): %s", key, value, sender_id, e)
+            return None
+
+        metrics.inc("cache_requests_total", cache="prefetch", result="hit")
+        logger.info("Prefetch hit for %s=%s (%s)", key, value, sender_id)
+        return result
+
+    def discard(self, sender_id: str) -> None:
+        """Cancel and forget everything prefetched for the sender"""
+        with self._lock:
+            keys = self._entries.pop(sender_id, {})
+        for _, future, _ in keys.values():
+            future.cancel()
@@ -0,0 +1,202 @@
+"""
+Pre-fork action server: models are loaded once in the parent and shared copy-on-write by N workers.
+
+The parent builds the rasa_sdk app (which imports the actions and loads every model through
+the registry), moves everything allocated so far out of the garbage collector's reach with
+gc.freeze() so that collections in the workers don't write to (and copy) those pages, binds
+the listening socket and forks the workers. It then restarts workers that die and forwards
+SIGTERM/SIGINT to them.
+
+    python -m utils.prefork_server --workers 4 --port 5055
+    python -m utils.prefork_server --workers 4 --report-after 60   # log PSS per worker after 60s
+    kill -USR1 <parent pid>                                        # log the memory report on demand
+
+No inference runs in the parent before forking (some OpenMP runtimes are not fork-safe
+once their thread pool has started): the models only load their weights, the embedding
+classifiers compute their prototype embeddings on first use in each worker. The parent
+also serves no metrics, each worker does on METRICS_PORT + 1 + i.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List
+
+from mylogger import get_logger
+
+logger = get_logger(__name__)
+
+# set while the parent imports the actions, so they leave the per-process servers to the workers
+PREFORK_PARENT_ENV = "ACTION_SERVER_PREFORK_PARENT"
+
+
+def read_smaps_rollup(pid: int) -> Dict[str, int]:
+    """Rss/Pss/Shared_*/Private_* of a process in kB (Linux /proc/<pid>/smaps_rollup)"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def memory_report(parent_pid: int, worker_pids: List[int], baseline_rss_kb: int) -> str:
+    """PSS per process versus running every worker as an independent process with its own models"""
+    lines = [f"{'process':<16} {'RSS MB':>9} {'PSS MB':>9} {'shared MB':>10} {'private MB':>11}"]
+    total_pss = 0
+    for label, pid in [("parent", parent_pid)] + [(f"worker {pid}", pid) for pid in worker_pids]:
+        try:
+            stats = read_smaps_rollup(pid)
+        except OSError:
+            continue
+        shared = stats.get("Shared_Clean", 0) + stats.get("Shared_Dirty", 0)
+        private = stats.get("Private_Clean", 0) + stats.get("Private_Dirty", 0)
+        total_pss += stats.get("Pss", 0)
+        lines.append(f"{label:<16} {stats.get('Rss', 0) / 1024:>9.0f} {stats.get('Pss', 0) / 1024:>9.0f} "
+                     f"{shared / 1024:>10.0f} {private / 1024:>11.0f}")
+
+    one_copy_per_process = baseline_rss_kb * len(worker_pids)
+    lines.append(f"total PSS: {total_pss / 1024:.0f} MB for {len(worker_pids)} workers | "
+                 f"one process per copy: ~{one_copy_per_process / 1024:.0f} MB "
+                 f"({len(worker_pids)} x {baseline_rss_kb / 1024:.0f} MB RSS after loading)")
+    return "\n".join(lines)
+
+
+def create_listening_socket(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, index: int, num_workers: int) -> None:
+    # the parent's signal handlers must not survive in the worker
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+        signal.signal(signum, signal.SIG_DFL)
+
+    # optional core set per worker (INFERENCE_CPU_SETS) and the worker's share of the torch
+    # threads, before any inference thread starts
+    from custom_models.inference_scheduler import configure_worker
+    configure_worker(index, num_workers)
+
+    # metrics are per process: worker i serves them on METRICS_PORT + 1 + i
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        from utils.metrics import start_metrics_server
+        start_metrics_server(int(metrics_port) + 1 + index)
+
+    try:
+        app.run(sock=sock, workers=1, access_log=False)
+    finally:
+        os._exit(0)
+
+
+class PreforkServer:
+    def __init__(self, app, sock: socket.socket, num_workers: int):
+        self.app = app
+        self.sock = sock
+        self.num_workers = num_workers
+        self.workers: List[int] = []
+        self.worker_index: Dict[int, int] = {}
+        self.stopping = False
+        self.report_requested = False
+        self.baseline_rss_kb = read_smaps_rollup(os.getpid()).get("Rss", 0)
+
+    def spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.app, self.sock, index, self.num_workers)
+        self.workers.append(pid)
+        self.worker_index[pid] = index
+        logger.info("Started worker %s (#%s)", pid, index)
+        return pid
+
+    def request_report(self, _signum, _frame) -> None:
+        # logged from the supervision loop, not from inside the signal handler
+        self.report_requested = True
+
+    def log_report(self) -> None:
+        logger.info("Memory report:\n%s", memory_report(os.getpid(), self.workers, self.baseline_rss_kb))
+
+    def stop(self, signum, _frame) -> None:
+        self.stopping = True
+        for pid in self.workers:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self, report_after: float = None) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGUSR1, self.request_report)
+
+        for index in range(self.num_workers):
+            self.spawn(index)
+
+        report_at = time.monotonic() + report_after if report_after else None
+        while self.workers:
+            if self.report_requested or (report_at and time.monotonic() >= report_at):
+                self.log_report()
+                self.report_requested = False
+                report_at = None
+
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            if pid == 0:
+                time.sleep(0.5)
+                continue
+
+            self.workers.remove(pid)
+            index = self.worker_index.pop(pid)
+            if not self.stopping:
+                logger.warning("Worker %s exited with status %s, restarting it", pid, status)
+                self.spawn(index)
+
+        logger.info("All workers stopped")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    arg_parser.add_argument("--host", default="0.0.0.0")
+    arg_parser.add_argument("--port", type=int, default=5055)
+    arg_parser.add_argument("--actions", default="actions", help="action package name")
+    arg_parser.add_argument("--report-after", type=float, default=None,
+                            help="log the PSS memory report this many seconds after the workers started")
+    args = arg_parser.parse_args()
+
+    from rasa_sdk.endpoint import create_app
+    from custom_models.model_registry import ModelRegistry
+
+    start_time = time.time()
+    # importing the action package builds the API clients and loads the models it uses through the registry
+    os.environ[PREFORK_PARENT_ENV] = "true"
+    app = create_app(args.actions)
+    del os.environ[PREFORK_PARENT_ENV]
+    logger.info("Models %s and actions loaded in the parent in %.2f seconds",
+                ModelRegistry.loaded(), time.time() - start_time)
+
+    # keep the garbage collector from touching (and so copying) the pages of everything loaded so far
+    gc.collect()
+    gc.freeze()
+
+    sock = create_listening_socket(args.host, args.port)
+    logger.info("Action server listening on %s:%s with %s workers", args.host, args.port, args.workers)
+    PreforkServer(app, sock, args.workers).run(report_after=args.report_after)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Opt-in cProfile sampling of action runs, configured from the environment:
+
+    ACTION_PROFILE_RATE=0.05                                   # profile 5% of every action's runs
+    ACTION_PROFILE_RATE=action_search_flights=0.5,default=0.01 # per action name, with a default
+    ACTION_PROFILE_DIR=profiles                                # where the .prof files go
+
+Each sampled run() writes `<action>-<sender_id>-<timestamp>.prof`, to inspect with e.g.
+    python -m pstats profiles/action_extract_flight_entities-1234-20250219T103000123456.prof
+    snakeviz profiles/<file>.prof
+
+Only one run is profiled at a time (cProfile cannot profile overlapping runs), sampled runs
+that find the profiler busy are skipped. Profiling an async run() also records whatever
+else the event loop executes meanwhile.
+"""
+import cProfile
+import os
+import random
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator
+
+from mylogger import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_profile_rates(spec: str) -> Dict[str, float]:
+    """"0.05" -> {"default": 0.05}, "a=0.5,default=0.01" -> {"a": 0.5, "default": 0.01}"""
+    rates = {}
+    for part in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, rate = part.rpartition("=")
+        rates[name.strip() or "default"] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class ActionProfiler:
+    def __init__(self, rates: Dict[str, float], output_dir: str):
+        self.rates = rates
+        self.output_dir = output_dir
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return any(rate > 0 for rate in self.rates.values())
+
+    def should_profile(self, action_name: str) -> bool:
+        rate = self.rates.get(action_name, self.rates.get("default", 0.0))
+        return rate > 0 and random.random() < rate
+
+    def _output_path(self, action_name: str, sender_id: str) -> str:
+        safe_sender = re.sub(r"[^\w.-]", "_", str(sender_id))[:64]
+        timestamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        return os.path.join(self.output_dir, f"{action_name}-{safe_sender}-{timestamp}.prof")
+
+    @contextmanager
+    def profile(self, action_name: str, sender_id: str) -> Iterator[None]:
+        """Profile the block if this run is sampled and no other run is being profiled"""
+        if not self.should_profile(action_name) or not self._busy.acquire(blocking=False):
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # another profiler (e.g. a debugger) is already active in this process
+            self._busy.release()
+            logger.warning("Skipping profile of %s: %s", action_name, e)
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._busy.release()
+            self._write(profiler, action_name, sender_id)
+
+    def _write(self, profiler: cProfile.Profile, action_name: str, sender_id: str) -> None:
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = self._output_path(action_name, sender_id)
+            profiler.dump_stats(path)
+            logger.info("Profile of %s (%s) written to %s", action_name, sender_id, path)
+        except OSError as e:
+            logger.warning("Failed to write profile of %s: %s", action_name, e)
+
+
+action_profiler = ActionProfiler(
+    rates=parse_profile_rates(os.getenv("ACTION_PROFILE_RATE", "")),
+    output_dir=os.getenv("ACTION_PROFILE_DIR", "profiles"),
+)
@@ -0,0 +1,165 @@
+"""
+Request-scoped tracing: one trace per action run, keyed by sender_id and action name.
+
+    with start_trace(sender_id=tracker.sender_id, action=self.name()):   # done by instrument_action
+        with span("route", origin="ATH", destination="LHR"):
+            ...
+
+Child spans are opened by `span()` and by every `metrics.timed()` block (model inference,
+OpenAI/Amadeus/TripAdvisor requests), and follow the context into prefetch threads.
+With TRACE_EXPORT_PATH set, finished spans are appended to that file in the Chrome trace
+event format: open it in chrome://tracing or https://ui.perfetto.dev and filter by
+trace_id / sender_id to see a single slow turn as a waterfall.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from mylogger import get_logger, set_log_context_provider
+
+logger = get_logger(__name__)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sender_id", "action",
+                 "attributes", "start_us", "duration_us", "error", "_start")
+
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"] = None,
+                 sender_id: Optional[str] = None, action: Optional[str] = None, **attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.sender_id = sender_id if sender_id is not None else (parent.sender_id if parent else None)
+        self.action = action if action is not None else (parent.action if parent else None)
+        self.attributes: Dict[str, Any] = attributes
+        self.start_us = time.time_ns() // 1000
+        self.duration_us = None
+        self.error = None
+        self._start = time.perf_counter()
+
+    def finish(self) -> None:
+        self.duration_us = int((time.perf_counter() - self._start) * 1_000_000)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Innermost open span of this context (None outside of an action run)"""
+    return _current_span.get()
+
+
+def _log_context():
+    active = _current_span.get()
+    return (active.sender_id, active.action) if active else (None, None)
+
+
+set_log_context_provider(_log_context)
+
+
+class ChromeTraceExporter:
+    """Appends finished spans to a Chrome trace event file ("X" complete events).
+
+    The file uses the JSON array format without the closing bracket, which the trace
+    viewers accept, so it can be appended to by a long running action server."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._file = open(self.path, "a", encoding="utf-8")
+            if is_new:
+                self._file.write("[\n")
+            logger.info("Exporting traces to %s", self.path)
+        return self._file
+
+    def export(self, span: Span) -> None:
+        args = {
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "sender_id": span.sender_id,
+            "action": span.action,
+            **{key: str(value) for key, value in span.attributes.items()},
+        }
+        if span.error:
+            args["error"] = span.error
+
+        event = {
+            "name": span.name,
+            "cat": span.action or "trace",
+            "ph": "X",
+            "ts": span.start_us,
+            "dur": span.duration_us,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        line = json.dumps(event, ensure_ascii=False) + ",\n"
+
+        with self._lock:
+            f = self._open()
+            f.write(line)
+            f.flush()
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[ChromeTraceExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def _run(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+            if self.exporter is not None:
+                try:
+                    self.exporter.export(span)
+                except Exception as e:
+                    logger.warning("Failed to export span %s: %s", span.name, e)
+
+    @contextmanager
+    def start_trace(self, sender_id: str, action: str, **attributes) -> Iterator[Span]:
+        """Root span of one action run. Always sets the sender/action context (used by the
+        logs), spans are only exported when an exporter is configured."""
+        root = Span(action, trace_id=uuid.uuid4().hex, sender_id=sender_id, action=action, **attributes)
+        with self._run(root) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Child span of the current one; a no-op outside of a trace or with export disabled"""
+        parent = _current_span.get()
+        if parent is None or self.exporter is None:
+            yield None
+            return
+
+        with self._run(Span(name, trace_id=parent.trace_id, parent=parent, **attributes)) as child:
+            yield child
+
+
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+
+tracer = Tracer(ChromeTraceExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None)
+start_trace = tracer.start_trace
+span = tracer.span
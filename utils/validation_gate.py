@@ -0,0 +1,99 @@
+"""
+Confidence gate in front of the FlanT5 intent validation.
+
+The OutOfScopeValidator NLU component only acts when FlanT5 answers out_of_scope, so running
+flan-t5-large on messages DIET is already sure about is wasted work. A message skips the
+validation when its intent confidence and the margin over the runner-up intent of
+`intent_ranking` both clear their thresholds, configured from the environment (or the
+component's min_confidence / min_margin / skip_slot_answers in config.yml):
+
+    VALIDATION_GATE_MIN_CONFIDENCE=0.95       # 1.1 or more disables the gate (always validate)
+    VALIDATION_GATE_MIN_MARGIN=0.85
+    VALIDATION_GATE_SKIP_SLOT_ANSWERS=true    # false validates slot answers too
+
+The NLU pipeline does not know whether a form is active, so answers to a form question
+("Athens", "next friday", "from Rome to Paris on the 3rd", "2") are recognised from the message
+itself: an entity, date word or number, no keyword of a validated intent, and nothing but
+filler words besides them. They are never validated, like action_validate_intent skipped every
+message while a form was active; short messages with any other word ("weather in Athens",
+"tell me a joke") still are.
+
+benchmarks/replay_validation_gate.py replays logged trackers through the gate to pick them.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.date_utils import DATE_WORDS
+
+# intents whose messages are validated by FlanT5
+VALIDATED_INTENTS = ['find_compare_flights', 'suggest_hotels', 'explore_activities_places']
+
+# words of requests for the validated intents, a message with any of them is no slot answer
+INTENT_KEYWORDS = frozenset([
+    'flight', 'flights', 'fly', 'flying', 'plane', 'ticket', 'tickets', 'airline', 'book', 'booking',
+    'hotel', 'hotels', 'stay', 'room', 'rooms', 'accommodation', 'hostel',
+    'explore', 'visit', 'activities', 'activity', 'places', 'things', 'attractions', 'sightseeing',
+    'restaurant', 'restaurants', 'food', 'eat', 'trip', 'travel',
+])
+# words a form answer may carry around its city, date or number
+FILLER_WORDS = frozenset([
+    'a', 'an', 'the', 'to', 'from', 'in', 'on', 'at', 'of', 'for', 'and', 'until', 'till', 'around', 'by',
+    'i', 'we', 'me', 'us', 'my', 'our', 'it', "it's", 'is', 'be', 'will', "i'm", 'am', 'are', "we're",
+    'yes', 'yeah', 'no', 'ok', 'okay', 'sure', 'please', 'thanks', 'maybe', 'just', 'only',
+    'people', 'persons', 'person', 'passengers', 'passenger', 'adults', 'adult',
+    'back', 'return', 'returning', 'leaving', 'departing', 'going', 'then', 'this', 'that',
+])
+WORD_RE = re.compile(r"[a-z0-9']+")
+NUMBER_RE = re.compile(r"\d")
+
+
+def is_slot_answer(text: Optional[str], entities: Optional[List[Dict[str, Any]]]) -> bool:
+    """True for a bare city, date or number answer: an entity, date word or number, no intent
+    keyword, and only filler words besides them"""
+    if not text:
+        return False
+    chars = list(text.lower())
+    if any(word in INTENT_KEYWORDS for word in WORD_RE.findall("".join(chars))):
+        return False
+    for entity in entities or []:
+        for i in range(entity.get('start', 0), min(entity.get('end', 0), len(chars))):
+            chars[i] = ' '
+    words = WORD_RE.findall("".join(chars))
+    answers = [word for word in words if word in DATE_WORDS or NUMBER_RE.search(word)]
+    if not entities and not answers:
+        return False
+    return all(word in FILLER_WORDS for word in words if word not in answers)
+
+
+def intent_margin(intent: str, confidence: float, intent_ranking: Optional[List[Dict[str, Any]]]) -> float:
+    """Confidence of `intent` minus that of the best other intent (the whole confidence without a ranking)"""
+    others = [ranked.get('confidence') or 0.0 for ranked in intent_ranking or [] if ranked.get('name') != intent]
+    return confidence - max(others, default=0.0)
+
+
+class ValidationGate:
+    def __init__(self, min_confidence: float, min_margin: float, skip_slot_answers: bool = False):
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self.skip_slot_answers = skip_slot_answers
+
+    def should_validate(self, intent: str, confidence: Optional[float],
+                        intent_ranking: Optional[List[Dict[str, Any]]] = None, text: Optional[str] = None,
+                        entities: Optional[List[Dict[str, Any]]] = None) -> Tuple[bool, str]:
+        """(validate, reason): reason is "low_confidence", "low_margin", or "slot_answer" / "decisive" (skipped)"""
+        if self.skip_slot_answers and is_slot_answer(text, entities):
+            return False, "slot_answer"
+        confidence = confidence or 0.0
+        if confidence < self.min_confidence:
+            return True, "low_confidence"
+        if intent_margin(intent, confidence, intent_ranking) < self.min_margin:
+            return True, "low_margin"
+        return False, "decisive"
+
+
+validation_gate = ValidationGate(
+    min_confidence=float(os.getenv('VALIDATION_GATE_MIN_CONFIDENCE', '0.95')),
+    min_margin=float(os.getenv('VALIDATION_GATE_MIN_MARGIN', '0.85')),
+    skip_slot_answers=os.getenv('VALIDATION_GATE_SKIP_SLOT_ANSWERS', 'true').lower() == 'true',
+)